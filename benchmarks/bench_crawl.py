@@ -0,0 +1,107 @@
+"""End-to-end crawl benchmark against the local mock tibia.com server.
+
+Runs ``main_cli`` over a synthetic world x town matrix served by
+:mod:`benchmarks.mock_server` and reports requests/sec, parse time per page,
+peak RSS and total wall time. Nothing touches the real site::
+
+    python -m benchmarks.bench_crawl --worlds 30 --towns 18 --latency 50 --throttle-rate 0.02 --stream
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from benchmarks.mock_server import MockTibiaServer  # noqa: E402
+from tibiahouses import main as tibiahouses_main  # noqa: E402
+from tibiahouses.metrics import CrawlMetrics  # noqa: E402
+from tibiahouses.scheduler import RequestScheduler  # noqa: E402
+
+
+def peak_rss_mib() -> tuple[float, float]:
+    """Peak resident set size of this process and of its waited-for children, in MiB (Linux units)."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return own, children
+
+
+def run(args) -> dict:
+    scheduler = RequestScheduler(
+        max_in_flight=args.max_in_flight, rate=args.rate, max_retries=args.max_retries, backoff_base=0.05
+    )
+    with tempfile.TemporaryDirectory() as directory, MockTibiaServer(
+        worlds=args.worlds,
+        towns=args.towns,
+        houses=args.houses,
+        latency=args.latency / 1000,
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+    ) as server:
+        output = os.path.join(directory, "houses.csv")
+        metrics = CrawlMetrics()
+        asyncio.run(
+            tibiahouses_main.main_cli(
+                output,
+                scheduler=scheduler,
+                stream=args.stream,
+                parse_workers=args.parse_workers,
+                url=server.url,
+                metrics=metrics,
+            )
+        )
+        wall = metrics.wall_seconds
+        stats = server.stats()
+        with open(output, encoding="utf-8") as file:
+            rows = sum(1 for _ in file) - 1
+        if args.metrics:
+            metrics.save(args.metrics)
+    own_rss, children_rss = peak_rss_mib()
+    return {
+        "wall": wall,
+        "requests": stats["requests"],
+        "pages": stats["pages"],
+        "throttled": stats["throttled"],
+        "errors": stats["errors"],
+        "rows": rows,
+        "parse_seconds_per_page": metrics.summary()["parse_seconds_per_page"],
+        "stage_seconds": metrics.stages,
+        "peak_rss_mib": own_rss,
+        "children_rss_mib": children_rss,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark a full crawl against a local mock tibia.com.")
+    parser.add_argument("--worlds", type=int, default=30)
+    parser.add_argument("--towns", type=int, default=18)
+    parser.add_argument("--houses", type=int, default=60, help="Average houses per town (default: 60)")
+    parser.add_argument("--latency", type=float, default=20.0, help="Mean server latency in ms (default: 20)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of searches answered 403")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of searches answered 500")
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--parse-workers", type=int, default=0)
+    parser.add_argument("--max-in-flight", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=1000.0, help="Scheduler rate limit (default: 1000/s)")
+    parser.add_argument("--max-retries", type=int, default=5)
+    parser.add_argument("--metrics", metavar="PATH", help="Also save the crawl metrics (*.prom or JSON)")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    print(f"crawl: {args.worlds} worlds x {args.towns} towns, {result['rows']} rows")
+    print(f"wall time:     {result['wall']:.2f} s")
+    print(f"requests/sec:  {result['requests'] / result['wall']:.1f} ({result['requests']} requests)")
+    print(f"injected:      {result['throttled']} x 403, {result['errors']} x 500")
+    if result["parse_seconds_per_page"] is not None:
+        print(f"parse time:    {result['parse_seconds_per_page'] * 1000:.2f} ms/page")
+    stages = ", ".join(f"{stage} {seconds:.2f}" for stage, seconds in result["stage_seconds"].items())
+    print(f"stage seconds: {stages}")
+    print(f"peak RSS:      {result['peak_rss_mib']:.1f} MiB (children {result['children_rss_mib']:.1f} MiB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Import-time and footprint benchmark for the library entry points.
+
+Each measurement runs in a fresh interpreter. Reports the time to import
+``tibiahouses.main`` and the ``iter_houses`` API next to ``import pandas``,
+and the peak RSS of a one-town lookup through ``iter_houses`` against the
+local mock server compared with the same lookup through ``main_cli``. Fails
+if the API path loads pandas::
+
+    python -m benchmarks.bench_import --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ENV = {**os.environ, "PYTHONPATH": os.pathsep.join([os.path.join(ROOT, "src"), ROOT])}
+
+IMPORTS = {
+    "import pandas": "import pandas",
+    "import tibiahouses.main": "import tibiahouses.main",
+    "from tibiahouses import iter_houses": "from tibiahouses import iter_houses",
+}
+
+TIMED = """
+import sys, time
+start = time.perf_counter()
+{statement}
+print((time.perf_counter() - start) * 1000, "pandas" in sys.modules)
+"""
+
+LOOKUP = """
+import asyncio, resource, sys, tempfile
+from benchmarks.mock_server import MockTibiaServer
+
+async def lookup(url):
+    {body}
+
+with MockTibiaServer(worlds=30, towns=18, houses=60) as server:
+    rows = asyncio.run(lookup(server.url))
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, rows, "pandas" in sys.modules)
+"""
+
+LOOKUPS = {
+    "iter_houses": """from tibiahouses import iter_houses
+    return sum([1 async for _ in iter_houses(worlds=["Antica"], towns=["Thais"], url=url)])""",
+    "main_cli": """from tibiahouses.main import main_cli
+    from tibiahouses.planner import CrawlPlan
+    with tempfile.TemporaryDirectory() as directory:
+        await main_cli(directory + "/houses.csv", plan=CrawlPlan(["Antica"], ["Thais"]), url=url)
+        return sum(1 for _ in open(directory + "/houses.csv")) - 1""",
+}
+
+
+def python(code: str) -> list[str]:
+    result = subprocess.run(
+        [sys.executable, "-c", code], env=ENV, cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return result.stdout.split("\n")[-2].split()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark import time and one-town lookup footprint.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per import (default: 5)")
+    args = parser.parse_args(argv)
+
+    lazy = True
+    for label, statement in IMPORTS.items():
+        runs = [python(TIMED.format(statement=statement)) for _ in range(args.repeat)]
+        milliseconds = statistics.median(float(run[0]) for run in runs)
+        loads_pandas = runs[0][1] == "True"
+        print(f"{label:38} {milliseconds:8.1f} ms  pandas loaded: {'yes' if loads_pandas else 'no'}")
+        if label != "import pandas":
+            lazy = lazy and not loads_pandas
+    for label, body in LOOKUPS.items():
+        rss, rows, loads_pandas = python(LOOKUP.format(body=body))
+        print(f"one-town lookup via {label:18} {float(rss):8.1f} MiB peak RSS, {rows} rows")
+        if label == "iter_houses":
+            lazy = lazy and loads_pandas == "False"
+    if not lazy:
+        print("the iter_houses path imported pandas")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
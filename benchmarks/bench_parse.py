@@ -0,0 +1,56 @@
+"""Micro-benchmark for the house page parser.
+
+Times ``parse_houses`` against the original selector-per-cell implementation
+on a realistic full-size house page and fails when the speedup drops below
+``--min-speedup``::
+
+    python -m benchmarks.bench_parse --houses 150 --min-speedup 1.3
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from benchmarks.legacy import parse_houses_legacy  # noqa: E402
+from benchmarks.pages import make_houses, render_houses_page  # noqa: E402
+from tibiahouses.main import parse_houses, parse_houses_compact  # noqa: E402
+
+
+def best_of(func, page: str, number: int, repeat: int) -> float:
+    """Best per-call time in milliseconds."""
+    return min(timeit.repeat(lambda: func(page), number=number, repeat=repeat)) / number * 1000
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the house page parser.")
+    parser.add_argument("--houses", type=int, default=150, help="Houses on the page (default: 150)")
+    parser.add_argument("--number", type=int, default=20, help="Calls per timing run (default: 20)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs, best is kept (default: 5)")
+    parser.add_argument("--min-speedup", type=float, default=0.0, help="Fail below this speedup")
+    args = parser.parse_args(argv)
+
+    page = render_houses_page("Antica", "Thais", make_houses(args.houses))
+    if parse_houses(page) != parse_houses_legacy(page):
+        print("parse_houses output differs from the reference implementation")
+        return 1
+
+    legacy = best_of(parse_houses_legacy, page, args.number, args.repeat)
+    fast = best_of(parse_houses, page, args.number, args.repeat)
+    compact = best_of(parse_houses_compact, page, args.number, args.repeat)
+    speedup = legacy / fast
+    print(f"page: {len(page) / 1024:.0f} KiB, {args.houses} houses")
+    print(f"legacy parse_houses:  {legacy:8.3f} ms/page")
+    print(f"parse_houses:         {fast:8.3f} ms/page")
+    print(f"parse_houses_compact: {compact:8.3f} ms/page")
+    print(f"speedup: {speedup:.2f}x")
+    if speedup < args.min_speedup:
+        print(f"speedup below required {args.min_speedup:.2f}x")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
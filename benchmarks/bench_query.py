@@ -0,0 +1,103 @@
+"""Query latency of the in-memory house index against re-reading the CSV.
+
+Writes a synthetic snapshot of ``--worlds`` x ``--towns`` towns, loads it
+into a :class:`~tibiahouses.query.HouseIndex` and times typical bot
+queries against it, next to answering the same query the old way: reading
+and normalizing the whole CSV with pandas for every query::
+
+    python -m benchmarks.bench_query --worlds 60 --towns 18 --houses 80
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import pandas as pd  # noqa: E402
+
+from benchmarks.mock_server import town_names, world_names  # noqa: E402
+from benchmarks.pages import make_houses  # noqa: E402
+from tibiahouses.main import save_houses_to_file  # noqa: E402
+from tibiahouses.normalize import normalize_houses  # noqa: E402
+from tibiahouses.query import HouseIndex  # noqa: E402
+from tibiahouses.rows import HouseBatch, HouseTable  # noqa: E402
+
+QUERIES = {
+    "one town, auctioned, >= 100 sqm, by rent": {
+        "server": "Antica",
+        "city": "Thais",
+        "state": "auctioned",
+        "min_size": 100,
+    },
+    "auctioned >= 100 sqm everywhere, by rent": {"state": "auctioned", "min_size": 100},
+    "highest bids over 100k": {"min_bid": 100000, "sort": "bid", "descending": True},
+    "one world, largest first": {"server": "Antica", "sort": "size", "descending": True},
+}
+
+
+def snapshot(worlds: int, towns: int, houses: int) -> HouseTable:
+    table = HouseTable()
+    for world in world_names(worlds):
+        for number, town in enumerate(town_names(towns)):
+            unit_seed = zlib.crc32(f"{world}/{town}".encode())
+            rows = make_houses(houses, seed=unit_seed, first_id=10000 + 1000 * number)
+            table.append(HouseBatch(town, world, [tuple(value.replace("\xa0", " ") for value in r[1:]) for r in rows]))
+    return table
+
+
+def pandas_query(path: str, server=None, city=None, state=None, min_size=None, sort="rent", descending=False, **bids):
+    frame = normalize_houses(pd.read_csv(path, dtype=str, keep_default_na=False), keep_raw=True)
+    if server is not None:
+        frame = frame[frame["server"] == server]
+    if city is not None:
+        frame = frame[frame["city"] == city]
+    if state is not None:
+        frame = frame[frame["state"] == state]
+    if min_size is not None:
+        frame = frame[frame["size_sqm"] >= min_size]
+    if "min_bid" in bids:
+        frame = frame[frame["bid_gold"] >= bids["min_bid"]]
+    column = {"size": "size_sqm", "rent": "rent_gold", "bid": "bid_gold"}[sort]
+    return frame.sort_values(column, ascending=not descending).head(20)
+
+
+def timings(run, repeat: int) -> list[float]:
+    results = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        results.append((time.perf_counter() - started) * 1000)
+    return sorted(results)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark indexed house queries.")
+    parser.add_argument("--worlds", type=int, default=60, help="Worlds in the snapshot (default: 60)")
+    parser.add_argument("--towns", type=int, default=18, help="Towns per world (default: 18)")
+    parser.add_argument("--houses", type=int, default=80, help="Houses per town (default: 80)")
+    parser.add_argument("--repeat", type=int, default=1000, help="Index queries per measurement (default: 1000)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "houses.csv")
+        save_houses_to_file(snapshot(args.worlds, args.towns, args.houses), path)
+        started = time.perf_counter()
+        index = HouseIndex.load(path)
+        print(f"loaded {index.rows} houses in {time.perf_counter() - started:.2f} s")
+        print(f"{'query':42} {'matches':>8} {'p50 ms':>8} {'p99 ms':>8} {'pandas ms':>10}")
+        for label, query in QUERIES.items():
+            count, _ = index.query(**query)
+            indexed = timings(lambda: index.query(**query), args.repeat)
+            reread = timings(lambda: pandas_query(path, **query), 3)
+            p50, p99 = statistics.median(indexed), indexed[min(len(indexed) - 1, int(len(indexed) * 0.99))]
+            print(f"{label:42} {count:8} {p50:8.3f} {p99:8.3f} {statistics.median(reread):10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""The original selector-per-cell ``parse_houses``, kept as a reference.
+
+``tibiahouses.main.parse_houses`` must keep producing exactly this output
+(except for multi-word town names, which this version cuts to their last
+word); the tests use it as an oracle and ``bench_parse`` measures the
+speedup against it.
+"""
+
+from selectolax.parser import HTMLParser
+
+from tibiahouses.main import NotAvailableElementError
+
+
+def parse_houses_legacy(response: str) -> list[dict]:
+    parser = HTMLParser(response)
+    where = parser.css_first("#houses > div.Border_2 > div > div > div > div > div > div")
+    if where is None:
+        raise NotAvailableElementError("No house data found.")
+    where = where.text()
+    server = where.split(" ")[-1]
+    city = where.split(" ")[-3]
+    houses = parser.css(
+        "#houses > div.Border_2 > div > div > div > table > tbody > tr > td > div.InnerTableContainer > table > tbody > tr > td > div > table tbody > tr"  # noqa: E501
+    )[1:]
+    if not houses:
+        raise NotAvailableElementError
+    house_data = []
+    for house in houses:
+        if not house.css_first("td:nth-child(2)"):
+            continue
+        details = {
+            "name": house.css_first("td:nth-child(1)").text().replace("\xa0", " "),
+            "size": house.css_first("td:nth-child(2)").text().replace("\xa0", " "),
+            "rent": house.css_first("td:nth-child(3)").text().replace("\xa0", " "),
+            "status": house.css_first("td:nth-child(4)").text().replace("\xa0", " "),
+            "city": city,
+            "server": server,
+        }
+        house_data.append(details)
+    return house_data
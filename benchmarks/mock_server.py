@@ -0,0 +1,202 @@
+"""Local stand-in for the tibia.com house pages.
+
+Serves the bootstrap page and house detail pages (``page=view``) on GET and
+one house list per world/town on POST, with the same markup as the live
+site. Latency, throttling (403) and server errors (500) can be injected to
+exercise the scheduler. Run it on its own::
+
+    python -m benchmarks.mock_server --worlds 30 --towns 18 --latency 50
+
+or start it in a child process with :class:`MockTibiaServer`.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import zlib
+from functools import lru_cache
+
+from aiohttp import web
+
+from benchmarks.pages import (
+    TOWNS,
+    WORLDS,
+    make_houses,
+    render_bootstrap_page,
+    render_house_page,
+    render_houses_page,
+)
+
+
+def world_names(count: int) -> list[str]:
+    return [WORLDS[i % len(WORLDS)] + ("" if i < len(WORLDS) else str(i // len(WORLDS))) for i in range(count)]
+
+
+def town_names(count: int) -> list[str]:
+    return [TOWNS[i % len(TOWNS)] + ("" if i < len(TOWNS) else str(i // len(TOWNS))) for i in range(count)]
+
+
+def build_app(
+    worlds: int = 30,
+    towns: int = 18,
+    houses: int = 60,
+    latency: float = 0.0,
+    throttle_rate: float = 0.0,
+    error_rate: float = 0.0,
+    seed: int = 0,
+) -> web.Application:
+    """``latency`` is the mean delay per request in seconds; each town has 0..2*``houses`` houses.
+
+    House ids are shared by every world like on tibia.com: the houses of the
+    n-th town are numbered from ``10000 + 1000 * n``.
+    """
+    world_list, town_list = world_names(worlds), town_names(towns)
+    rng = random.Random(seed)
+    stats = {"requests": 0, "pages": 0, "details": 0, "throttled": 0, "errors": 0}
+    bootstrap = render_bootstrap_page(world_list, town_list)
+
+    @lru_cache(maxsize=None)
+    def town_houses(world: str, town: str) -> list[tuple[int, str, str, str, str]]:
+        unit_seed = zlib.crc32(f"{seed}/{world}/{town}".encode())
+        count = random.Random(unit_seed).randint(0, 2 * houses)
+        return make_houses(count, unit_seed, first_id=10000 + 1000 * town_list.index(town))
+
+    @lru_cache(maxsize=None)
+    def houses_page(world: str, town: str) -> str:
+        return render_houses_page(world, town, town_houses(world, town), world_list, town_list)
+
+    def house_page(world: str, house_id: str) -> str | None:
+        if world not in world_list or not house_id.isdigit():
+            return None
+        town, index = divmod(int(house_id) - 10000, 1000)
+        if not 0 <= town < len(town_list):
+            return None
+        houses_in_town = town_houses(world, town_list[town])
+        if not 0 <= index < len(houses_in_town):
+            return None
+        return render_house_page(world, houses_in_town[index])
+
+    async def delay():
+        if latency:
+            await asyncio.sleep(rng.uniform(0.5, 1.5) * latency)
+
+    async def index(request: web.Request) -> web.Response:
+        stats["requests"] += 1
+        await delay()
+        if request.query.get("page") == "view":
+            page = house_page(request.query.get("world", ""), request.query.get("houseid", ""))
+            if page is None:
+                return web.Response(status=404, text="Unknown house")
+            stats["details"] += 1
+            return web.Response(text=page, content_type="text/html")
+        return web.Response(text=bootstrap, content_type="text/html")
+
+    async def search(request: web.Request) -> web.Response:
+        stats["requests"] += 1
+        form = await request.post()
+        await delay()
+        roll = rng.random()
+        if roll < throttle_rate:
+            stats["throttled"] += 1
+            return web.Response(status=403, text="Forbidden")
+        if roll < throttle_rate + error_rate:
+            stats["errors"] += 1
+            return web.Response(status=500, text="Internal Server Error")
+        world, town = form.get("world", ""), form.get("town", "")
+        if world not in world_list or town not in town_list:
+            return web.Response(status=404, text="Unknown world or town")
+        stats["pages"] += 1
+        return web.Response(text=houses_page(world, town), content_type="text/html")
+
+    async def show_stats(request: web.Request) -> web.Response:
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.router.add_get("/community/", index)
+    app.router.add_post("/community/", search)
+    app.router.add_get("/stats", show_stats)
+    app["worlds"], app["towns"] = world_list, town_list
+    return app
+
+
+def _serve(options: dict, port_pipe):
+    port = options.pop("port", 0)
+
+    async def main():
+        runner = web.AppRunner(build_app(**options), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        port_pipe.send(runner.addresses[0][1])
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+class MockTibiaServer:
+    """Run the mock server in a child process so it does not share the crawler's CPU.
+
+    ``with MockTibiaServer(worlds=3, towns=2) as server: main_cli(..., url=server.url)``
+    """
+
+    def __init__(self, port: int = 0, **options):
+        self.options = {"port": port, **options}
+        self.url = ""
+        self._process: multiprocessing.Process | None = None
+
+    def start(self) -> "MockTibiaServer":
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        self._process = multiprocessing.Process(target=_serve, args=(dict(self.options), sender), daemon=True)
+        self._process.start()
+        if not receiver.poll(30):
+            self.stop()
+            raise RuntimeError("mock server did not start")
+        port = receiver.recv()
+        self.base_url = f"http://127.0.0.1:{port}"
+        self.url = f"{self.base_url}/community/?subtopic=houses"
+        return self
+
+    def stats(self) -> dict:
+        from urllib.request import urlopen
+
+        with urlopen(f"{self.base_url}/stats") as response:
+            return json.load(response)
+
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def __enter__(self) -> "MockTibiaServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Serve synthetic tibia.com house pages.")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--worlds", type=int, default=30)
+    parser.add_argument("--towns", type=int, default=18)
+    parser.add_argument("--houses", type=int, default=60, help="Average houses per town")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mean delay per request in milliseconds")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of searches answered 403")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of searches answered 500")
+    args = parser.parse_args(argv)
+    app = build_app(
+        worlds=args.worlds,
+        towns=args.towns,
+        houses=args.houses,
+        latency=args.latency / 1000,
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+    )
+    print(f"Serving on http://127.0.0.1:{args.port}/community/?subtopic=houses")
+    web.run_app(app, host="127.0.0.1", port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
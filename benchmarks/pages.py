@@ -0,0 +1,173 @@
+"""Synthetic tibia.com pages with the same markup as the live site.
+
+Used by the benchmarks and tests so parser work can be measured on
+full-size pages without touching the network.
+"""
+
+import random
+
+TOWNS = [
+    "Ab'Dendriel", "Ankrahmun", "Carlin", "Darashia", "Edron", "Farmine", "Gray Beach", "Issavi",
+    "Kazordoon", "Liberty Bay", "Moonfall", "Port Hope", "Rathleton", "Silvertides", "Svargrond",
+    "Thais", "Venore", "Yalahar",
+]  # fmt: skip
+
+WORLDS = [
+    "Antica", "Astera", "Bona", "Calmera", "Celesta", "Damora", "Dibra", "Epoca", "Ferobra", "Gladera",
+    "Harmonia", "Honbra", "Inabra", "Kalibra", "Lobera", "Menera", "Monza", "Nefera", "Olima", "Pacera",
+    "Peloria", "Premia", "Quelibra", "Refugia", "Secura", "Serdebra", "Solidera", "Talera", "Vunira", "Zunera",
+]  # fmt: skip
+
+STREETS = ["Alai Flats, Flat", "Upper Swamp Lane", "Harbour Place", "Magician's Alley", "Mill Avenue", "Sunset Homes"]
+
+_FILLER = "".join(
+    f'<div class="menuitem" id="menu{i}"><a href="https://www.tibia.com/news/?subtopic=n{i}">'
+    f'<span class="Icon"></span><span class="Label">Menu entry {i}</span></a></div>'
+    for i in range(120)
+)
+
+
+def make_houses(count: int, seed: int = 0, first_id: int = 10000) -> list[tuple[int, str, str, str, str]]:
+    """Return ``count`` ``(house_id, name, size, rent, status)`` rows as displayed on tibia.com."""
+    rng = random.Random(seed)
+    houses = []
+    for index in range(count):
+        size = rng.randint(18, 480)
+        status = rng.choice(
+            [
+                "auctioned (no bid yet)",
+                f"auctioned ({rng.randint(1, 9999) * 100:,}\xa0gold; {rng.randint(1, 23)}\xa0hours left)",
+                f"auctioned ({rng.randint(1, 9999) * 100:,}\xa0gold; {rng.randint(1, 6)}\xa0days left)",
+                "rented",
+            ]
+        )
+        houses.append(
+            (
+                first_id + index,
+                f"{STREETS[index % len(STREETS)]} {index + 1:02d}",
+                f"{size}\xa0sqm",
+                f"{size * 100:,}\xa0gold",
+                status,
+            )
+        )
+    return houses
+
+
+def _search_form(worlds: list[str], towns: list[str]) -> str:
+    options = "".join(f"<option>{world}</option>" for world in worlds)
+    labels = "".join(f'<label><input type="radio" name="town" value="{town}"/>{town}</label>' for town in towns)
+    return f"""
+    <form action="https://www.tibia.com/community/?subtopic=houses" method="post">
+      <div class="TableContainer"><table class="Table1"><tbody><tr><td>
+        <div class="InnerTableContainer"><table><tbody>
+          <tr><td><div class="TableContentContainer"><table class="TableContent"><tbody><tr><td>
+            <div class="World"><div class="WorldSelectionDropDown"><select name="world">
+              <option>Choose world</option>{options}
+            </select></div></div>
+          </td></tr></tbody></table></div></td></tr>
+          <tr><td><div class="TableContentContainer"><table class="TableContent"><tbody>
+            <tr><td>Town</td><td>Status</td><td>Type</td></tr>
+            <tr><td>{labels}</td><td><label>all states</label></td><td><label>houses</label></td></tr>
+          </tbody></table></div></td></tr>
+        </tbody></table></div>
+      </td></tr></tbody></table></div>
+    </form>"""
+
+
+def _house_row(house: tuple[int, str, str, str, str], world: str, town: str) -> str:
+    house_id, name, size, rent, status = house
+    return f"""
+      <tr style="background-color:#F1E0C6;">
+        <td width="40%"><nobr>{name}</nobr></td>
+        <td width="10%"><nobr>{size}</nobr></td>
+        <td width="10%"><nobr>{rent}</nobr></td>
+        <td width="40%"><nobr>{status}</nobr></td>
+        <td><form action="https://www.tibia.com/community/?subtopic=houses&amp;page=view" method="post">
+          <input type="hidden" name="houseid" value="{house_id}"/>
+          <input type="hidden" name="world" value="{world}"/>
+          <input type="hidden" name="town" value="{town}"/>
+          <div class="BigButton"><div class="BigButtonOver"></div>
+            <input class="BigButtonText" type="submit" value="View"/></div>
+        </form></td>
+      </tr>"""
+
+
+def _page(content: str) -> str:
+    return f"""<!DOCTYPE html>
+<html><head><title>Tibia - Free Multiplayer Online Role Playing Game - Community</title></head>
+<body><div id="MenuColumn">{_FILLER}</div>
+<div id="ContentColumn"><div class="Content">
+<div id="houses" class="Box">
+  <div class="Corner-tl"></div><div class="Corner-tr"></div><div class="Border_1"></div>
+  <div class="BorderTitleText"></div>
+  <div class="Border_2"><div class="Border_3"><div class="BoxContent">{content}</div></div></div>
+  <div class="Border_1"></div><div class="CornerWrapper-b"></div>
+</div></div></div></body></html>"""
+
+
+def render_bootstrap_page(worlds: list[str] = WORLDS, towns: list[str] = TOWNS) -> str:
+    """The house search page used to discover worlds and towns."""
+    return _page(_search_form(worlds, towns))
+
+
+def render_houses_page(
+    world: str,
+    town: str,
+    houses: list[tuple[int, str, str, str, str]],
+    worlds: list[str] = WORLDS,
+    towns: list[str] = TOWNS,
+) -> str:
+    """The result page for one world/town search, followed by the search form like on tibia.com."""
+    if houses:
+        rows = "".join(_house_row(house, world, town) for house in houses)
+    else:
+        rows = '<tr><td colspan="5">No houses found.</td></tr>'
+    return _page(
+        f"""
+    <div class="TableContainer">
+      <div class="CaptionContainer"><div class="CaptionInnerContainer">
+        <div class="Text">Houses and Guildhalls in {town} on {world}</div>
+      </div></div>
+      <table class="Table3"><tbody><tr><td>
+        <div class="InnerTableContainer"><table style="width:100%;"><tbody><tr><td>
+          <div class="TableContentContainer"><table class="TableContent" width="100%"><tbody>
+            <tr class="LabelH"><td>Name</td><td>Size</td><td>Rent</td><td>Status</td><td>&#160;</td></tr>
+            {rows}
+          </tbody></table></div>
+        </td></tr></tbody></table></div>
+      </td></tr></tbody></table>
+    </div>
+    {_search_form(worlds, towns)}"""
+    )
+
+
+def render_house_page(world: str, house: tuple[int, str, str, str, str]) -> str:
+    """The detail page of one house, as opened by its "View" button."""
+    house_id, name, size, rent, status = house
+    rng = random.Random(house_id * 31 + len(world))
+    sqm = size.split("\xa0")[0]
+    monthly = rent.split("\xa0")[0].replace(",", "")
+    if status == "rented":
+        state = (
+            f"The house has been rented by Player {rng.randint(1, 999)}. He has paid the rent until "
+            f"Jan {rng.randint(10, 28)} 2025, 10:00:00 CET."
+        )
+    else:
+        end = f"The auction will end at Jan {rng.randint(10, 28)} 2025, 10:00:00 CET."
+        if "no bid" in status:
+            bid = "No bid has been submitted so far."
+        else:
+            amount = status.split("(")[1].split("\xa0")[0].replace(",", "")
+            bid = f"The highest bid so far is {amount} gold and has been submitted by Bidder {rng.randint(1, 999)}."
+        state = f"The house is currently being auctioned. {end} {bid}"
+    return _page(
+        f"""
+    <div class="TableContainer"><table class="Table1"><tbody><tr><td>
+      <div class="InnerTableContainer"><table><tbody><tr>
+        <td><img src="https://static.tibia.com/images/houses/house_{house_id}.png" width="128" height="128"/></td>
+        <td><b>{name}</b><br/>This house has {rng.randint(1, 6)} beds.<br/><br/>
+          The house has a size of {sqm} square meters. The monthly rent is {monthly} gold and will be debited
+          to the bank account on {world}.<br/><br/>{state}</td>
+      </tr></tbody></table></div>
+    </td></tr></tbody></table></div>"""
+    )
@@ -1,8 +1,7 @@
 #!/usr/bin/env python3
 """Script to run the Tibia houses scraper."""
 
-import asyncio
-from tibiahouses.main import main  # type: ignore
+from tibiahouses.main import cli
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    cli()
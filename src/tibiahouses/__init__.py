@@ -0,0 +1,10 @@
+__all__ = ["iter_houses"]
+
+
+def __getattr__(name: str):
+    # Resolved on first use so importing a submodule does not load the crawler.
+    if name == "iter_houses":
+        from tibiahouses.api import iter_houses
+
+        return iter_houses
+    raise AttributeError(f"module 'tibiahouses' has no attribute {name!r}")
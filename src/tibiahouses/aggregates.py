@@ -0,0 +1,231 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from tibiahouses.main import normalized_frame
+from tibiahouses.rows import HouseTable
+from tibiahouses.writers import HOUSE_FIELDS
+
+TOWN_KEYS = ["server", "city"]
+RAW_FIELDS = ["name", "size", "rent", "status"]
+TABLES = ("towns", "worlds", "cheapest")
+
+
+def aggregate_paths(output_file: str) -> dict[str, str]:
+    """Summary files next to ``output_file``, e.g. ``data/houses.towns.csv`` for ``data/houses.csv``."""
+    stem = os.path.splitext(output_file.rstrip("/"))[0]
+    return {table: f"{stem}.{table}.csv" for table in TABLES}
+
+
+def _measures(houses: pd.DataFrame) -> pd.DataFrame:
+    """Per-house columns the aggregates are computed from, all in one vectorized pass."""
+    state = houses["state"].astype("string")
+    auction = (state == "auctioned").fillna(False).to_numpy(dtype=bool)
+    bid = houses["bid_gold"].astype("Float64").to_numpy(dtype="float64", na_value=np.nan)
+    size = houses["size_sqm"].astype("Float64").to_numpy(dtype="float64", na_value=np.nan)
+    with_bid = auction & ~np.isnan(bid)
+    return pd.DataFrame(
+        {
+            "server": houses["server"].astype(str).to_numpy(),
+            "city": houses["city"].astype(str).to_numpy(),
+            "auction": auction,
+            "bid": with_bid,
+            "rented": (state == "rented").fillna(False).to_numpy(dtype=bool),
+            "rent": houses["rent_gold"].astype("Float64").to_numpy(dtype="float64", na_value=np.nan),
+            "size": size,
+            "bid_gold": np.where(with_bid, bid, np.nan),
+            "bid_per_sqm": np.where(with_bid, bid / size, np.nan),
+        }
+    )
+
+
+def _summarize(measures: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    grouped = measures.groupby(keys, sort=True)
+    return grouped.agg(
+        houses=("auction", "size"),
+        auctions=("auction", "sum"),
+        bids=("bid", "sum"),
+        rented=("rented", "sum"),
+        median_rent=("rent", "median"),
+        median_size=("size", "median"),
+        median_bid_per_sqm=("bid_per_sqm", "median"),
+        max_bid=("bid_gold", "max"),
+    ).reset_index()
+
+
+def town_fingerprints(houses: pd.DataFrame) -> pd.DataFrame:
+    """One hash per town of its raw rows, independent of row order; equal hashes mean unchanged towns."""
+    hashes = pd.util.hash_pandas_object(houses[RAW_FIELDS].astype(str), index=False).to_numpy()
+    frame = pd.DataFrame(
+        {"server": houses["server"].astype(str).to_numpy(), "city": houses["city"].astype(str).to_numpy()}
+    )
+    frame["fingerprint"] = hashes
+    summed = frame.groupby(TOWN_KEYS, sort=True)["fingerprint"].sum().reset_index()
+    summed["fingerprint"] = [f"{value:016x}" for value in summed["fingerprint"].to_numpy(dtype=np.uint64)]
+    return summed
+
+
+def cheapest_houses(houses: pd.DataFrame, top: int = 5) -> pd.DataFrame:
+    """The ``top`` cheapest auctioned houses of every town: by current bid, houses without a bid first, then rent."""
+    measures = _measures(houses)
+    frame = pd.DataFrame(
+        {
+            "server": measures["server"],
+            "city": measures["city"],
+            "name": houses["name"].astype(str).to_numpy(),
+            "size_sqm": measures["size"],
+            "rent_gold": measures["rent"],
+            "bid_gold": measures["bid_gold"],
+            "price": np.where(measures["bid"], measures["bid_gold"], 0.0),
+        }
+    )[measures["auction"].to_numpy()]
+    frame = frame.sort_values(TOWN_KEYS + ["price", "rent_gold", "name"], kind="stable")
+    frame = frame.groupby(TOWN_KEYS, sort=False).head(top)
+    frame.insert(2, "rank", frame.groupby(TOWN_KEYS, sort=False).cumcount() + 1)
+    return frame.drop(columns="price").reset_index(drop=True)
+
+
+def aggregate_houses(houses: pd.DataFrame, top: int = 5) -> dict[str, pd.DataFrame]:
+    """Per-town and per-world market summaries and the cheapest houses of a normalized crawl.
+
+    ``houses`` has the raw and typed columns of :func:`normalize_houses` with
+    ``keep_raw``. Every table is sorted by server and town; the towns table
+    records ``top`` so a later update knows how its cheapest rows were cut.
+    """
+    measures = _measures(houses)
+    towns = _summarize(measures, TOWN_KEYS).merge(town_fingerprints(houses), on=TOWN_KEYS)
+    towns["top"] = top
+    return {"towns": towns, "worlds": _summarize(measures, ["server"]), "cheapest": cheapest_houses(houses, top)}
+
+
+def _reusable(previous: dict[str, pd.DataFrame] | None, top: int) -> bool:
+    """Whether ``previous`` aggregates can be updated, i.e. they cut the same number of cheapest houses."""
+    return previous is not None and "top" in previous["towns"] and not (previous["towns"]["top"] != top).any()
+
+
+def _towns(table: pd.DataFrame) -> set[tuple[str, str]]:
+    return set(zip(table["server"].astype(str), table["city"].astype(str)))
+
+
+def _town_index(towns: set[tuple[str, str]]) -> pd.MultiIndex:
+    return pd.MultiIndex.from_tuples(sorted(towns), names=TOWN_KEYS)
+
+
+def changed_towns(houses: pd.DataFrame, previous_towns: pd.DataFrame) -> set[tuple[str, str]]:
+    """Towns of ``houses`` whose fingerprint differs from, or is missing in, a previous towns table."""
+    known = town_fingerprints(houses).merge(previous_towns[TOWN_KEYS + ["fingerprint"]], on=TOWN_KEYS, how="left")
+    return _towns(known[known["fingerprint_x"] != known["fingerprint_y"]])
+
+
+def update_aggregates(
+    houses: pd.DataFrame,
+    previous: dict[str, pd.DataFrame] | None,
+    top: int = 5,
+    changed: set[tuple[str, str]] | None = None,
+    towns: set[tuple[str, str]] | None = None,
+) -> tuple[dict[str, pd.DataFrame], int]:
+    """The aggregates of ``houses``, recomputing only what changed since ``previous``.
+
+    Towns not in ``changed`` keep their previous rows; only the houses of
+    changed towns are grouped again, and worlds only when one of their towns
+    changed or went away. Without ``changed`` the towns whose fingerprint
+    differs are taken. With it nothing is fingerprinted again, and ``houses``
+    may be limited to the worlds of the changed towns when ``towns`` lists
+    every town of the crawl. Returns the tables and the number of towns
+    recomputed. Without ``previous``, or when it kept a different number of
+    cheapest houses per town, everything is computed.
+    """
+    if not _reusable(previous, top):
+        tables = aggregate_houses(houses, top)
+        return tables, len(tables["towns"])
+    if changed is None:
+        changed = changed_towns(houses, previous["towns"])
+    if towns is None:
+        towns = _towns(houses)
+    previous_towns = _towns(previous["towns"])
+    # A town missing from the previous aggregates has no rows to keep, whatever the caller tracked.
+    changed = (set(changed) & towns) | (towns - previous_towns)
+    servers = {server for server, _ in changed | (previous_towns - towns)}
+    current, changed_index = _town_index(towns), _town_index(changed)
+
+    town_index = pd.MultiIndex.from_arrays([houses["server"].astype(str), houses["city"].astype(str)])
+    rows = houses[town_index.isin(changed_index)]
+
+    def keep(table: pd.DataFrame) -> pd.DataFrame:
+        index = pd.MultiIndex.from_frame(table[TOWN_KEYS].astype(str))
+        return table[index.isin(current) & ~index.isin(changed_index)]
+
+    fresh = aggregate_houses(rows, top) if len(rows) else None
+    tables = {}
+    for table in ("towns", "cheapest"):
+        parts = [keep(previous[table])] + ([fresh[table]] if fresh is not None else [])
+        tables[table] = pd.concat(parts, ignore_index=True).sort_values(
+            TOWN_KEYS + (["rank"] if table == "cheapest" else []), kind="stable", ignore_index=True
+        )
+    world_rows = houses[houses["server"].astype(str).isin(servers)]
+    worlds = previous["worlds"][
+        ~previous["worlds"]["server"].astype(str).isin(servers)
+        & previous["worlds"]["server"].astype(str).isin({server for server, _ in towns})
+    ]
+    if len(world_rows):
+        worlds = pd.concat([worlds, _summarize(_measures(world_rows), ["server"])], ignore_index=True)
+    tables["worlds"] = worlds.sort_values("server", kind="stable", ignore_index=True)
+    return tables, len(changed)
+
+
+def write_aggregates(
+    houses: HouseTable,
+    crawled_at: datetime,
+    output_file: str,
+    top: int = 5,
+    frame: pd.DataFrame | None = None,
+    changed: set[tuple[str, str]] | None = None,
+) -> int:
+    """Save the market aggregates of a crawl next to ``output_file``; returns the towns recomputed.
+
+    The aggregates the previous crawl saved there are updated with
+    :func:`update_aggregates`: ``changed`` are the towns the caller knows to
+    have changed, e.g. from a delta; without it the towns are fingerprinted.
+    ``frame`` is the normalized crawl when the caller already has it;
+    otherwise only the worlds with a changed town are normalized.
+    """
+    previous = load_aggregates(output_file)
+    if frame is not None or not _reusable(previous, top):
+        frame = normalized_frame(houses, crawled_at) if frame is None else frame
+        tables, recomputed = update_aggregates(frame, previous, top, changed)
+    else:
+        towns = {(batch.server, batch.city) for batch in houses.batches if len(batch)}
+        if changed is None:
+            changed = changed_towns(pd.DataFrame(houses.columns(), columns=HOUSE_FIELDS), previous["towns"])
+        # Worlds with a changed, new or vanished town are summarized again and need their rows.
+        servers = {server for server, _ in changed | (towns ^ _towns(previous["towns"]))}
+        rows = normalized_frame(HouseTable(batch for batch in houses.batches if batch.server in servers), crawled_at)
+        tables, recomputed = update_aggregates(rows, previous, top, changed, towns)
+    save_aggregates(tables, output_file)
+    return recomputed
+
+
+def aggregates_follow(output_file: str) -> bool:
+    """Whether the aggregates next to ``output_file`` were saved after it, so they describe its rows."""
+    paths = list(aggregate_paths(output_file).values())
+    if not os.path.exists(output_file) or not all(os.path.exists(path) for path in paths):
+        return False
+    return min(os.path.getmtime(path) for path in paths) >= os.path.getmtime(output_file)
+
+
+def save_aggregates(tables: dict[str, pd.DataFrame], output_file: str):
+    for table, path in aggregate_paths(output_file).items():
+        tables[table].to_csv(path, index=False)
+
+
+def load_aggregates(output_file: str) -> dict[str, pd.DataFrame] | None:
+    """The aggregates saved next to ``output_file`` by the previous crawl, or ``None``."""
+    paths = aggregate_paths(output_file)
+    if not all(os.path.exists(path) for path in paths.values()):
+        return None
+    text = {"server": str, "city": str, "name": str, "fingerprint": str}
+    return {
+        table: pd.read_csv(path, dtype=text, keep_default_na=False, na_values=[""]) for table, path in paths.items()
+    }
@@ -0,0 +1,55 @@
+from typing import AsyncIterator
+
+import rnet
+
+from tibiahouses.cache import ResponseCache
+from tibiahouses.main import (
+    HOUSES_URL,
+    NotAvailableElementError,
+    create_client,
+    fetch_data_as_completed,
+    plan_forms,
+    read_batch,
+)
+from tibiahouses.metrics import CrawlMetrics
+from tibiahouses.planner import CrawlPlan
+from tibiahouses.scheduler import RequestScheduler
+from tibiahouses.writers import HOUSE_FIELDS
+
+
+async def iter_houses(
+    worlds: list[str] | None = None,
+    towns: list[str] | None = None,
+    states: list[str] | None = None,
+    types: list[str] | None = None,
+    scheduler: RequestScheduler | None = None,
+    cache: ResponseCache | None = None,
+    client: rnet.Client | None = None,
+    metrics: CrawlMetrics | None = None,
+    url: str = HOUSES_URL,
+) -> AsyncIterator[dict]:
+    """Yield house rows as each search page is parsed, without writing any file.
+
+    ``worlds``, ``towns``, ``states`` and ``types`` narrow the crawl like the
+    CLI filters. Pages arrive in completion order, so rows of different
+    towns interleave. A page that cannot be fetched or stays throttled
+    raises :class:`NotAvailableElementError`. Nothing here imports pandas::
+
+        async for house in iter_houses(worlds=["Antica"], towns=["Thais"]):
+            print(house["name"], house["status"])
+    """
+    plan = CrawlPlan(worlds=worlds, towns=towns, states=states, types=types)
+    scheduler = scheduler or RequestScheduler()
+    client = client or create_client()
+    metrics = metrics or CrawlMetrics()
+    form_data = await plan_forms(client, url, plan, scheduler, None, metrics)
+    async for form, response in fetch_data_as_completed(
+        client, url, form_data, scheduler=scheduler, metrics=metrics
+    ):
+        batch = await read_batch(response, scheduler.retry_statuses, None, cache, form, metrics)
+        if batch is None:
+            raise NotAvailableElementError(
+                f"{form[0][1]} / {form[1][1]} still throttled after {scheduler.max_retries} retries"
+            )
+        for record in batch.records():
+            yield dict(zip(HOUSE_FIELDS, record))
@@ -0,0 +1,264 @@
+import hashlib
+import json
+import os
+import sqlite3
+import zlib
+from datetime import datetime
+
+from tibiahouses.cache import HousesPayload, cache_key
+from tibiahouses.history import HistoryStore
+from tibiahouses.main import (
+    NotAvailableElementError,
+    normalized_frame,
+    parse_cities,
+    parse_houses_compact,
+    parse_servers,
+    save_houses_to_file,
+)
+from tibiahouses.rows import HouseBatch, HouseTable
+
+BOOTSTRAP_UNIT = "bootstrap"
+
+
+def page_digest(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def decompress_page(blob: bytes) -> str:
+    return zlib.decompress(blob).decode("utf-8")
+
+
+class ArchiveRun:
+    """Raw pages of one crawl, committed when the archive is closed.
+
+    Unlike a history run the pages are kept when the crawl fails halfway:
+    the raw responses of a broken crawl are what a parser fix is tested on.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, crawled_at: datetime, level: int):
+        self._connection = connection
+        self._level = level
+        self.crawled_at = crawled_at.isoformat()
+        self.pages = 0
+        cursor = connection.execute("INSERT INTO crawls (crawled_at) VALUES (?)", (self.crawled_at,))
+        self.crawl_id = cursor.lastrowid
+
+    def plan(self, form_data: list[list[tuple[str, str]]]):
+        """Record the planned units, so a replay returns the pages in crawl order."""
+        self._connection.execute(
+            "UPDATE crawls SET units = ? WHERE id = ?",
+            (json.dumps([cache_key(form) for form in form_data]), self.crawl_id),
+        )
+
+    def add(self, form: list[tuple[str, str]] | None, body: str):
+        """Store the body of a search page, or of the bootstrap page when ``form`` is ``None``."""
+        encoded = body.encode("utf-8")
+        digest = page_digest(encoded)
+        cursor = self._connection.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,))
+        if cursor.fetchone() is None:
+            self._connection.execute(
+                "INSERT INTO blobs (digest, size, body) VALUES (?, ?, ?)",
+                (digest, len(encoded), zlib.compress(encoded, self._level)),
+            )
+        unit = cache_key(form) if form else BOOTSTRAP_UNIT
+        fields = dict(form) if form else {}
+        self._connection.execute(
+            "INSERT OR REPLACE INTO pages (crawl_id, unit, world, town, digest) VALUES (?, ?, ?, ?, ?)",
+            (self.crawl_id, unit, fields.get("world"), fields.get("town"), digest),
+        )
+        self.pages += 1
+
+
+class PageArchive:
+    """Compressed archive of the raw pages of every crawl.
+
+    Page bodies are stored once per content hash, zlib compressed, so a page
+    that did not change between crawls costs one index row. Pages are indexed
+    by crawl and by (world, town, crawl time), and :meth:`pages` returns a
+    crawl in its original order for an offline replay.
+    """
+
+    def __init__(self, path: str = "data/archive.sqlite", level: int = 6):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.level = level
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS crawls (
+                    id INTEGER PRIMARY KEY,
+                    crawled_at TEXT NOT NULL,
+                    units TEXT
+                );
+                CREATE TABLE IF NOT EXISTS blobs (
+                    digest TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    body BLOB NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS pages (
+                    crawl_id INTEGER NOT NULL REFERENCES crawls (id),
+                    unit TEXT NOT NULL,
+                    world TEXT,
+                    town TEXT,
+                    digest TEXT NOT NULL REFERENCES blobs (digest),
+                    PRIMARY KEY (crawl_id, unit)
+                );
+                CREATE INDEX IF NOT EXISTS crawls_time ON crawls (crawled_at);
+                CREATE INDEX IF NOT EXISTS pages_location ON pages (world, town, crawl_id);
+                """
+            )
+
+    def run(self, crawled_at: datetime) -> ArchiveRun:
+        return ArchiveRun(self._connection, crawled_at, self.level)
+
+    def crawls(self) -> list[dict]:
+        """Every archived crawl with its page count, oldest first."""
+        rows = self._connection.execute(
+            "SELECT crawls.id, crawls.crawled_at, COUNT(pages.unit) FROM crawls"
+            " LEFT JOIN pages ON pages.crawl_id = crawls.id GROUP BY crawls.id ORDER BY crawls.crawled_at, crawls.id"
+        )
+        return [{"id": crawl_id, "crawled_at": crawled_at, "pages": pages} for crawl_id, crawled_at, pages in rows]
+
+    def latest(self) -> int | None:
+        row = self._connection.execute("SELECT id FROM crawls ORDER BY crawled_at DESC, id DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def crawled_at(self, crawl_id: int) -> datetime:
+        row = self._connection.execute("SELECT crawled_at FROM crawls WHERE id = ?", (crawl_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"no archived crawl {crawl_id}")
+        return datetime.fromisoformat(row[0])
+
+    def pages(self, crawl_id: int) -> list[tuple[str, bytes]]:
+        """``(unit, compressed body)`` of every page of a crawl, bootstrap page first, then in crawl order."""
+        row = self._connection.execute("SELECT units FROM crawls WHERE id = ?", (crawl_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"no archived crawl {crawl_id}")
+        order = {unit: index for index, unit in enumerate(json.loads(row[0] or "[]"))}
+        order[BOOTSTRAP_UNIT] = -1
+        pages = self._connection.execute(
+            "SELECT pages.unit, blobs.body FROM pages JOIN blobs ON blobs.digest = pages.digest"
+            " WHERE pages.crawl_id = ? ORDER BY pages.rowid",
+            (crawl_id,),
+        ).fetchall()
+        return sorted(pages, key=lambda page: order.get(page[0], len(order)))
+
+    def find(
+        self, world: str, town: str, since: datetime | None = None, until: datetime | None = None
+    ) -> list[tuple[str, str]]:
+        """``(crawled_at, body)`` of every archived page of one world and town, oldest first."""
+        query = (
+            "SELECT crawls.crawled_at, blobs.body FROM pages"
+            " JOIN crawls ON crawls.id = pages.crawl_id JOIN blobs ON blobs.digest = pages.digest"
+            " WHERE pages.world = ? AND pages.town = ?"
+        )
+        params: list = [world, town]
+        if since is not None:
+            query += " AND crawls.crawled_at >= ?"
+            params.append(since.isoformat())
+        if until is not None:
+            query += " AND crawls.crawled_at <= ?"
+            params.append(until.isoformat())
+        rows = self._connection.execute(query + " ORDER BY crawls.crawled_at", params)
+        return [(crawled_at, decompress_page(body)) for crawled_at, body in rows]
+
+    def stats(self) -> dict[str, int]:
+        """Page count, distinct bodies and their raw and stored sizes."""
+        pages = self._connection.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        blobs, raw, stored = self._connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(body)), 0) FROM blobs"
+        ).fetchone()
+        return {"pages": pages, "blobs": blobs, "raw_bytes": raw, "stored_bytes": stored}
+
+    def close(self):
+        self._connection.commit()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _parse_archived_page(blob: bytes) -> HousesPayload:
+    """Parser worker of :func:`replay_cli`; pages cross the process boundary still compressed."""
+    return parse_houses_compact(decompress_page(blob))
+
+
+def _check_bootstrap(blob: bytes):
+    """Parse the archived bootstrap page the crawl planned its units from."""
+    data = decompress_page(blob)
+    cities, servers = parse_cities(data), parse_servers(data)
+    if not cities or not servers:
+        raise NotAvailableElementError("No cities or servers found.")
+    print(f"Bootstrap page: {len(servers)} worlds, {len(cities)} towns")
+
+
+def _parse_archived_pages(
+    pages: list[tuple[str, bytes]], processes: int | None, failed: list[tuple[str, str]]
+) -> HouseTable:
+    """Rows of the archived house ``pages`` in crawl order; pages that fail to parse go to ``failed``."""
+    result = HouseTable()
+    executor = None
+    if processes != 0:
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(max_workers=processes)
+    try:
+        pending = [executor.submit(_parse_archived_page, blob) for _, blob in pages] if executor is not None else []
+        for index, (unit, blob) in enumerate(pages):
+            try:
+                payload = pending[index].result() if pending else _parse_archived_page(blob)
+            except Exception as error:
+                failed.append((unit, str(error) or type(error).__name__))
+            else:
+                result.append(HouseBatch(*payload))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return result
+
+
+def replay_cli(
+    archive: PageArchive,
+    output_file,
+    crawl_id: int | None = None,
+    processes: int | None = None,
+    normalize: bool = False,
+    history: HistoryStore | None = None,
+) -> list[tuple[str, str]]:
+    """Parse an archived crawl again, offline, and save it like the original crawl did.
+
+    The house pages are parsed in ``processes`` worker processes (one per
+    CPU by default, 0 parses in this process) and the rows saved in crawl
+    order with the crawl's own timestamp, so a replay with ``history``
+    backfills that crawl. Returns the ``(unit, error)`` of pages that fail
+    to parse.
+    """
+    crawl_id = archive.latest() if crawl_id is None else crawl_id
+    if crawl_id is None:
+        raise NotAvailableElementError("The archive holds no crawl.")
+    crawled_at = archive.crawled_at(crawl_id)
+    pages = archive.pages(crawl_id)
+    failed: list[tuple[str, str]] = []
+    if pages and pages[0][0] == BOOTSTRAP_UNIT:
+        unit, blob = pages.pop(0)
+        try:
+            _check_bootstrap(blob)
+        except Exception as error:
+            failed.append((unit, str(error) or type(error).__name__))
+    result = _parse_archived_pages(pages, processes, failed)
+    save_houses_to_file(normalized_frame(result, crawled_at) if normalize else result, output_file)
+    if history is not None:
+        with history.run(crawled_at) as run:
+            for batch in result.batches:
+                run.add_batch(batch)
+    print(f"Replayed crawl {crawl_id} of {crawled_at:%Y-%m-%d %H:%M:%S}: {len(result)} houses -> {output_file}")
+    if failed:
+        print(f"Warning: {len(failed)} archived pages failed to parse:")
+        for unit, error in failed:
+            print(f"  {unit}: {error}")
+    return failed
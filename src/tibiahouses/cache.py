@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+HousesPayload = tuple[str, str, list[tuple[str, str, str, str]]] | tuple[
+    str, str, list[tuple[str, str, str, str]], list[str]
+]
+
+
+def cache_key(form: list[tuple[str, str]]) -> str:
+    """Cache key for a house search form, e.g. ``world=Antica&town=Thais&state=auctioned&type=houses``."""
+    return "&".join(f"{name}={value}" for name, value in form if name != "order")
+
+
+def content_digest(body: str) -> str:
+    """Hash of the house box of a page.
+
+    Everything before ``id="houses"`` (menus, counters, banners) changes
+    between requests without the houses changing, so it is left out.
+    """
+    start = body.find('id="houses"')
+    return hashlib.blake2b(body[max(start, 0):].encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """Persistent cache of parsed house pages keyed by search form.
+
+    Each entry keeps the content digest of the page it was parsed from, so
+    a page whose digest is unchanged is served from the cache without being
+    parsed again. A payload parsed with house ids keeps them, so a crawl
+    fetching detail pages gets them from the cache as well. Entries older than ``ttl`` seconds are ignored and dropped,
+    and the least recently used entries are evicted beyond ``max_entries``.
+    """
+
+    def __init__(self, path: str = "data/cache.sqlite", ttl: float = 24 * 3600, max_entries: int = 10000):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._connection = sqlite3.connect(path)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                used_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS pages_used_at ON pages (used_at)")
+        self.evict()
+
+    def lookup(self, key: str, digest: str, ids: bool = False) -> HousesPayload | None:
+        """Return the cached payload for ``key`` if it was parsed from a page with ``digest``.
+
+        With ``ids``, only an entry stored with house ids is a hit and the
+        payload ends with them; otherwise the ids are left out.
+        """
+        now = time.time()
+        row = self._connection.execute(
+            "SELECT payload FROM pages WHERE key = ? AND digest = ? AND stored_at >= ?",
+            (key, digest, now - self.ttl),
+        ).fetchone()
+        payload = json.loads(row[0]) if row is not None else None
+        if payload is None or (ids and len(payload) < 4):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._connection.execute("UPDATE pages SET used_at = ? WHERE key = ?", (now, key))
+        city, server, rows = payload[:3]
+        rows = [tuple(house) for house in rows]
+        return (city, server, rows, payload[3]) if ids else (city, server, rows)
+
+    def store(self, key: str, digest: str, payload: HousesPayload):
+        now = time.time()
+        self._connection.execute(
+            "INSERT OR REPLACE INTO pages (key, digest, payload, stored_at, used_at) VALUES (?, ?, ?, ?, ?)",
+            (key, digest, json.dumps(payload, separators=(",", ":")), now, now),
+        )
+
+    def evict(self):
+        """Drop expired entries and the least recently used ones beyond ``max_entries``, committing every store."""
+        with self._connection:
+            self._connection.execute("DELETE FROM pages WHERE stored_at < ?", (time.time() - self.ttl,))
+            self._connection.execute(
+                "DELETE FROM pages WHERE key IN (SELECT key FROM pages ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        self.evict()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
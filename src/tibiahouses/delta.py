@@ -0,0 +1,126 @@
+import os
+
+from tibiahouses.rows import HouseBatch
+from tibiahouses.writers import HOUSE_FIELDS, CsvHouseWriter, read_houses_file
+
+DELTA_FIELDS = ["change"] + HOUSE_FIELDS
+
+HouseKey = tuple[str, str, str]
+
+
+def house_key(house: dict) -> HouseKey:
+    return house["server"], house["city"], house["name"]
+
+
+def kept_path(filename: str) -> str:
+    """Rows kept for the next delta of ``filename``, e.g. ``data/houses.kept.csv`` for ``data/houses.csv``."""
+    return f"{os.path.splitext(filename.rstrip('/'))[0]}.kept.csv"
+
+
+def load_snapshot(filename: str) -> dict[HouseKey, dict]:
+    """Index a previously saved houses file by ``(server, city, name)``."""
+    if not os.path.exists(filename):
+        return {}
+    return {house_key(house): house for house in read_houses_file(filename)}
+
+
+class DeltaTracker:
+    """Compare a crawl against the previous snapshot, page by page.
+
+    ``update`` is fed the rows of every crawled page and records inserted and
+    changed houses; ``finish`` adds the houses that disappeared. Houses are
+    only reported as removed for (server, city) pairs crawled in this run and
+    not marked with ``fail``. The previous rows of a failed pair are not in
+    the new output; ``save_kept`` writes them next to it and ``from_file``
+    reads them back, so the next run does not report them as inserted.
+    """
+
+    def __init__(self, previous: dict[HouseKey, dict]):
+        self.previous = previous
+        self.changes: list[dict] = []
+        self._seen: set[HouseKey] = set()
+        self._units: set[tuple[str, str]] = set()
+        self._failed: set[tuple[str, str]] = set()
+
+    @classmethod
+    def from_file(cls, filename: str) -> "DeltaTracker":
+        """Track changes against the output ``filename`` and the rows kept for its failed pages."""
+        previous = load_snapshot(kept_path(filename))
+        previous.update(load_snapshot(filename))
+        return cls(previous)
+
+    def update(self, houses: list[dict], unit: tuple[str, str] | None = None) -> list[dict]:
+        """Record the rows of one page, returning its inserted and changed rows.
+
+        ``unit`` is the (server, city) pair the page was requested for; it marks
+        the pair as crawled even when the page has no houses left.
+        """
+        return self._update((tuple(house.get(field, "") for field in HOUSE_FIELDS) for house in houses), unit)
+
+    def update_batch(self, batch: HouseBatch, unit: tuple[str, str] | None = None) -> list[dict]:
+        """``update`` for the rows of a page kept as a batch; only changes become dicts."""
+        return self._update(batch.records(), unit)
+
+    def _update(self, records, unit: tuple[str, str] | None) -> list[dict]:
+        if unit is not None:
+            self._units.add(unit)
+        changes = []
+        for record in records:
+            name, _, _, _, city, server = record
+            key = server, city, name
+            self._seen.add(key)
+            self._units.add(key[:2])
+            old = self.previous.get(key)
+            if old is None:
+                changes.append({"change": "inserted", **dict(zip(HOUSE_FIELDS, record))})
+            elif any(old.get(field, "") != value for field, value in zip(HOUSE_FIELDS, record)):
+                changes.append({"change": "changed", **dict(zip(HOUSE_FIELDS, record))})
+        self.changes.extend(changes)
+        return changes
+
+    def fail(self, unit: tuple[str, str]):
+        """Mark a (server, city) pair with a failed page; none of its houses are reported as removed."""
+        self._failed.add(unit)
+
+    def finish(self) -> list[dict]:
+        """Record removed houses and return every change of the crawl."""
+        for key, house in self.previous.items():
+            if key[:2] in self._units and key[:2] not in self._failed and key not in self._seen:
+                self.changes.append({"change": "removed", **{field: house.get(field, "") for field in HOUSE_FIELDS}})
+        return self.changes
+
+    def changed_units(self) -> set[tuple[str, str]]:
+        """(server, city) pairs with an inserted, changed or removed house; call after :meth:`finish`."""
+        return {(change["server"], change["city"]) for change in self.changes}
+
+    def kept(self) -> list[HouseBatch]:
+        """Previous rows of the failed pairs that were not found again, one batch per pair."""
+        houses: dict[tuple[str, str], list[dict]] = {}
+        for key, house in self.previous.items():
+            if key[:2] in self._failed and key not in self._seen:
+                houses.setdefault(key[:2], []).append(house)
+        return [HouseBatch.from_dicts(rows) for rows in houses.values()]
+
+    def save_kept(self, filename: str) -> int:
+        """Write :meth:`kept` next to the output ``filename``, or remove the file when nothing failed; returns rows."""
+        path = kept_path(filename)
+        batches = self.kept()
+        if not batches:
+            if os.path.exists(path):
+                os.remove(path)
+            return 0
+        with CsvHouseWriter(path) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+        return writer.rows_written
+
+    def summary(self) -> dict[str, int]:
+        counts = {"inserted": 0, "changed": 0, "removed": 0}
+        for change in self.changes:
+            counts[change["change"]] += 1
+        return counts
+
+
+def save_delta_to_file(changes: list[dict], filename: str):
+    with CsvHouseWriter(filename, fields=DELTA_FIELDS) as writer:
+        writer.write(changes)
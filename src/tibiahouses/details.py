@@ -0,0 +1,213 @@
+import json
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import Executor
+from functools import partial
+from urllib.parse import urlencode
+
+import rnet
+from selectolax.parser import HTMLParser
+
+from tibiahouses.main import NotAvailableElementError, run_parser
+from tibiahouses.metrics import CrawlMetrics
+from tibiahouses.rows import HouseBatch
+from tibiahouses.scheduler import RequestScheduler
+from tibiahouses.writers import CsvHouseWriter
+
+DETAIL_FIELDS = [
+    "server",
+    "city",
+    "house_id",
+    "name",
+    "beds",
+    "owner",
+    "paid_until",
+    "auction_end",
+    "bid",
+    "bidder",
+    "description",
+]
+
+
+DETAIL_BOX_SELECTOR = "#houses > div.Border_2 > div > div.BoxContent"
+DETAIL_PATTERNS = {
+    "beds": r"has (\d+) beds?",
+    "owner": r"rented by (.+?)\. (?:He|She) has paid",
+    "paid_until": r"paid the rent until (.+?)\.(?:\s|$)",
+    "auction_end": r"auction (?:will end|has ended) at (.+?)\.(?:\s|$)",
+    "bid": r"highest bid so far is (\d+) gold",
+    "bidder": r"submitted by (.+?)\.(?:\s|$)",
+}
+
+
+def parse_house_details(response: str) -> dict[str, str]:
+    """Name, beds, owner or auction state and the description of a house detail page."""
+    parser = HTMLParser(response)
+    box = parser.css_first(DETAIL_BOX_SELECTOR)
+    if box is None:
+        raise NotAvailableElementError("No house details found.")
+    name = box.css_first("b")
+    text = " ".join(box.text(separator=" ").replace("\xa0", " ").split())
+    details = {"name": name.text().strip() if name is not None else ""}
+    for field, pattern in DETAIL_PATTERNS.items():
+        match = re.search(pattern, text)
+        details[field] = match.group(1) if match else ""
+    details["description"] = text[len(details["name"]):].strip() if text.startswith(details["name"]) else text
+    return details
+
+
+def detail_url(url: str, world: str, house_id: str) -> str:
+    """Detail page of a house, next to the search page at ``url``."""
+    separator = "&" if "?" in url else "?"
+    return f"{url}{separator}{urlencode({'page': 'view', 'world': world, 'houseid': house_id})}"
+
+
+def house_summary(record: tuple[str, ...]) -> str:
+    """Summary row columns a detail page depends on; the details are reused while it is unchanged."""
+    name, size, rent, status = record[:4]
+    return "\x1f".join((name, size, rent, status))
+
+
+class HouseDetailStore:
+    """SQLite store of parsed house detail pages keyed by world and house id.
+
+    Each entry keeps the summary row it was fetched for, so the detail page
+    is only fetched again once the house's row on the search page changes,
+    e.g. a new bid or a new owner.
+    """
+
+    def __init__(self, path: str = "data/details.sqlite"):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._connection = sqlite3.connect(path)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS details (
+                server TEXT NOT NULL,
+                house_id TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (server, house_id)
+            )
+            """
+        )
+
+    def lookup(self, server: str, house_id: str, summary: str) -> dict[str, str] | None:
+        row = self._connection.execute(
+            "SELECT payload FROM details WHERE server = ? AND house_id = ? AND summary = ?",
+            (server, house_id, summary),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def store(self, server: str, house_id: str, summary: str, details: dict[str, str]):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO details (server, house_id, summary, payload, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            (server, house_id, summary, json.dumps(details, separators=(",", ":")), time.time()),
+        )
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM details").fetchone()[0]
+
+    def close(self):
+        self._connection.commit()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _wanted_houses(batches: list[HouseBatch]) -> dict[tuple[str, str], tuple[str, str]]:
+    """``(city, summary)`` of every listed house by ``(server, house_id)``, in crawl order."""
+    wanted: dict[tuple[str, str], tuple[str, str]] = {}
+    for batch in batches:
+        for house_id, record in zip(batch.ids or (), batch.records()):
+            if house_id:
+                wanted.setdefault((batch.server, house_id), (batch.city, house_summary(record)))
+    return wanted
+
+
+async def fetch_details(
+    client: rnet.Client,
+    url: str,
+    batches: list[HouseBatch],
+    scheduler: RequestScheduler,
+    store: HouseDetailStore | None = None,
+    executor: Executor | None = None,
+    metrics: CrawlMetrics | None = None,
+) -> tuple[list[dict], list[tuple[str, str, str]]]:
+    """Detail rows of the houses in ``batches``, in crawl order, and the ``(server, house_id, error)`` failures.
+
+    A house listed on several pages, e.g. under two states, is fetched once.
+    With a ``store``, houses whose summary row is unchanged since their
+    details were stored are not fetched at all.
+    """
+    wanted = _wanted_houses(batches)
+    found: dict[tuple[str, str], dict[str, str]] = {}
+    missing = []
+    for (server, house_id), (_, summary) in wanted.items():
+        details = store.lookup(server, house_id, summary) if store is not None else None
+        if details is None:
+            missing.append((server, house_id))
+        else:
+            found[server, house_id] = details
+    failed = []
+    sends = [partial(client.get, detail_url(url, server, house_id)) for server, house_id in missing]
+    if metrics is not None:
+        sends = [metrics.timed(send, unit=False) for send in sends]
+    async for index, response in scheduler.as_completed(sends, return_exceptions=True):
+        server, house_id = missing[index]
+        try:
+            if isinstance(response, Exception):
+                raise response
+            if response.status != 200:
+                raise NotAvailableElementError(f"Failed to fetch house details, status code: {response.status}")
+            details = await run_parser(parse_house_details, await response.text(), executor)
+        except Exception as error:
+            failed.append((server, house_id, str(error) or type(error).__name__))
+            continue
+        if store is not None:
+            store.store(server, house_id, wanted[server, house_id][1], details)
+        found[server, house_id] = details
+    rows = [
+        {"server": server, "city": city, "house_id": house_id, **found[server, house_id]}
+        for (server, house_id), (city, _) in wanted.items()
+        if (server, house_id) in found
+    ]
+    return rows, failed
+
+
+async def save_details(
+    client: rnet.Client,
+    url: str,
+    batches: list[HouseBatch],
+    details_file: str,
+    scheduler: RequestScheduler,
+    store: HouseDetailStore | None = None,
+    executor: Executor | None = None,
+    metrics: CrawlMetrics | None = None,
+) -> list[tuple[str, str, str]]:
+    """Fetch the details of the houses in ``batches`` into ``details_file`` and report the failures."""
+    metrics = metrics or CrawlMetrics()
+    with metrics.stage("details"):
+        details, failed = await fetch_details(client, url, batches, scheduler, store, executor, metrics)
+        with CsvHouseWriter(details_file, fields=DETAIL_FIELDS) as writer:
+            writer.write(details)
+    print(f"Details: {len(details)} houses -> {details_file}")
+    if failed:
+        print(f"Warning: {len(failed)} house detail pages failed:")
+        for server, house_id, error in failed:
+            print(f"  {server} / house {house_id}: {error}")
+    return failed
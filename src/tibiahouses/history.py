@@ -0,0 +1,167 @@
+import os
+import sqlite3
+from datetime import datetime
+
+from tibiahouses.rows import HouseBatch
+
+HISTORY_FIELDS = ["crawled_at", "server", "city", "name", "size", "rent", "status"]
+
+
+class HistoryRun:
+    """Rows of one crawl, inserted in a single transaction committed on exit."""
+
+    def __init__(self, connection: sqlite3.Connection, crawled_at: datetime):
+        self._connection = connection
+        self.crawled_at = crawled_at.isoformat()
+        self.rows = 0
+        cursor = connection.execute("INSERT INTO runs (crawled_at) VALUES (?)", (self.crawled_at,))
+        self.run_id = cursor.lastrowid
+
+    def add(self, houses: list[dict]):
+        self._connection.executemany(
+            "INSERT INTO houses (run_id, crawled_at, server, city, name, size, rent, status)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    self.run_id,
+                    self.crawled_at,
+                    house["server"],
+                    house["city"],
+                    house["name"],
+                    house["size"],
+                    house["rent"],
+                    house["status"],
+                )
+                for house in houses
+            ],
+        )
+        self.rows += len(houses)
+
+    def add_batch(self, batch: HouseBatch):
+        """Insert the rows of a page straight from its tuples."""
+        run_id, crawled_at, city, server = self.run_id, self.crawled_at, batch.city, batch.server
+        self._connection.executemany(
+            "INSERT INTO houses (run_id, crawled_at, server, city, name, size, rent, status)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (run_id, crawled_at, server, city, name, size, rent, status)
+                for name, size, rent, status in batch.rows
+            ),
+        )
+        self.rows += len(batch)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._connection.rollback()
+            return
+        self._connection.execute("UPDATE runs SET houses = ? WHERE id = ?", (self.rows, self.run_id))
+        self._connection.commit()
+
+
+class HistoryStore:
+    """Append-only SQLite history of every crawl.
+
+    Each crawl is a run with its own timestamp; its rows are bulk inserted in
+    one transaction. Rows are indexed by (server, city, name, crawl time) and
+    by crawl time, so the history of one house or a whole town is an index
+    range scan.
+    """
+
+    def __init__(self, path: str = "data/history.sqlite"):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path)
+        self._connection.row_factory = sqlite3.Row
+        with self._connection:
+            self._connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY,
+                    crawled_at TEXT NOT NULL,
+                    houses INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS houses (
+                    run_id INTEGER NOT NULL REFERENCES runs (id),
+                    crawled_at TEXT NOT NULL,
+                    server TEXT NOT NULL,
+                    city TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    size TEXT,
+                    rent TEXT,
+                    status TEXT
+                );
+                CREATE INDEX IF NOT EXISTS houses_house ON houses (server, city, name, crawled_at);
+                CREATE INDEX IF NOT EXISTS houses_crawled_at ON houses (crawled_at);
+                """
+            )
+
+    def run(self, crawled_at: datetime) -> HistoryRun:
+        """Start recording a crawl: ``with store.run(now) as run: run.add(houses)``."""
+        return HistoryRun(self._connection, crawled_at)
+
+    def record(self, houses: list[dict], crawled_at: datetime) -> int:
+        """Record a whole crawl at once, returning its run id."""
+        with self.run(crawled_at) as run:
+            run.add(houses)
+        return run.run_id
+
+    def backfill(self, crawled_at: datetime, batches: list[HouseBatch]) -> int:
+        """Record pages of an earlier crawl, e.g. restored on resume, unless that crawl is already recorded.
+
+        A crawl that finished is in the store with all its pages; one that
+        crashed was rolled back and is recorded here under its own time.
+        Returns the number of rows added.
+        """
+        stamp = crawled_at.isoformat()
+        if self._connection.execute("SELECT 1 FROM runs WHERE crawled_at = ?", (stamp,)).fetchone() is not None:
+            return 0
+        with self.run(crawled_at) as run:
+            for batch in batches:
+                run.add_batch(batch)
+        return run.rows
+
+    def history(
+        self,
+        server: str,
+        city: str | None = None,
+        name: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> list[dict]:
+        """Rows recorded for a server, a town or a single house, oldest first."""
+        if name is not None and city is None:
+            raise ValueError("a house name needs its city")
+        clauses = ["server = ?"]
+        params: list = [server]
+        for column, value in (("city", city), ("name", name)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("crawled_at >= ?")
+            params.append(since.isoformat())
+        if until is not None:
+            clauses.append("crawled_at <= ?")
+            params.append(until.isoformat())
+        rows = self._connection.execute(
+            f"SELECT {', '.join(HISTORY_FIELDS)} FROM houses WHERE {' AND '.join(clauses)}"
+            " ORDER BY crawled_at, city, name",
+            params,
+        )
+        return [dict(row) for row in rows]
+
+    def runs(self) -> list[dict]:
+        return [dict(row) for row in self._connection.execute("SELECT * FROM runs ORDER BY crawled_at")]
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
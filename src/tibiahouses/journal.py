@@ -0,0 +1,103 @@
+import json
+import os
+from datetime import datetime
+
+from tibiahouses.cache import cache_key
+from tibiahouses.rows import HouseBatch
+
+
+class CrawlJournal:
+    """Append-only record of the crawl units finished so far.
+
+    A unit is one (world, town, state, type) search. Each finished unit is
+    appended as one JSON line with its city, server, rows and crawl time, or
+    with the error that made it fail, and flushed immediately, so a crashed crawl can
+    be resumed with only the missing and failed units left to fetch. Only the
+    batches loaded on ``resume`` are kept in ``completed``; units recorded
+    during the run are remembered by key, so a long crawl does not keep its
+    rows in memory twice.
+    """
+
+    def __init__(self, path: str = "data/crawl-journal.jsonl", resume: bool = False):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.completed: dict[str, HouseBatch] = {}
+        self.crawled_at: dict[str, str] = {}
+        self.recorded: set[str] = set()
+        self.failed: dict[str, str] = {}
+        if resume:
+            self._load()
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short by a crash
+                if entry["status"] == "done":
+                    self.completed[entry["unit"]] = self._batch(entry)
+                    self.failed.pop(entry["unit"], None)
+                    if "crawled_at" in entry:
+                        self.crawled_at[entry["unit"]] = entry["crawled_at"]
+                else:
+                    self.failed[entry["unit"]] = entry["error"]
+                    self.completed.pop(entry["unit"], None)
+                    self.crawled_at.pop(entry["unit"], None)
+
+    @staticmethod
+    def _batch(entry: dict) -> HouseBatch:
+        if "houses" in entry:  # written before rows were kept as tuples
+            return HouseBatch.from_dicts(entry["houses"])
+        return HouseBatch(entry["city"], entry["server"], [tuple(row) for row in entry["rows"]], entry.get("ids"))
+
+    def _append(self, entry: dict):
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def pending(self, form_data: list[list[tuple[str, str]]]) -> list[list[tuple[str, str]]]:
+        """The forms whose unit has not been completed yet."""
+        return [
+            form for form in form_data if cache_key(form) not in self.completed and cache_key(form) not in self.recorded
+        ]
+
+    def restored_runs(self, form_data: list[list[tuple[str, str]]]) -> dict[datetime, list[HouseBatch]]:
+        """The batches loaded on resume for ``form_data``, by the time of the crawl that fetched them.
+
+        Units journaled before crawl times were recorded are left out.
+        """
+        runs: dict[datetime, list[HouseBatch]] = {}
+        for unit in map(cache_key, form_data):
+            if unit in self.completed and unit in self.crawled_at:
+                runs.setdefault(datetime.fromisoformat(self.crawled_at[unit]), []).append(self.completed[unit])
+        return runs
+
+    def record(self, form: list[tuple[str, str]], batch: HouseBatch, crawled_at: datetime | None = None):
+        unit = cache_key(form)
+        self.recorded.add(unit)
+        self.failed.pop(unit, None)
+        entry = {"unit": unit, "status": "done", "city": batch.city, "server": batch.server, "rows": batch.rows}
+        if crawled_at is not None:
+            entry["crawled_at"] = crawled_at.isoformat()
+        if batch.ids is not None:
+            entry["ids"] = batch.ids
+        self._append(entry)
+
+    def fail(self, form: list[tuple[str, str]], error: str):
+        unit = cache_key(form)
+        self.failed[unit] = error
+        self._append({"unit": unit, "status": "failed", "error": error})
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
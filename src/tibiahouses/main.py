@@ -1,9 +1,35 @@
 import rnet
 import asyncio
 from selectolax.parser import HTMLParser
-import pandas as pd
 import os
+import sys
+import csv
 import argparse
+import time
+from datetime import datetime, timezone
+from concurrent.futures import Executor
+from contextlib import ExitStack
+from functools import partial
+from typing import TYPE_CHECKING, AsyncIterator, Callable
+
+from tibiahouses.cache import HousesPayload, ResponseCache, cache_key, content_digest
+from tibiahouses.delta import DeltaTracker, kept_path, save_delta_to_file
+from tibiahouses.history import HISTORY_FIELDS, HistoryRun, HistoryStore
+from tibiahouses.journal import CrawlJournal
+from tibiahouses.metrics import CrawlMetrics
+from tibiahouses.planner import STATES, TYPES, CrawlPlan
+from tibiahouses.rows import HouseBatch, HouseTable
+from tibiahouses.scheduler import RequestScheduler
+from tibiahouses.writers import HOUSE_FIELDS, CsvHouseWriter, ParquetHouseWriter, open_house_writer, output_format
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from tibiahouses.archive import ArchiveRun, PageArchive
+    from tibiahouses.details import HouseDetailStore
+
+
+HOUSES_URL = "https://www.tibia.com/community/?subtopic=houses"
 
 
 class NotAvailableElementError(Exception):
@@ -20,15 +46,44 @@ def create_client() -> rnet.Client:
 
 
 async def fetch_data(
-    client: rnet.Client, urls: list[str], form_data: list[list[tuple[str, str]]] | None = None
+    client: rnet.Client,
+    urls: list[str],
+    form_data: list[list[tuple[str, str]]] | None = None,
+    scheduler: RequestScheduler | None = None,
+    return_exceptions: bool = False,
+    metrics: CrawlMetrics | None = None,
 ) -> list[rnet.Response]:
+    if scheduler is None:
+        scheduler = RequestScheduler()
     if form_data is None:
-        tasks = [client.get(url) for url in urls]
-        return await asyncio.gather(*tasks, return_exceptions=False)
+        sends = [partial(client.get, url) for url in urls]
+        if metrics is not None:
+            sends = [metrics.timed(send) for send in sends]
+        return await scheduler.gather(sends, return_exceptions)
     else:
         print("Fetching data with form data...")
-        tasks = [client.post(urls[0], form=form) for form in form_data]
-        return await asyncio.gather(*tasks, return_exceptions=False)
+        sends = [partial(client.post, urls[0], form=form) for form in form_data]
+        if metrics is not None:
+            sends = [metrics.timed(send, form) for send, form in zip(sends, form_data)]
+        return await scheduler.gather(sends, return_exceptions)
+
+
+async def fetch_data_as_completed(
+    client: rnet.Client,
+    url: str,
+    form_data: list[list[tuple[str, str]]],
+    scheduler: RequestScheduler | None = None,
+    return_exceptions: bool = False,
+    metrics: CrawlMetrics | None = None,
+) -> AsyncIterator[tuple[list[tuple[str, str]], rnet.Response]]:
+    """Post every form to ``url`` and yield ``(form, response)`` as each request finishes."""
+    if scheduler is None:
+        scheduler = RequestScheduler()
+    sends = (partial(client.post, url, form=form) for form in form_data)
+    if metrics is not None:
+        sends = (metrics.timed(send, form) for send, form in zip(sends, form_data))
+    async for index, response in scheduler.as_completed(sends, return_exceptions):
+        yield form_data[index], response
 
 
 def parse_cities(response: str) -> list[str]:
@@ -51,93 +106,967 @@ def parse_servers(response: str) -> list[str]:
     return [server.text() for server in servers][1:]
 
 
-def parse_houses(response: str) -> list[dict]:
+HOUSES_CAPTION_SELECTOR = "#houses > div.Border_2 > div > div > div > div > div > div"
+HOUSES_TABLE_SELECTOR = (
+    "#houses > div.Border_2 > div > div > div > table > tbody > tr > td > div.InnerTableContainer"
+    " > table > tbody > tr > td > div > table"
+)
+
+
+def caption_location(caption: str) -> tuple[str, str]:
+    """``(city, server)`` from a caption like ``Houses and Guildhalls in Liberty Bay on Antica``."""
+    caption = caption.replace("\xa0", " ").strip()
+    if " in " in caption and " on " in caption:
+        city, server = caption.split(" in ", 1)[1].rsplit(" on ", 1)
+        return city.strip(), server.strip()
+    words = caption.split(" ")
+    return words[-3], words[-1]
+
+
+def parse_houses_compact(response: str, ids: bool = False) -> HousesPayload:
+    """Parse a house page into ``(city, server, rows)`` with one tuple per house.
+
+    The house table is located once and every row's cells are walked a
+    single time. This is also the payload returned by parser worker
+    processes: it pickles far smaller than a list of dicts repeating the
+    same keys, city and server. With ``ids``, the house id from each row's
+    "View" button is collected in the same walk and appended to the payload.
+    """
     parser = HTMLParser(response)
-    where = parser.css_first("#houses > div.Border_2 > div > div > div > div > div > div")
+    where = parser.css_first(HOUSES_CAPTION_SELECTOR)
     if where is None:
         raise NotAvailableElementError("No house data found.")
-    where = where.text()
-    server = where.split(" ")[-1]
-    city = where.split(" ")[-3]
-    houses = parser.css(
-        "#houses > div.Border_2 > div > div > div > table > tbody > tr > td > div.InnerTableContainer > table > tbody > tr > td > div > table tbody > tr"
-    )[1:]
-    if not houses:
+    city, server = caption_location(where.text())
+    rows = []
+    house_ids = []
+    seen = 0
+    for table in parser.css(HOUSES_TABLE_SELECTOR):
+        for house in table.css("tbody > tr"):
+            seen += 1
+            if seen == 1:
+                continue  # header row
+            cells = [cell.text() for cell in house.iter() if cell.tag == "td"]
+            if len(cells) < 2:
+                continue
+            rows.append(
+                (
+                    cells[0].replace("\xa0", " "),
+                    cells[1].replace("\xa0", " "),
+                    cells[2].replace("\xa0", " "),
+                    cells[3].replace("\xa0", " "),
+                )
+            )
+            if ids:
+                field = house.css_first('input[name="houseid"]')
+                house_ids.append((field.attributes.get("value") or "") if field is not None else "")
+    if seen < 2:
         raise NotAvailableElementError
-    house_data = []
-    for house in houses:
-        if not house.css_first("td:nth-child(2)"):
-            continue
-        details = {
-            "name": house.css_first("td:nth-child(1)").text().replace("\xa0", " "),
-            "size": house.css_first("td:nth-child(2)").text().replace("\xa0", " "),
-            "rent": house.css_first("td:nth-child(3)").text().replace("\xa0", " "),
-            "status": house.css_first("td:nth-child(4)").text().replace("\xa0", " "),
-            "city": city,
-            "server": server,
-        }
-        house_data.append(details)
-    return house_data
-
-
-def save_houses_to_file(houses: list[dict], filename: str = "data/houses.csv"):
+    return (city, server, rows, house_ids) if ids else (city, server, rows)
+
+
+def expand_houses(payload: HousesPayload) -> list[dict]:
+    city, server, rows = payload[:3]
+    return [
+        {"name": name, "size": size, "rent": rent, "status": status, "city": city, "server": server}
+        for name, size, rent, status in rows
+    ]
+
+
+def parse_houses(response: str) -> list[dict]:
+    return expand_houses(parse_houses_compact(response))
+
+
+def save_houses_to_file(houses: "list[dict] | HouseTable | pd.DataFrame", filename: str = "data/houses.csv"):
+    """Write a crawl to CSV or Parquet, replacing ``filename`` at once; a ``HouseTable`` skips pandas."""
+    if isinstance(houses, HouseTable):
+        with open_house_writer(filename) as writer:
+            for batch in houses.batches:
+                writer.write_batch(batch)
+        return
+    import pandas as pd
+
+    if output_format(filename) == "parquet":
+        with open_house_writer(filename) as writer:
+            if isinstance(houses, pd.DataFrame):
+                writer.write_frame(houses)
+            else:
+                writer.write(houses)
+        return
     os.makedirs(os.path.dirname(filename), exist_ok=True)
-    pd.DataFrame(houses).to_csv(filename, index=False)
+    frame = houses if isinstance(houses, pd.DataFrame) else pd.DataFrame(houses)
+    # Replaced in one step, so a reader never loads a half-written snapshot.
+    frame.to_csv(f"{filename}.tmp", index=False)
+    os.replace(f"{filename}.tmp", filename)
 
 
-def cli():
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Scrape Tibia houses and save to CSV.")
     parser.add_argument(
         "-o",
         "--output",
         default="data/houses.csv",
-        help="Output CSV file path (default: data/houses.csv)",
+        help="Output file path; a .parquet path writes a Parquet dataset (default: data/houses.csv)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["csv", "parquet"],
+        help="Output format (default: picked from the output file extension)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Parse pages as they arrive and write rows incrementally",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        nargs="?",
+        const=os.cpu_count(),
+        default=0,
+        help="Parse pages in a pool of N processes (default: parse on the event loop; "
+        "without N, one per CPU)",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=8,
+        help="Maximum number of concurrent requests (default: 8)",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=4.0,
+        help="Maximum requests per second sent to tibia.com (default: 4.0)",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=5,
+        help="Retries for a page answered with 403/429 (default: 5)",
+    )
+    parser.add_argument(
+        "--cache",
+        default="data/cache.sqlite",
+        help="Parsed page cache location (default: data/cache.sqlite)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Parse every page even if it is unchanged since the last crawl, and refetch every house detail page",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=24.0,
+        help="Hours a cached page stays valid (default: 24)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=10000,
+        help="Maximum number of cached pages (default: 10000)",
+    )
+    parser.add_argument(
+        "--delta",
+        metavar="PATH",
+        help="Also write the houses inserted, changed or removed since the previous output to PATH",
+    )
+    parser.add_argument(
+        "--normalize",
+        action="store_true",
+        help="Add typed size_sqm, rent_gold, state, bid_gold, time_left and auction_end columns",
+    )
+    parser.add_argument(
+        "--aggregates",
+        action="store_true",
+        help="Also write per-world and per-town market summaries and the cheapest auctions next to the output",
+    )
+    parser.add_argument(
+        "--cheapest",
+        type=int,
+        default=5,
+        help="Cheapest auctioned houses listed per town with --aggregates (default: 5)",
+    )
+    parser.add_argument(
+        "--history",
+        metavar="PATH",
+        help="Append this crawl to the SQLite history store at PATH",
+    )
+    parser.add_argument(
+        "--journal",
+        default="data/crawl-journal.jsonl",
+        help="File recording every finished page of the crawl (default: data/crawl-journal.jsonl)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse the pages recorded in the journal and fetch only the failed and missing ones",
+    )
+    parser.add_argument(
+        "--world",
+        action="append",
+        help="Only crawl this world; repeat for several (default: every world)",
+    )
+    parser.add_argument(
+        "--town",
+        action="append",
+        help="Only crawl this town; repeat for several (default: every town)",
+    )
+    parser.add_argument(
+        "--state",
+        action="append",
+        choices=list(STATES),
+        help="House state to crawl; repeat for several (default: auctioned)",
+    )
+    parser.add_argument(
+        "--type",
+        action="append",
+        choices=list(TYPES),
+        help="Houses or guildhalls; repeat for both (default: houses)",
+    )
+    parser.add_argument(
+        "--url",
+        default=HOUSES_URL,
+        help="House search page to crawl, e.g. a local mock server (default: tibia.com)",
+    )
+    parser.add_argument(
+        "--details",
+        metavar="PATH",
+        help="Also fetch the detail page of every crawled house and write beds, owner, bids and description to PATH",
+    )
+    parser.add_argument(
+        "--details-cache",
+        default="data/details.sqlite",
+        help="Stored house details, refetched only when a house's row changes (default: data/details.sqlite)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Split the crawl by world into shards crawled by N worker processes, each with its own client "
+        "and rate limit, and merge their results; 0 waits for workers started with the worker command",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        help="Number of shards for --workers (default: 4 per worker)",
+    )
+    parser.add_argument(
+        "--queue",
+        default="data/shards",
+        help="Shared directory of the shard queue and partial results (default: data/shards)",
+    )
+    parser.add_argument(
+        "--archive",
+        metavar="PATH",
+        help="Also keep every raw page, compressed, in the archive at PATH for an offline replay",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and re-crawl each town when it is due instead of crawling everything once",
+    )
+    parser.add_argument(
+        "--min-interval",
+        type=float,
+        default=5.0,
+        help="Minutes before a changed town or one with an auction ending soon is re-crawled (default: 5)",
+    )
+    parser.add_argument(
+        "--max-interval",
+        type=float,
+        default=360.0,
+        help="Longest wait in minutes before a quiet town is re-crawled (default: 360)",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        help="Write request, page and stage timings to PATH: Prometheus text for *.prom, JSON otherwise",
+    )
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="Show a live progress line on stderr",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    history_parser = subparsers.add_parser("history", help="Show the recorded history of a house or town")
+    history_parser.add_argument(
+        "--db",
+        default="data/history.sqlite",
+        help="History store to query (default: data/history.sqlite)",
     )
+    history_parser.add_argument("--server", required=True, help="World name")
+    history_parser.add_argument("--city", help="Town name")
+    history_parser.add_argument("--name", help="House name (needs --city)")
+    history_parser.add_argument("--since", type=parse_timestamp, help="Only crawls at or after this ISO time")
+    history_parser.add_argument("--until", type=parse_timestamp, help="Only crawls at or before this ISO time")
+    worker_parser = subparsers.add_parser("worker", help="Crawl shards from the queue of a --workers crawl")
+    worker_parser.add_argument(
+        "--queue",
+        dest="worker_queue",
+        default="data/shards",
+        help="Shard queue directory shared with the coordinator (default: data/shards)",
+    )
+    replay_parser = subparsers.add_parser("replay", help="Parse an archived crawl again without fetching anything")
+    replay_parser.add_argument(
+        "--archive",
+        dest="replay_archive",
+        default="data/archive.sqlite",
+        help="Page archive to replay (default: data/archive.sqlite)",
+    )
+    replay_parser.add_argument("--crawl", type=int, help="Archived crawl id (default: the latest)")
+    replay_parser.add_argument("--list", action="store_true", help="List the archived crawls and exit")
+    replay_parser.add_argument(
+        "-o",
+        "--output",
+        dest="replay_output",
+        default="data/replayed.csv",
+        help="Output file path (default: data/replayed.csv)",
+    )
+    replay_parser.add_argument(
+        "--processes",
+        type=int,
+        help="Parser processes (default: one per CPU; 0 parses in this process)",
+    )
+    serve_parser = subparsers.add_parser("serve", help="Answer house queries over HTTP from the latest output")
+    serve_parser.add_argument(
+        "--snapshot",
+        default="data/houses.csv",
+        help="Crawl output to serve; reloaded when a new crawl replaces it (default: data/houses.csv)",
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080)")
+    serve_parser.add_argument(
+        "--reload-interval",
+        type=float,
+        default=5.0,
+        help="Seconds between checks of the snapshot file for a new crawl; 0 disables (default: 5)",
+    )
+    return parser
+
+
+def cli():
+    parser = build_parser()
     args = parser.parse_args()
-    import asyncio
+    if args.command == "history":
+        if args.name and not args.city:
+            parser.error("--name needs --city")
+        history_command(args)
+        return
+    if args.command == "serve":
+        from tibiahouses.server import serve
 
-    asyncio.run(main_cli(args.output))
+        serve(args.snapshot, args.host, args.port, args.reload_interval)
+        return
+    if args.command == "replay":
+        replay_command(args)
+        return
+    if args.command == "worker":
+        worker_command(args)
+        return
+    check_crawl_args(parser, args)
+    if crawl_command(args):
+        sys.exit(1)
 
 
-async def main_cli(output_file):
-    client = create_client()
-    url_cities = ["https://www.tibia.com/community/?subtopic=houses"]
-    fetched_data = await fetch_data(client, url_cities)
-    cities, servers = None, None
-    for response in fetched_data:
-        if response.status == 200:
-            data = await response.text()
-            cities = parse_cities(data)
-            servers = parse_servers(data)
-        else:
-            raise NotAvailableElementError(f"Failed to fetch data, status code: {response.status}")
-    if not cities or not servers:
-        raise NotAvailableElementError("No cities or servers found.")
-    form_data: list[list[tuple[str, str]]] = []
-    for server in servers:
-        for city in cities:
-            form_data.append(
-                [
-                    ("world", server.strip()),
-                    ("town", city.strip()),
-                    ("state", "auctioned"),
-                    ("type", "houses"),
-                    ("order", ""),
-                ]
+def _check_exclusive(parser: argparse.ArgumentParser, args, mode: str, flags: tuple[str, ...]):
+    for flag in flags:
+        if getattr(args, flag.lstrip("-").replace("-", "_")):
+            parser.error(f"{flag} cannot be combined with {mode}")
+
+
+def _check_shard_args(parser: argparse.ArgumentParser, args):
+    _check_exclusive(
+        parser, args, "--workers", ("--watch", "--stream", "--delta", "--resume", "--details", "--archive")
+    )
+    if args.workers is None or args.workers < 0:
+        parser.error("--shards needs --workers")
+    if args.shards is None:
+        if not args.workers:
+            parser.error("--workers 0 needs --shards")
+        args.shards = 4 * args.workers
+    if args.shards < 1:
+        parser.error("--shards must be at least 1")
+
+
+def check_crawl_args(parser: argparse.ArgumentParser, args):
+    """Reject option combinations a crawl cannot honour and fill in the derived defaults."""
+    if args.workers is not None or args.shards is not None:
+        _check_shard_args(parser, args)
+    if args.normalize and args.stream:
+        parser.error("--normalize runs once over the whole crawl and cannot be combined with --stream")
+    if args.aggregates and args.stream:
+        parser.error("--aggregates runs once over the whole crawl and cannot be combined with --stream")
+    if args.watch:
+        _check_exclusive(parser, args, "--watch", ("--stream", "--delta", "--resume", "--details", "--archive"))
+        if not 0 < args.min_interval <= args.max_interval:
+            parser.error("--min-interval must be positive and at most --max-interval")
+    if args.format and output_format(args.output) != args.format:
+        args.output = f"{os.path.splitext(args.output.rstrip('/'))[0]}.{args.format}"
+
+
+class _CrawlStores:
+    """The caches, history, journal and archive a crawl opens from its arguments; closed with a summary."""
+
+    def __init__(self, args, sharded: bool):
+        self.cache = None
+        if not args.no_cache and not sharded:
+            self.cache = ResponseCache(args.cache, ttl=args.cache_ttl * 3600, max_entries=args.cache_size)
+        self.history = HistoryStore(args.history) if args.history else None
+        self.detail_store = None
+        if args.details and not args.no_cache:
+            from tibiahouses.details import HouseDetailStore
+
+            self.detail_store = HouseDetailStore(args.details_cache)
+        self.archive = None
+        if args.archive:
+            from tibiahouses.archive import PageArchive
+
+            self.archive = PageArchive(args.archive)
+        self.journal = None if args.watch or sharded else CrawlJournal(args.journal, resume=args.resume)
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+        if self.cache is not None:
+            print(f"Cache: {self.cache.hits} unchanged pages reused, {self.cache.misses} parsed")
+            self.cache.close()
+        if self.detail_store is not None:
+            store = self.detail_store
+            print(f"Details cache: {store.hits} unchanged houses reused, {store.misses} fetched")
+            store.close()
+        if self.archive is not None:
+            stats = self.archive.stats()
+            print(
+                f"Archive: {stats['pages']} pages, {stats['blobs']} distinct, "
+                f"{stats['raw_bytes'] // 1024} KiB compressed to {stats['stored_bytes'] // 1024} KiB"
             )
-    collected_data = await fetch_data(client, url_cities, form_data)
-    result = []
-    for response in collected_data:
-        if response.status == 200:
-            data = await response.text()
-            result.extend(parse_houses(data))
-        elif response.status == 403:
-            continue
-        else:
-            raise NotAvailableElementError(
-                f"Failed to fetch houses data, status code: {response.status}"
+            self.archive.close()
+        if self.history is not None:
+            self.history.close()
+
+
+def crawl_command(args) -> list:
+    """Run the crawl ``args`` ask for; returns the pages or shards that failed."""
+    sharded = args.workers is not None
+    plan = CrawlPlan(worlds=args.world, towns=args.town, states=args.state, types=args.type)
+    scheduler_options = {"max_in_flight": args.max_in_flight, "rate": args.rate, "max_retries": args.max_retries}
+    stores = _CrawlStores(args, sharded)
+    metrics = CrawlMetrics(progress=sys.stderr if args.progress else None)
+    try:
+        if args.watch:
+            from tibiahouses.watch import watch_cli
+
+            asyncio.run(
+                watch_cli(
+                    args.output,
+                    scheduler=RequestScheduler(**scheduler_options),
+                    plan=plan,
+                    url=args.url,
+                    min_interval=args.min_interval * 60,
+                    max_interval=args.max_interval * 60,
+                    cache=stores.cache,
+                    normalize=args.normalize,
+                    aggregates=args.aggregates,
+                    cheapest=args.cheapest,
+                    history=stores.history,
+                    metrics_file=args.metrics,
+                    progress=metrics.progress,
+                )
+            )
+            return []
+        if sharded:
+            from tibiahouses.shards import ShardQueue, shard_cli
+
+            with ShardQueue(args.queue) as queue:
+                return asyncio.run(
+                    shard_cli(
+                        args.output,
+                        queue,
+                        args.workers,
+                        args.shards,
+                        scheduler_options=scheduler_options,
+                        plan=plan,
+                        url=args.url,
+                        parse_workers=args.parse_workers,
+                        normalize=args.normalize,
+                        aggregates=args.aggregates,
+                        cheapest=args.cheapest,
+                        history=stores.history,
+                        metrics=metrics,
+                    )
+                )
+        return asyncio.run(
+            main_cli(
+                args.output,
+                scheduler=RequestScheduler(**scheduler_options),
+                stream=args.stream,
+                parse_workers=args.parse_workers,
+                cache=stores.cache,
+                delta_file=args.delta,
+                normalize=args.normalize,
+                aggregates=args.aggregates,
+                cheapest=args.cheapest,
+                history=stores.history,
+                journal=stores.journal,
+                plan=plan,
+                url=args.url,
+                metrics=metrics,
+                details_file=args.details,
+                detail_store=stores.detail_store,
+                archive=stores.archive,
             )
-    save_houses_to_file(result, output_file)
+        )
+    finally:
+        if args.metrics and not args.watch:
+            metrics.save(args.metrics)
+        stores.close()
+
+
+def worker_command(args):
+    from tibiahouses.shards import ShardQueue, worker_cli
+
+    with ShardQueue(args.worker_queue) as queue:
+        finished = asyncio.run(worker_cli(queue, parse_workers=args.parse_workers))
+    print(f"Worker finished {finished} shards")
+
+
+def parse_timestamp(value: str) -> datetime:
+    """ISO date or time; naive values are taken as UTC like the recorded crawl times."""
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+
+def replay_command(args):
+    from tibiahouses.archive import PageArchive, replay_cli
+
+    with PageArchive(args.replay_archive) as archive:
+        if args.list:
+            for crawl in archive.crawls():
+                print(f"{crawl['id']}\t{crawl['crawled_at']}\t{crawl['pages']} pages")
+            return
+        history = HistoryStore(args.history) if args.history else None
+        try:
+            replay_cli(archive, args.replay_output, args.crawl, args.processes, args.normalize, history)
+        finally:
+            if history is not None:
+                history.close()
+
+
+def history_command(args):
+    with HistoryStore(args.db) as store:
+        rows = store.history(args.server, args.city, args.name, since=args.since, until=args.until)
+    writer = csv.DictWriter(sys.stdout, fieldnames=HISTORY_FIELDS, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+async def run_parser(parser, response: str, executor: Executor | None = None):
+    """Run ``parser`` on the event loop, or in ``executor`` when one is given."""
+    if executor is None:
+        return parser(response)
+    return await asyncio.get_running_loop().run_in_executor(executor, parser, response)
+
+
+async def read_batch(
+    response: rnet.Response,
+    retry_statuses: tuple[int, ...],
+    executor: Executor | None = None,
+    cache: ResponseCache | None = None,
+    form: list[tuple[str, str]] | None = None,
+    metrics: CrawlMetrics | None = None,
+    ids: bool = False,
+    archive: "ArchiveRun | None" = None,
+) -> HouseBatch | None:
+    """Parse a house page response, returning ``None`` when it stayed throttled.
+
+    With a ``cache``, a page identical to the one cached for ``form`` is not
+    parsed again. With ``metrics``, the time spent reading and parsing the
+    page is recorded; in a process pool that includes waiting for a worker.
+    With ``ids``, the batch also gets the house id of every row, read in the
+    same parse and cached with the rows. With an ``archive``, the raw page is
+    stored before it is parsed.
+    """
+    if response.status == 200:
+        started = time.perf_counter()
+        data = await response.text()
+        if archive is not None:
+            archive.add(form, data)
+        if metrics is not None:
+            metrics.read(form, len(data.encode("utf-8")), time.perf_counter() - started)
+            started = time.perf_counter()
+        parser = partial(parse_houses_compact, ids=True) if ids else parse_houses_compact
+        cached = False
+        if cache is not None and form is not None:
+            key, digest = cache_key(form), content_digest(data)
+            payload = cache.lookup(key, digest, ids)
+            cached = payload is not None
+            if payload is None:
+                payload = await run_parser(parser, data, executor)
+                cache.store(key, digest, payload)
+        else:
+            payload = await run_parser(parser, data, executor)
+        batch = HouseBatch(*payload)
+        if metrics is not None:
+            metrics.parsed(form, len(batch), time.perf_counter() - started, cached)
+        return batch
+    if response.status in retry_statuses:
+        return None
+    raise NotAvailableElementError(f"Failed to fetch houses data, status code: {response.status}")
+
+
+async def read_houses(
+    response: rnet.Response,
+    retry_statuses: tuple[int, ...],
+    executor: Executor | None = None,
+    cache: ResponseCache | None = None,
+    form: list[tuple[str, str]] | None = None,
+    metrics: CrawlMetrics | None = None,
+) -> list[dict] | None:
+    """:func:`read_batch` with the rows as dicts."""
+    batch = await read_batch(response, retry_statuses, executor, cache, form, metrics)
+    return None if batch is None else batch.dicts()
+
+
+def normalized_frame(houses: HouseTable, crawled_at: datetime) -> "pd.DataFrame":
+    """Raw and typed columns of ``houses``; pandas is only imported when this is asked for."""
+    import pandas as pd
+
+    from tibiahouses.normalize import normalize_houses
+
+    frame = pd.DataFrame(houses.columns(), columns=HOUSE_FIELDS)
+    return normalize_houses(frame, pd.Timestamp(crawled_at), keep_raw=True)
+
+
+async def plan_forms(
+    client: rnet.Client,
+    url: str,
+    plan: CrawlPlan,
+    scheduler: RequestScheduler,
+    executor: Executor | None,
+    metrics: CrawlMetrics,
+    archive: "ArchiveRun | None" = None,
+) -> list[list[tuple[str, str]]]:
+    """The search forms of ``plan``, fetching the bootstrap page for the world and town lists if needed."""
+    cities, servers = None, None
+    if plan.needs_bootstrap:
+        with metrics.stage("bootstrap"):
+            fetched_data = await fetch_data(client, [url], scheduler=scheduler, metrics=metrics)
+            for response in fetched_data:
+                if response.status == 200:
+                    data = await response.text()
+                    if archive is not None:
+                        archive.add(None, data)
+                    cities = await run_parser(parse_cities, data, executor)
+                    servers = await run_parser(parse_servers, data, executor)
+                else:
+                    raise NotAvailableElementError(f"Failed to fetch data, status code: {response.status}")
+        if not cities or not servers:
+            raise NotAvailableElementError("No cities or servers found.")
+    return plan.forms(servers, cities)
+
+
+async def main_cli(
+    output_file,
+    scheduler: RequestScheduler | None = None,
+    stream: bool = False,
+    parse_workers: int = 0,
+    cache: ResponseCache | None = None,
+    delta_file: str | None = None,
+    normalize: bool = False,
+    history: HistoryStore | None = None,
+    journal: CrawlJournal | None = None,
+    plan: CrawlPlan | None = None,
+    url: str = HOUSES_URL,
+    metrics: CrawlMetrics | None = None,
+    details_file: str | None = None,
+    detail_store: "HouseDetailStore | None" = None,
+    archive: "PageArchive | None" = None,
+    aggregates: bool = False,
+    cheapest: int = 5,
+) -> list[tuple[list[tuple[str, str]], str]]:
+    """Crawl ``plan`` into ``output_file``; returns the ``(form, error)`` of every page that failed."""
+    executor = None
+    if parse_workers:
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(max_workers=parse_workers)
+    try:
+        # Pages keep downloading while up to ``parse_window`` of them are being parsed.
+        parse_window = 2 * parse_workers if executor is not None else 1
+        return await _crawl(
+            output_file,
+            scheduler=scheduler or RequestScheduler(),
+            stream=stream,
+            executor=executor,
+            parse_window=parse_window,
+            cache=cache,
+            delta_file=delta_file,
+            normalize=normalize,
+            history=history,
+            journal=journal,
+            plan=plan or CrawlPlan(),
+            url=url,
+            metrics=metrics or CrawlMetrics(),
+            details_file=details_file,
+            detail_store=detail_store,
+            archive=archive,
+            aggregates=aggregates,
+            cheapest=cheapest,
+        )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+class _Collector:
+    """Hands every page of a crawl to the output, the delta, the history run, the journal and the details stage.
+
+    Without a ``writer`` the batches are kept by unit and put back in plan
+    order by :meth:`table`, since pages finish in any order.
+    """
+
+    def __init__(
+        self,
+        metrics: CrawlMetrics,
+        max_retries: int,
+        writer: CsvHouseWriter | ParquetHouseWriter | None = None,
+        delta: DeltaTracker | None = None,
+        run: HistoryRun | None = None,
+        journal: CrawlJournal | None = None,
+        crawled_at: datetime | None = None,
+        details: bool = False,
+    ):
+        self.metrics = metrics
+        self.max_retries = max_retries
+        self.writer = writer
+        self.delta = delta
+        self.run = run
+        self.journal = journal
+        self.crawled_at = crawled_at
+        self.details = details
+        self.batches: dict[str, HouseBatch] = {}
+        self.detail_batches: list[HouseBatch] = []
+        self.failed: list[tuple[list[tuple[str, str]], str]] = []
+
+    def restore(self, form_data: list[list[tuple[str, str]]]) -> list[list[tuple[str, str]]]:
+        """Collect the pages the journal restored and return the forms still to fetch."""
+        if self.journal is None:
+            return form_data
+        for form in form_data:
+            batch = self.journal.completed.get(cache_key(form))
+            if batch is not None:
+                self.metrics.parsed(form, len(batch), 0.0, cached=True)
+                self.collect(form, batch, restored=True)
+        return self.journal.pending(form_data)
+
+    def collect(self, form: list[tuple[str, str]], batch: HouseBatch | None, restored: bool = False):
+        if batch is None:
+            self.fail(form, f"still throttled after {self.max_retries} retries")
+            return
+        with self.metrics.stage("store"):
+            if self.writer is not None:
+                self.writer.write_batch(batch)
+            else:
+                self.batches[cache_key(form)] = batch
+            if self.delta is not None:
+                self.delta.update_batch(batch, (form[0][1], form[1][1]))
+            # Restored pages are already in the journal, and in the history of the crawl that fetched them.
+            if self.run is not None and not restored:
+                self.run.add_batch(batch)
+            if self.journal is not None and not restored:
+                self.journal.record(form, batch, self.crawled_at)
+            if self.details:
+                self.detail_batches.append(batch)
+        self.metrics.done(form)
+
+    def fail(self, form: list[tuple[str, str]], error: str):
+        self.failed.append((form, error))
+        if self.journal is not None:
+            self.journal.fail(form, error)
+        self.metrics.done(form, error)
+
+    def table(self, form_data: list[list[tuple[str, str]]]) -> HouseTable:
+        return HouseTable(self.batches[key] for key in map(cache_key, form_data) if key in self.batches)
+
+
+async def _read_unit(
+    form: list[tuple[str, str]], response: rnet.Response | Exception, **options
+) -> HouseBatch | None:
+    if isinstance(response, Exception):
+        raise response
+    return await read_batch(response, form=form, **options)
+
+
+async def _fetch_pages(
+    client: rnet.Client,
+    url: str,
+    forms: list[list[tuple[str, str]]],
+    scheduler: RequestScheduler,
+    parse_window: int,
+    read: Callable,
+    collector: _Collector,
+):
+    """Fetch ``forms`` and hand each page to ``collector`` once ``read`` has parsed it.
+
+    Pages keep downloading while up to ``parse_window`` of them are being parsed.
+    """
+    parsing: dict[asyncio.Future, list[tuple[str, str]]] = {}
+
+    async def drain(return_when):
+        done, _ = await asyncio.wait(parsing, return_when=return_when)
+        for task in done:
+            form = parsing.pop(task)
+            try:
+                batch = task.result()
+            except Exception as error:
+                collector.fail(form, str(error) or type(error).__name__)
+            else:
+                collector.collect(form, batch)
+
+    async for form, response in fetch_data_as_completed(
+        client, url, forms, scheduler=scheduler, return_exceptions=True, metrics=collector.metrics
+    ):
+        parsing[asyncio.ensure_future(read(form, response))] = form
+        if len(parsing) >= parse_window:
+            await drain(asyncio.FIRST_COMPLETED)
+    if parsing:
+        await drain(asyncio.ALL_COMPLETED)
+
+
+def _report_failures(failed: list[tuple[list[tuple[str, str]], str]], total: int, journal: CrawlJournal | None):
+    if not failed:
+        return
+    print(f"Warning: {len(failed)} of {total} pages failed:")
+    for form, error in failed:
+        print(f"  {form[0][1]} / {form[1][1]}: {error}")
+    if journal is not None:
+        print("Run again with --resume to fetch only the failed and missing pages.")
+
+
+def _save_delta(
+    delta: DeltaTracker,
+    failed: list[tuple[list[tuple[str, str]], str]],
+    delta_file: str,
+    output_file: str,
+):
+    for form, _ in failed:
+        delta.fail((form[0][1], form[1][1]))
+    save_delta_to_file(delta.finish(), delta_file)
+    # The output lacks the failed towns; their previous rows are kept for the next delta.
+    kept = delta.save_kept(output_file)
+    counts = delta.summary()
+    print(
+        f"Delta: {counts['inserted']} inserted, {counts['changed']} changed, "
+        f"{counts['removed']} removed -> {delta_file}"
+    )
+    if kept:
+        print(f"Kept the previous {kept} houses of the failed towns for the next delta -> {kept_path(output_file)}")
+
+
+def _save_result(
+    result: HouseTable,
+    output_file: str,
+    crawled_at: datetime,
+    metrics: CrawlMetrics,
+    normalize: bool,
+    aggregates: bool,
+    cheapest: int,
+    changed: set[tuple[str, str]] | None = None,
+):
+    """Save a crawl collected in memory, with its aggregates updated for the ``changed`` towns."""
+    with metrics.stage("save"):
+        frame = normalized_frame(result, crawled_at) if normalize else None
+        save_houses_to_file(frame if normalize else result, output_file)
+    if aggregates:
+        from tibiahouses.aggregates import write_aggregates
+
+        with metrics.stage("aggregate"):
+            recomputed = write_aggregates(result, crawled_at, output_file, cheapest, frame, changed)
+        print(f"Aggregates: {recomputed} towns recomputed -> {os.path.splitext(output_file.rstrip('/'))[0]}.*.csv")
+
+
+async def _crawl(
+    output_file,
+    *,
+    scheduler: RequestScheduler,
+    stream: bool,
+    executor: Executor | None,
+    parse_window: int,
+    cache: ResponseCache | None,
+    delta_file: str | None,
+    normalize: bool,
+    history: HistoryStore | None,
+    journal: CrawlJournal | None,
+    plan: CrawlPlan,
+    url: str,
+    metrics: CrawlMetrics,
+    details_file: str | None,
+    detail_store: "HouseDetailStore | None",
+    archive: "PageArchive | None",
+    aggregates: bool,
+    cheapest: int,
+) -> list[tuple[list[tuple[str, str]], str]]:
+    crawled_at = datetime.now(timezone.utc)
+    client = create_client()
+    # The previous output is the snapshot, so load it before it gets overwritten.
+    delta = DeltaTracker.from_file(output_file) if delta_file else None
+    tracked = False
+    if delta is not None and aggregates:
+        from tibiahouses.aggregates import aggregates_follow
+
+        # The delta's changes only apply to aggregates of the snapshot it compares against.
+        tracked = aggregates_follow(output_file)
+    archive_run = archive.run(crawled_at) if archive is not None else None
+    form_data = await plan_forms(client, url, plan, scheduler, executor, metrics, archive_run)
+    if archive_run is not None:
+        archive_run.plan(form_data)
+    metrics.start(len(form_data))
+    read = partial(
+        _read_unit,
+        retry_statuses=scheduler.retry_statuses,
+        executor=executor,
+        cache=cache,
+        metrics=metrics,
+        ids=bool(details_file),
+        archive=archive_run,
+    )
+    with ExitStack() as stack:
+        collector = _Collector(
+            metrics,
+            scheduler.max_retries,
+            writer=stack.enter_context(open_house_writer(output_file, atomic=False)) if stream else None,
+            delta=delta,
+            run=stack.enter_context(history.run(crawled_at)) if history is not None else None,
+            journal=journal,
+            crawled_at=crawled_at,
+            details=bool(details_file),
+        )
+        pending_forms = collector.restore(form_data)
+        await _fetch_pages(client, url, pending_forms, scheduler, parse_window, read, collector)
+    if history is not None and journal is not None:
+        # Restored pages belong to the crawl that fetched them, not to this one.
+        for restored_at, restored in journal.restored_runs(form_data).items():
+            history.backfill(restored_at, restored)
+    metrics.finish()
+    _report_failures(collector.failed, len(form_data), journal)
+    if details_file:
+        from tibiahouses.details import save_details
+
+        await save_details(
+            client, url, collector.detail_batches, details_file, scheduler, detail_store, executor, metrics
+        )
+    if delta is not None:
+        with metrics.stage("save"):
+            _save_delta(delta, collector.failed, delta_file, output_file)
+    if not stream:
+        # The delta already knows which towns changed, so the aggregates need no fingerprints.
+        changed = delta.changed_units() if tracked else None
+        _save_result(
+            collector.table(form_data), output_file, crawled_at, metrics, normalize, aggregates, cheapest, changed
+        )
+    return collector.failed
 
 
 if __name__ == "__main__":
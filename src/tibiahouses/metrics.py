@@ -0,0 +1,282 @@
+import json
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Iterator, TextIO
+
+import rnet
+
+from tibiahouses.cache import cache_key
+from tibiahouses.scheduler import RETRY_STATUSES
+
+STAGES = ("bootstrap", "request", "read", "parse", "store", "details", "save", "aggregate")
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def unit_name(form: list[tuple[str, str]] | None) -> str:
+    return cache_key(form) if form else "bootstrap"
+
+
+def metrics_format(filename: str) -> str:
+    """``"prometheus"`` for ``*.prom`` paths, ``"json"`` otherwise."""
+    return "prometheus" if filename.endswith(".prom") else "json"
+
+
+class CrawlMetrics:
+    """Timings and counters of one crawl.
+
+    Every request attempt is recorded with its latency and status code, and
+    every crawl unit (one search form) with its attempts, response size,
+    read and parse time, row count and outcome. Stage totals add up the time
+    spent in each step across all units, so with concurrent requests they
+    can exceed the wall time. With a ``progress`` stream a live status line
+    is redrawn as units finish.
+    """
+
+    def __init__(self, progress: TextIO | None = None, refresh: float = 0.25):
+        self.units: dict[str, dict] = {}
+        self.statuses: Counter[int] = Counter()
+        self.latencies: list[float] = []
+        self.stages: dict[str, float] = dict.fromkeys(STAGES, 0.0)
+        self.total_units = 0
+        self.finished_units = 0
+        self.progress = progress
+        self.refresh = refresh
+        self._started = time.monotonic()
+        self._drawn = 0.0
+
+    def unit(self, form: list[tuple[str, str]] | None) -> dict:
+        name = unit_name(form)
+        unit = self.units.get(name)
+        if unit is None:
+            fields = dict(form) if form else {}
+            unit = self.units[name] = {
+                "unit": name,
+                "world": fields.get("world"),
+                "town": fields.get("town"),
+                "status": None,
+                "attempts": 0,
+                "request_seconds": 0.0,
+                "bytes": 0,
+                "read_seconds": 0.0,
+                "parse_seconds": 0.0,
+                "rows": 0,
+                "cached": False,
+                "error": None,
+            }
+        return unit
+
+    def start(self, total_units: int):
+        self.total_units = total_units
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - started
+
+    def timed(
+        self,
+        send: Callable[[], Awaitable[rnet.Response]],
+        form: list[tuple[str, str]] | None = None,
+        unit: bool = True,
+    ) -> Callable[[], Awaitable[rnet.Response]]:
+        """Wrap ``send`` so every attempt the scheduler makes with it is recorded.
+
+        Without ``unit`` the attempts only count towards the request totals,
+        e.g. for house detail pages that are not crawl units.
+        """
+        record = self.attempt if unit else self.request
+
+        async def timed_send() -> rnet.Response:
+            started = time.perf_counter()
+            status = 0
+            try:
+                response = await send()
+                status = response.status
+                return response
+            finally:
+                record(form, status, time.perf_counter() - started)
+
+        return timed_send
+
+    def attempt(self, form: list[tuple[str, str]] | None, status: int, seconds: float):
+        """One request attempt; ``status`` is 0 when it raised instead of answering."""
+        unit = self.unit(form)
+        unit["attempts"] += 1
+        unit["status"] = status
+        unit["request_seconds"] += seconds
+        self.request(form, status, seconds)
+
+    def request(self, form: list[tuple[str, str]] | None, status: int, seconds: float):
+        """Add a request attempt to the totals; ``form`` is not used, it only mirrors :meth:`attempt`."""
+        self.statuses[status] += 1
+        self.latencies.append(seconds)
+        self.stages["request"] += seconds
+
+    def read(self, form: list[tuple[str, str]] | None, size: int, seconds: float):
+        unit = self.unit(form)
+        unit["bytes"] += size
+        unit["read_seconds"] += seconds
+        self.stages["read"] += seconds
+
+    def parsed(self, form: list[tuple[str, str]] | None, rows: int, seconds: float, cached: bool = False):
+        unit = self.unit(form)
+        unit["rows"] = rows
+        unit["parse_seconds"] += seconds
+        unit["cached"] = cached
+        self.stages["parse"] += seconds
+
+    def done(self, form: list[tuple[str, str]] | None, error: str | None = None):
+        """A unit finished, with its rows stored or with ``error``."""
+        if error is not None:
+            self.unit(form)["error"] = error
+        self.finished_units += 1
+        self._draw()
+
+    def finish(self):
+        """End the progress line once every unit is done."""
+        self._draw(force=True)
+        if self.progress is not None:
+            self.progress.write("\n")
+            self.progress.flush()
+
+    @property
+    def wall_seconds(self) -> float:
+        """Time since the metrics were created."""
+        return time.monotonic() - self._started
+
+    @property
+    def requests(self) -> int:
+        return sum(self.statuses.values())
+
+    @property
+    def throttled(self) -> int:
+        return sum(self.statuses[status] for status in RETRY_STATUSES)
+
+    @property
+    def rows(self) -> int:
+        return sum(unit["rows"] for unit in self.units.values() if unit["error"] is None)
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for unit in self.units.values() if unit["error"] is not None)
+
+    def _draw(self, force: bool = False):
+        if self.progress is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._drawn < self.refresh:
+            return
+        self._drawn = now
+        rate = self.requests / max(self.wall_seconds, 1e-9)
+        self.progress.write(
+            f"\r[{self.finished_units}/{self.total_units}] {self.rows} rows, {rate:.1f} req/s, "
+            f"{self.throttled} throttled, {self.failed} failed "
+        )
+        self.progress.flush()
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        pages = [unit for unit in self.units.values() if unit["unit"] != "bootstrap"]
+        parsed = [unit for unit in pages if unit["error"] is None and not unit["cached"]]
+        parse_seconds = sum(unit["parse_seconds"] for unit in parsed)
+
+        def percentile(share: float) -> float | None:
+            return latencies[min(len(latencies) - 1, int(share * len(latencies)))] if latencies else None
+
+        return {
+            "wall_seconds": self.wall_seconds,
+            "requests": self.requests,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "throttled": self.throttled,
+            "retries": sum(max(0, unit["attempts"] - 1) for unit in self.units.values()),
+            "bytes": sum(unit["bytes"] for unit in self.units.values()),
+            "pages": len(pages),
+            "pages_cached": sum(1 for unit in pages if unit["cached"]),
+            "pages_failed": self.failed,
+            "rows": self.rows,
+            "latency_seconds": {"p50": percentile(0.5), "p95": percentile(0.95), "max": percentile(1.0)},
+            "parse_seconds_per_page": parse_seconds / len(parsed) if parsed else None,
+            "stage_seconds": dict(self.stages),
+        }
+
+    def to_json(self) -> dict:
+        return {"summary": self.summary(), "units": list(self.units.values())}
+
+    def to_prometheus(self) -> str:
+        """Aggregates in the Prometheus text format; per-unit rows only go to JSON."""
+        summary = self.summary()
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: list[tuple[str, float]]):
+            lines.append(f"# HELP tibiahouses_{name} {help_text}")
+            lines.append(f"# TYPE tibiahouses_{name} {kind}")
+            lines.extend(f"tibiahouses_{name}{labels} {value:g}" for labels, value in samples)
+
+        metric(
+            "requests_total",
+            "counter",
+            "Request attempts by status code (0: no answer).",
+            [(f'{{status="{status}"}}', count) for status, count in summary["statuses"].items()],
+        )
+        buckets = [
+            (f'{{le="{bound:g}"}}', sum(1 for latency in self.latencies if latency <= bound))
+            for bound in LATENCY_BUCKETS
+        ]
+        metric(
+            "request_duration_seconds",
+            "histogram",
+            "Latency of request attempts.",
+            [(f"_bucket{labels}", count) for labels, count in buckets]
+            + [
+                ('_bucket{le="+Inf"}', len(self.latencies)),
+                ("_sum", sum(self.latencies)),
+                ("_count", len(self.latencies)),
+            ],
+        )
+        worlds: Counter[str] = Counter()
+        for unit in self.units.values():
+            if unit["world"] is not None:
+                worlds[unit["world"]] += unit["request_seconds"]
+        metric(
+            "world_request_seconds_total",
+            "counter",
+            "Time spent in requests per world.",
+            [(f'{{world="{world}"}}', seconds) for world, seconds in sorted(worlds.items())],
+        )
+        metric("retries_total", "counter", "Requests retried after a throttled answer.", [("", summary["retries"])])
+        metric("response_bytes_total", "counter", "Size of the house pages read.", [("", summary["bytes"])])
+        metric(
+            "pages_total",
+            "counter",
+            "House pages by outcome.",
+            [
+                ('{result="parsed"}', summary["pages"] - summary["pages_cached"] - summary["pages_failed"]),
+                ('{result="cached"}', summary["pages_cached"]),
+                ('{result="failed"}', summary["pages_failed"]),
+            ],
+        )
+        metric("rows_total", "counter", "House rows collected.", [("", summary["rows"])])
+        metric(
+            "stage_seconds_total",
+            "counter",
+            "Time spent in each crawl stage, added up over concurrent units.",
+            [(f'{{stage="{stage}"}}', seconds) for stage, seconds in summary["stage_seconds"].items()],
+        )
+        metric("crawl_duration_seconds", "gauge", "Wall time of the crawl.", [("", summary["wall_seconds"])])
+        return "\n".join(lines) + "\n"
+
+    def save(self, filename: str):
+        """Write the metrics as Prometheus text for ``*.prom`` paths, JSON otherwise."""
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(filename, "w", encoding="utf-8") as file:
+            if metrics_format(filename) == "prometheus":
+                file.write(self.to_prometheus())
+            else:
+                json.dump(self.to_json(), file, indent=2)
@@ -0,0 +1,49 @@
+import pandas as pd
+
+AMOUNT = r"(?P<number>\d[\d,]*(?:\.\d+)?)\s*(?P<suffix>k*)"
+TIME_UNITS = {"minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_amounts(text: pd.Series, pattern: str = AMOUNT) -> pd.Series:
+    """Vectorized ``"1,234 gold"`` / ``"1.5k gold"`` / ``"2kk gold"`` to nullable integers."""
+    parts = text.str.extract(pattern)
+    number = pd.to_numeric(parts["number"].str.replace(",", "", regex=False), errors="coerce")
+    scale = 1000.0 ** parts["suffix"].str.len().fillna(0)
+    return (number * scale).round().astype("Int64")
+
+
+def normalize_houses(
+    houses: pd.DataFrame, crawled_at: pd.Timestamp | None = None, keep_raw: bool = False
+) -> pd.DataFrame:
+    """Turn the display strings of a crawl into typed columns in one vectorized pass.
+
+    ``size`` becomes ``size_sqm``, ``rent`` becomes ``rent_gold`` and ``status``
+    is split into a categorical ``state`` (``auctioned``, ``rented``, ...), the
+    current ``bid_gold``, the ``time_left`` of the auction and its estimated
+    ``auction_end`` counted from ``crawled_at``. ``city`` and ``server`` become
+    categoricals. With ``keep_raw`` the original string columns are kept too.
+    """
+    if crawled_at is None:
+        crawled_at = pd.Timestamp.now(tz="UTC")
+    status = houses["status"].astype("string")
+    left = status.str.extract(r"(?P<count>\d+)\s*(?P<unit>minute|hour|day)s?\s+left")
+    seconds = pd.to_numeric(left["count"], errors="coerce") * left["unit"].map(TIME_UNITS).astype("float")
+    time_left = pd.to_timedelta(seconds, unit="s")
+    normalized = pd.DataFrame(
+        {
+            "name": houses["name"],
+            "size_sqm": parse_amounts(houses["size"].astype("string")).astype("Int32"),
+            "rent_gold": parse_amounts(houses["rent"].astype("string")),
+            "state": status.str.extract(r"^\s*([^(]*?)\s*(?:\(|$)")[0].astype("category"),
+            "bid_gold": parse_amounts(status, r"\(\s*" + AMOUNT + r"\s*gold"),
+            "time_left": time_left,
+            "auction_end": crawled_at + time_left,
+            "city": houses["city"].astype("category"),
+            "server": houses["server"].astype("category"),
+        },
+        index=houses.index,
+    )
+    if keep_raw:
+        raw = houses[["name", "size", "rent", "status"]]
+        return pd.concat([raw, normalized.drop(columns="name")], axis=1)
+    return normalized
@@ -0,0 +1,62 @@
+STATES = {"auctioned": "auctioned", "rented": "rented", "all": ""}
+TYPES = ("houses", "guildhalls")
+
+
+def _select(kind: str, wanted: list[str] | None, known: list[str] | None) -> list[str]:
+    """Resolve ``wanted`` names against the ``known`` list, ignoring case."""
+    if wanted is None:
+        if known is None:
+            raise ValueError(f"no {kind} list to crawl")
+        return [name.strip() for name in known]
+    if known is None:
+        return list(wanted)
+    by_name = {name.strip().lower(): name.strip() for name in known}
+    unknown = [name for name in wanted if name.strip().lower() not in by_name]
+    if unknown:
+        raise ValueError(f"unknown {kind}: {', '.join(unknown)}")
+    return [by_name[name.strip().lower()] for name in wanted]
+
+
+class CrawlPlan:
+    """The search forms of a crawl, narrowed by world, town, state and type.
+
+    Without filters this is every world x town for auctioned houses. When
+    both worlds and towns are given the bootstrap page listing them is not
+    needed at all.
+    """
+
+    def __init__(
+        self,
+        worlds: list[str] | None = None,
+        towns: list[str] | None = None,
+        states: list[str] | None = None,
+        types: list[str] | None = None,
+    ):
+        self.worlds = worlds or None
+        self.towns = towns or None
+        self.states = states or ["auctioned"]
+        self.types = types or ["houses"]
+        for state in self.states:
+            if state not in STATES:
+                raise ValueError(f"unknown state: {state} (expected one of {', '.join(STATES)})")
+        for kind in self.types:
+            if kind not in TYPES:
+                raise ValueError(f"unknown type: {kind} (expected one of {', '.join(TYPES)})")
+
+    @property
+    def needs_bootstrap(self) -> bool:
+        return self.worlds is None or self.towns is None
+
+    def forms(
+        self, known_worlds: list[str] | None = None, known_towns: list[str] | None = None
+    ) -> list[list[tuple[str, str]]]:
+        """Build the search forms, checking filters against the bootstrap lists when given."""
+        worlds = _select("world", self.worlds, known_worlds)
+        towns = _select("town", self.towns, known_towns)
+        return [
+            [("world", world), ("town", town), ("state", STATES[state]), ("type", kind), ("order", "")]
+            for world in worlds
+            for town in towns
+            for state in self.states
+            for kind in self.types
+        ]
@@ -0,0 +1,171 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from tibiahouses.normalize import normalize_houses
+from tibiahouses.writers import HOUSE_FIELDS, read_houses_file
+
+KEYS = ("server", "city", "state")
+RANGES = {"size": "size_sqm", "rent": "rent_gold", "bid": "bid_gold"}
+
+
+def snapshot_signature(path: str) -> tuple | None:
+    """Size and modification time of a snapshot, or of every file of a Parquet dataset; ``None`` if missing."""
+    try:
+        if os.path.isdir(path):
+            return tuple(
+                sorted(
+                    (os.path.join(root, name), stat.st_size, stat.st_mtime_ns)
+                    for root, _, files in os.walk(path)
+                    for name in files
+                    for stat in (os.stat(os.path.join(root, name)),)
+                )
+            )
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def walk(order: np.ndarray, keep: np.ndarray, offset: int, limit: int, chunk: int = 1024) -> np.ndarray:
+    """Rows ``offset:offset + limit`` of ``order`` among the rows set in ``keep``.
+
+    Compressing all of ``order`` by ``keep`` costs about a millisecond on a
+    full crawl; a page of results is usually found in the first chunks.
+    """
+    found: list[np.ndarray] = []
+    wanted = offset + limit
+    for start in range(0, len(order), chunk):
+        rows = order[start:start + chunk]
+        found.append(rows[keep[rows]])
+        wanted -= len(found[-1])
+        if wanted <= 0:
+            break
+    return np.concatenate(found)[offset:offset + limit] if found else order[:0]
+
+
+class HouseIndex:
+    """Read-only, indexed copy of one snapshot of houses.
+
+    ``server``, ``city`` and ``state`` are dictionary encoded, with the rows
+    of every value listed in an index, and size, rent and bid are kept as
+    float arrays (NaN when missing) with their rows presorted both ways. A
+    query starts from the most selective index, checks the other filters on
+    those rows only and returns them in the order of the sort column.
+    """
+
+    def __init__(self, houses: pd.DataFrame, source: str | None = None):
+        frame = normalize_houses(houses[HOUSE_FIELDS], keep_raw=True)
+        self.rows = len(frame)
+        self.source = source
+        self.loaded_at = time.time()
+        self._raw = {field: houses[field].astype(str).tolist() for field in HOUSE_FIELDS}
+        self._states = frame["state"].astype("string").fillna("").tolist()
+        self._codes: dict[str, np.ndarray] = {}
+        self._lookup: dict[str, dict[str, int]] = {}
+        self._postings: dict[str, list[np.ndarray]] = {}
+        for key in KEYS:
+            values = pd.Series(self._states if key == "state" else self._raw[key], dtype="string").str.lower()
+            codes, uniques = pd.factorize(values)
+            self._codes[key] = codes
+            self._lookup[key] = {value: code for code, value in enumerate(uniques)}
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            self._postings[key] = [order[start:end] for start, end in zip(bounds, bounds[1:])]
+        self._values: dict[str, np.ndarray] = {}
+        self._ascending: dict[str, np.ndarray] = {}
+        self._descending: dict[str, np.ndarray] = {}
+        self._sorted: dict[str, np.ndarray] = {}
+        for name, column in RANGES.items():
+            values = frame[column].astype("Float64").to_numpy(dtype="float64", na_value=np.nan)
+            self._values[name] = values
+            self._ascending[name] = np.argsort(values, kind="stable")
+            self._sorted[name] = values[self._ascending[name]]
+            self._descending[name] = np.argsort(-values, kind="stable")
+
+    @classmethod
+    def load(cls, path: str) -> "HouseIndex":
+        """Index the CSV file or Parquet dataset written by a crawl."""
+        houses = pd.DataFrame(read_houses_file(path), columns=HOUSE_FIELDS).fillna("")
+        return cls(houses, source=path)
+
+    def _range(self, name: str, low: float | None, high: float | None) -> tuple[np.ndarray, np.ndarray, float, float]:
+        low = -np.inf if low is None else float(low)
+        high = np.inf if high is None else float(high)
+        # NaN sorts last, so the slice never includes rows without a value.
+        start = np.searchsorted(self._sorted[name], low, side="left")
+        end = np.searchsorted(self._sorted[name], high, side="right")
+        return self._ascending[name][start:end], self._values[name], low, high
+
+    def query(
+        self,
+        server: str | None = None,
+        city: str | None = None,
+        state: str | None = None,
+        min_size: float | None = None,
+        max_size: float | None = None,
+        min_rent: float | None = None,
+        max_rent: float | None = None,
+        min_bid: float | None = None,
+        max_bid: float | None = None,
+        sort: str = "rent",
+        descending: bool = False,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> tuple[int, list[dict]]:
+        """Matching houses sorted by ``sort`` (size, rent or bid): their total count and one page of rows.
+
+        Names are matched ignoring case; rows without a value for the sort
+        column come last either way.
+        """
+        if sort not in RANGES:
+            raise ValueError(f"unknown sort column: {sort} (expected one of {', '.join(RANGES)})")
+        # Every filter is a value range over one column, with the rows matching it from an index.
+        filters = []
+        for key, value in (("server", server), ("city", city), ("state", state)):
+            if value is not None:
+                code = self._lookup[key].get(value.strip().lower())
+                if code is None:
+                    return 0, []
+                filters.append((self._postings[key][code], self._codes[key], code, code))
+        for name, low, high in (
+            ("size", min_size, max_size),
+            ("rent", min_rent, max_rent),
+            ("bid", min_bid, max_bid),
+        ):
+            if low is not None or high is not None:
+                filters.append(self._range(name, low, high))
+        order = (self._descending if descending else self._ascending)[sort]
+        filters.sort(key=lambda item: len(item[0]))
+        if not filters:
+            return self.rows, [self.row(index) for index in order[offset:offset + limit]]
+        if len(filters[0][0]) * 32 > self.rows:
+            # Broad queries: test every row once and walk the presorted rows instead of sorting the matches.
+            keep = np.ones(self.rows, dtype=bool)
+            for _, column, low, high in filters:
+                keep &= (column >= low) & (column <= high)
+            return int(np.count_nonzero(keep)), [self.row(index) for index in walk(order, keep, offset, limit)]
+        ids = filters[0][0]
+        for _, column, low, high in filters[1:]:
+            values = column[ids]
+            ids = ids[(values >= low) & (values <= high)]
+        ids = np.sort(ids)
+        keys = self._values[sort][ids]
+        ordered = ids[np.argsort(-keys if descending else keys, kind="stable")]
+        return len(ordered), [self.row(index) for index in ordered[offset:offset + limit]]
+
+    def row(self, index: int) -> dict:
+        row = {field: self._raw[field][index] for field in HOUSE_FIELDS}
+        row["state"] = self._states[index]
+        for name, column in RANGES.items():
+            value = self._values[name][index]
+            row[column] = None if np.isnan(value) else int(value)
+        return row
+
+    def values(self, key: str) -> list[str]:
+        """Distinct values of ``server``, ``city`` or ``state``, as first seen."""
+        firsts = [int(postings[0]) for postings in self._postings[key] if len(postings)]
+        column = self._states if key == "state" else self._raw[key]
+        return [column[index] for index in sorted(firsts)]
@@ -0,0 +1,91 @@
+import sys
+from typing import Iterable, Iterator
+
+from tibiahouses.writers import HOUSE_FIELDS
+
+HouseRow = tuple[str, str, str, str]
+HouseRecord = tuple[str, str, str, str, str, str]
+
+
+class HouseBatch:
+    """The houses of one search page.
+
+    Rows are ``(name, size, rent, status)`` tuples as the parser produces
+    them; the page's city and server are stored once, interned, instead of
+    being repeated in a dict per house. ``ids`` holds each row's house id
+    when the crawl fetches detail pages and is ``None`` otherwise.
+    """
+
+    __slots__ = ("city", "server", "rows", "ids")
+
+    def __init__(self, city: str, server: str, rows: list[HouseRow], ids: list[str] | None = None):
+        self.city = sys.intern(city)
+        self.server = sys.intern(server)
+        self.rows = rows
+        self.ids = ids
+
+    @classmethod
+    def from_dicts(cls, houses: list[dict]) -> "HouseBatch":
+        """Batch of dict rows that share one city and server, e.g. from an older journal."""
+        city = houses[0]["city"] if houses else ""
+        server = houses[0]["server"] if houses else ""
+        if any(house["city"] != city or house["server"] != server for house in houses):
+            raise ValueError("a batch holds the houses of a single city and server")
+        rows = [(house["name"], house["size"], house["rent"], house["status"]) for house in houses]
+        return cls(city, server, rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, HouseBatch):
+            return NotImplemented
+        return (self.city, self.server, self.rows) == (other.city, other.server, other.rows)
+
+    def __repr__(self) -> str:
+        return f"HouseBatch({self.city!r}, {self.server!r}, {len(self.rows)} rows)"
+
+    def records(self) -> Iterator[HouseRecord]:
+        """Full rows in ``HOUSE_FIELDS`` order."""
+        city, server = self.city, self.server
+        for name, size, rent, status in self.rows:
+            yield name, size, rent, status, city, server
+
+    def dicts(self) -> list[dict]:
+        return [dict(zip(HOUSE_FIELDS, record)) for record in self.records()]
+
+
+class HouseTable:
+    """Every batch of a crawl, kept as batches until it is written out."""
+
+    __slots__ = ("batches",)
+
+    def __init__(self, batches: Iterable[HouseBatch] = ()):
+        self.batches = list(batches)
+
+    def append(self, batch: HouseBatch):
+        self.batches.append(batch)
+
+    def __len__(self) -> int:
+        return sum(len(batch) for batch in self.batches)
+
+    def records(self) -> Iterator[HouseRecord]:
+        for batch in self.batches:
+            yield from batch.records()
+
+    def columns(self) -> dict[str, list[str]]:
+        """One list per field, the cheapest input for a DataFrame."""
+        columns: dict[str, list[str]] = {field: [] for field in HOUSE_FIELDS}
+        names, sizes, rents, statuses, cities, servers = columns.values()
+        for batch in self.batches:
+            for name, size, rent, status in batch.rows:
+                names.append(name)
+                sizes.append(size)
+                rents.append(rent)
+                statuses.append(status)
+            cities.extend([batch.city] * len(batch.rows))
+            servers.extend([batch.server] * len(batch.rows))
+        return columns
+
+    def dicts(self) -> list[dict]:
+        return [house for batch in self.batches for house in batch.dicts()]
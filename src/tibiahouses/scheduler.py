@@ -0,0 +1,144 @@
+import asyncio
+import itertools
+import random
+import time
+from typing import AsyncIterator, Awaitable, Callable, Iterable
+
+import rnet
+
+RETRY_STATUSES = (403, 429)
+
+
+class RequestScheduler:
+    """Bounded, rate-limited request runner with adaptive backoff.
+
+    At most ``max_in_flight`` requests are outstanding at once and new
+    requests are paced by a token bucket refilled at ``rate`` requests per
+    second. A 403/429 answer halves the current rate, drains the bucket and
+    retries the request after an exponential backoff with full jitter;
+    every successful answer slowly raises the rate back towards ``rate``.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 8,
+        rate: float = 4.0,
+        burst: float | None = None,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        retry_statuses: tuple[int, ...] = RETRY_STATUSES,
+    ):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.max_in_flight = max_in_flight
+        self.max_rate = rate
+        self.min_rate = rate / 16
+        self.rate = rate
+        self.burst = burst if burst is not None else float(max_in_flight)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = retry_statuses
+        self.retries = 0
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._semaphore: asyncio.Semaphore | None = None
+        self._lock: asyncio.Lock | None = None
+
+    def _primitives(self) -> tuple[asyncio.Semaphore, asyncio.Lock]:
+        # Created lazily so the scheduler can be built outside a running loop.
+        if self._semaphore is None or self._lock is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._lock = asyncio.Lock()
+        return self._semaphore, self._lock
+
+    async def _acquire_token(self, lock: asyncio.Lock):
+        async with lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def _throttled(self):
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+
+    def _succeeded(self):
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    async def request(self, send: Callable[[], Awaitable[rnet.Response]]) -> rnet.Response:
+        """Run ``send`` under the concurrency cap and rate limit, retrying throttled answers.
+
+        The last response is returned as-is once ``max_retries`` is exhausted,
+        so callers still see the final status code.
+        """
+        semaphore, lock = self._primitives()
+        attempt = 0
+        while True:
+            async with semaphore:
+                await self._acquire_token(lock)
+                response = await send()
+            if response.status not in self.retry_statuses:
+                self._succeeded()
+                return response
+            self._throttled()
+            if attempt >= self.max_retries:
+                return response
+            await asyncio.sleep(self.backoff(attempt))
+            attempt += 1
+            self.retries += 1
+
+    async def gather(
+        self, sends: list[Callable[[], Awaitable[rnet.Response]]], return_exceptions: bool = False
+    ) -> list[rnet.Response]:
+        """Run every request through the scheduler, returning responses in input order."""
+        return await asyncio.gather(*(self.request(send) for send in sends), return_exceptions=return_exceptions)
+
+    async def as_completed(
+        self, sends: Iterable[Callable[[], Awaitable[rnet.Response]]], return_exceptions: bool = False
+    ) -> AsyncIterator[tuple[int, rnet.Response]]:
+        """Yield ``(index, response)`` pairs in completion order.
+
+        Only ``2 * max_in_flight`` requests are scheduled ahead of the consumer,
+        so a slow consumer holds a bounded number of unread responses. With
+        ``return_exceptions`` a failed request yields its exception instead of
+        ending the iteration.
+        """
+
+        async def run(index, send):
+            try:
+                return index, await self.request(send)
+            except Exception as error:
+                if not return_exceptions:
+                    raise
+                return index, error
+
+        pending: set[asyncio.Future] = set()
+        queued = enumerate(sends)
+        window = 2 * self.max_in_flight
+
+        def refill():
+            for index, send in itertools.islice(queued, window - len(pending)):
+                pending.add(asyncio.ensure_future(run(index, send)))
+
+        refill()
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+                refill()
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,149 @@
+import asyncio
+import time
+
+from aiohttp import web
+
+from tibiahouses.query import RANGES, HouseIndex, snapshot_signature
+
+NUMBER_PARAMETERS = [f"{bound}_{name}" for name in RANGES for bound in ("min", "max")]
+MAX_LIMIT = 1000
+
+
+class Snapshot:
+    """The index being served and the signature of the file it was loaded from.
+
+    A reload builds the new index in a worker thread and then replaces
+    ``index`` in one assignment, so a query sees either the old or the new
+    snapshot, never a mix of both.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.signature = snapshot_signature(path)
+        self.index = HouseIndex.load(path)
+        self.reloads = 0
+        self.error: str | None = None
+
+    async def reload(self):
+        signature = snapshot_signature(self.path)
+        index = await asyncio.to_thread(HouseIndex.load, self.path)
+        self.index, self.signature = index, signature
+        self.reloads += 1
+        self.error = None
+
+    async def watch(self, interval: float):
+        """Reload whenever the file changed and then kept the same size and time for ``interval`` seconds.
+
+        Crawls replace their output in one step; the wait is for a file
+        written in place, such as the output of a ``--stream`` crawl.
+        """
+        seen = self.signature
+        while True:
+            await asyncio.sleep(interval)
+            signature = snapshot_signature(self.path)
+            if signature is None or signature == self.signature or signature != seen:
+                seen = signature
+                continue
+            try:
+                await self.reload()
+            except Exception as error:
+                # Keep serving the previous snapshot until the file changes again.
+                self.signature = signature
+                self.error = str(error) or type(error).__name__
+
+
+SNAPSHOT = web.AppKey("snapshot", Snapshot)
+
+
+def query_parameters(query) -> dict:
+    """Keyword arguments of :meth:`HouseIndex.query` from the query string; raises ``ValueError`` on bad values."""
+    unknown = set(query) - {"server", "city", "state", "sort", "order", "limit", "offset", *NUMBER_PARAMETERS}
+    if unknown:
+        raise ValueError(f"unknown parameters: {', '.join(sorted(unknown))}")
+    parameters = {key: query[key] for key in ("server", "city", "state") if key in query}
+    for key in NUMBER_PARAMETERS:
+        if key in query:
+            parameters[key] = float(query[key])
+    parameters["sort"] = query.get("sort", "rent")
+    if parameters["sort"] not in RANGES:
+        raise ValueError(f"sort must be one of {', '.join(RANGES)}")
+    order = query.get("order", "asc")
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be asc or desc")
+    parameters["descending"] = order == "desc"
+    parameters["limit"] = int(query.get("limit", 20))
+    parameters["offset"] = int(query.get("offset", 0))
+    if not 0 <= parameters["limit"] <= MAX_LIMIT or parameters["offset"] < 0:
+        raise ValueError(f"limit must be between 0 and {MAX_LIMIT} and offset not negative")
+    return parameters
+
+
+def build_app(path: str, reload_interval: float = 5.0) -> web.Application:
+    """Query service over the crawl output at ``path``.
+
+    ``GET /houses`` answers filtered, sorted queries from memory, e.g.
+    ``/houses?server=Antica&city=Thais&state=auctioned&min_size=100&sort=rent``.
+    ``GET /status`` describes the loaded snapshot and ``POST /reload`` loads
+    it again at once. Every ``reload_interval`` seconds the file is checked
+    and a new crawl is loaded once the file has stopped changing.
+    """
+    snapshot = Snapshot(path)
+
+    async def houses(request: web.Request) -> web.Response:
+        try:
+            parameters = query_parameters(request.query)
+        except ValueError as error:
+            return web.json_response({"error": str(error)}, status=400)
+        index = snapshot.index
+        started = time.perf_counter()
+        count, rows = index.query(**parameters)
+        return web.json_response(
+            {
+                "count": count,
+                "offset": parameters["offset"],
+                "houses": rows,
+                "loaded_at": index.loaded_at,
+                "query_ms": round((time.perf_counter() - started) * 1000, 3),
+            }
+        )
+
+    async def status(request: web.Request) -> web.Response:
+        index = snapshot.index
+        return web.json_response(
+            {
+                "source": index.source,
+                "rows": index.rows,
+                "loaded_at": index.loaded_at,
+                "reloads": snapshot.reloads,
+                "error": snapshot.error,
+                "servers": index.values("server"),
+                "cities": index.values("city"),
+            }
+        )
+
+    async def reload(request: web.Request) -> web.Response:
+        try:
+            await snapshot.reload()
+        except Exception as error:
+            return web.json_response({"error": str(error) or type(error).__name__}, status=500)
+        return web.json_response({"rows": snapshot.index.rows, "loaded_at": snapshot.index.loaded_at})
+
+    async def watch_snapshot(app: web.Application):
+        task = asyncio.create_task(snapshot.watch(reload_interval))
+        yield
+        task.cancel()
+
+    app = web.Application()
+    app.router.add_get("/houses", houses)
+    app.router.add_get("/status", status)
+    app.router.add_post("/reload", reload)
+    if reload_interval:
+        app.cleanup_ctx.append(watch_snapshot)
+    app[SNAPSHOT] = snapshot
+    return app
+
+
+def serve(path: str, host: str = "127.0.0.1", port: int = 8080, reload_interval: float = 5.0):
+    app = build_app(path, reload_interval)
+    print(f"Serving {app[SNAPSHOT].index.rows} houses from {path} on http://{host}:{port}/houses")
+    web.run_app(app, host=host, port=port, print=None)
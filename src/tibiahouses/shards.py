@@ -0,0 +1,347 @@
+import asyncio
+import csv
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+from datetime import datetime, timezone
+from typing import Iterable
+
+from tibiahouses.history import HistoryStore
+from tibiahouses.main import (
+    HOUSES_URL,
+    NotAvailableElementError,
+    create_client,
+    main_cli,
+    normalized_frame,
+    plan_forms,
+    save_houses_to_file,
+)
+from tibiahouses.metrics import CrawlMetrics
+from tibiahouses.planner import CrawlPlan
+from tibiahouses.rows import HouseBatch, HouseTable
+from tibiahouses.scheduler import RequestScheduler
+from tibiahouses.writers import HOUSE_FIELDS
+
+
+def split_worlds(worlds: list[str], shards: int) -> list[list[str]]:
+    """Split ``worlds`` into at most ``shards`` contiguous, nearly equal runs.
+
+    The runs keep the world order, so crawling them one after the other
+    visits the pages in the same order as a single crawl of every world.
+    """
+    if shards < 1:
+        raise ValueError("shards must be at least 1")
+    shards = min(shards, len(worlds))
+    size, extra = divmod(len(worlds), shards) if shards else (0, 0)
+    runs, start = [], 0
+    for index in range(shards):
+        end = start + size + (index < extra)
+        runs.append(worlds[start:end])
+        start = end
+    return runs
+
+
+def shard_plans(plan: CrawlPlan, forms: list[list[tuple[str, str]]], shards: int) -> list[CrawlPlan]:
+    """One plan per shard of the worlds in ``forms``; each names its worlds and towns, so no bootstrap is needed."""
+    worlds = list(dict.fromkeys(form[0][1] for form in forms))
+    towns = list(dict.fromkeys(form[1][1] for form in forms))
+    return [
+        CrawlPlan(worlds=run, towns=towns, states=plan.states, types=plan.types) for run in split_worlds(worlds, shards)
+    ]
+
+
+def read_part(filename: str) -> HouseTable:
+    """Rows of a partial result file, regrouped into one batch per page."""
+    table = HouseTable()
+    with open(filename, newline="", encoding="utf-8") as file:
+        reader = csv.reader(file)
+        if next(reader, None) != HOUSE_FIELDS:
+            raise ValueError(f"{filename} is not a house CSV")
+        batch = None
+        for name, size, rent, status, city, server in reader:
+            if batch is None or batch.city != city or batch.server != server:
+                batch = HouseBatch(city, server, [])
+                table.append(batch)
+            batch.rows.append((name, size, rent, status))
+    return table
+
+
+def merge_parts(filenames: Iterable[str]) -> HouseTable:
+    """Concatenate partial results in shard order."""
+    table = HouseTable()
+    for filename in filenames:
+        table.batches.extend(read_part(filename).batches)
+    return table
+
+
+class ShardQueue:
+    """Work queue of crawl shards shared by a coordinator and its workers.
+
+    The queue lives in ``directory``: an SQLite database listing the shards
+    and a ``parts`` folder with one result file per finished shard. Workers
+    on this or other hosts sharing the directory claim pending shards one at
+    a time; a claim older than ``lease`` seconds is considered abandoned and
+    can be claimed again. A shard whose crawl had failed pages goes back to
+    the queue until it has been tried ``max_attempts`` times.
+    """
+
+    def __init__(self, directory: str = "data/shards", lease: float = 3600.0, max_attempts: int = 3):
+        os.makedirs(os.path.join(directory, "parts"), exist_ok=True)
+        self.directory = directory
+        self.lease = lease
+        self.max_attempts = max_attempts
+        # Autocommit, so claims can take the write lock with BEGIN IMMEDIATE.
+        self._connection = sqlite3.connect(os.path.join(directory, "queue.sqlite"), timeout=60, isolation_level=None)
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS shards (
+                shard INTEGER PRIMARY KEY,
+                plan TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                claimed_at REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT
+            );
+            """
+        )
+
+    def reset(self, plans: list[CrawlPlan], settings: dict):
+        """Replace the queue with ``plans``; ``settings`` (URL, rate limits) are handed to every worker."""
+        for name in os.listdir(os.path.join(self.directory, "parts")):
+            os.remove(os.path.join(self.directory, "parts", name))
+        rows = [
+            (shard, json.dumps({"worlds": p.worlds, "towns": p.towns, "states": p.states, "types": p.types}))
+            for shard, p in enumerate(plans)
+        ]
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._connection.execute("DELETE FROM shards")
+            self._connection.execute("DELETE FROM settings")
+            self._connection.executemany("INSERT INTO shards (shard, plan) VALUES (?, ?)", rows)
+            self._connection.executemany(
+                "INSERT INTO settings (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in settings.items()],
+            )
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    def settings(self) -> dict:
+        return {key: json.loads(value) for key, value in self._connection.execute("SELECT key, value FROM settings")}
+
+    def claim(self, worker: str) -> tuple[int, CrawlPlan] | None:
+        """Take the first pending or abandoned shard, or ``None`` when there is none."""
+        now = time.time()
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._connection.execute(
+                "SELECT shard, plan FROM shards WHERE status = 'pending'"
+                " OR (status = 'claimed' AND claimed_at < ?) ORDER BY shard LIMIT 1",
+                (now - self.lease,),
+            ).fetchone()
+            if row is not None:
+                self._connection.execute(
+                    "UPDATE shards SET status = 'claimed', worker = ?, claimed_at = ?, attempts = attempts + 1"
+                    " WHERE shard = ?",
+                    (worker, now, row[0]),
+                )
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+        if row is None:
+            return None
+        return row[0], CrawlPlan(**json.loads(row[1]))
+
+    def part_path(self, shard: int) -> str:
+        return os.path.join(self.directory, "parts", f"shard-{shard:04d}.csv")
+
+    def complete(self, shard: int, worker: str, error: str | None = None) -> bool:
+        """Mark ``shard`` done unless another worker took it over; ``error`` notes pages that still failed."""
+        cursor = self._connection.execute(
+            "UPDATE shards SET status = 'done', error = ? WHERE shard = ? AND worker = ? AND status = 'claimed'",
+            (error, shard, worker),
+        )
+        return cursor.rowcount == 1
+
+    def release(self, shard: int, worker: str, error: str) -> bool:
+        """Give ``shard`` back to the queue after a failed attempt; returns whether it will be retried."""
+        cursor = self._connection.execute(
+            "UPDATE shards SET status = 'pending', worker = NULL, error = ?"
+            " WHERE shard = ? AND worker = ? AND status = 'claimed' AND attempts < ?",
+            (error, shard, worker, self.max_attempts),
+        )
+        return cursor.rowcount == 1
+
+    def release_worker(self, worker: str) -> int:
+        """Give back every shard claimed by a worker that is known to have died."""
+        cursor = self._connection.execute(
+            "UPDATE shards SET status = 'pending', worker = NULL WHERE worker = ? AND status = 'claimed'", (worker,)
+        )
+        return cursor.rowcount
+
+    def counts(self) -> dict[str, int]:
+        counts = dict.fromkeys(("pending", "claimed", "done"), 0)
+        counts.update(self._connection.execute("SELECT status, COUNT(*) FROM shards GROUP BY status").fetchall())
+        return counts
+
+    def finished(self) -> bool:
+        return self._connection.execute("SELECT 1 FROM shards WHERE status != 'done' LIMIT 1").fetchone() is None
+
+    def errors(self) -> list[tuple[int, str]]:
+        return self._connection.execute(
+            "SELECT shard, error FROM shards WHERE status = 'done' AND error IS NOT NULL ORDER BY shard"
+        ).fetchall()
+
+    def parts(self) -> list[str]:
+        """Result files of the finished shards, in shard order."""
+        shards = self._connection.execute("SELECT shard FROM shards WHERE status = 'done' ORDER BY shard")
+        return [self.part_path(shard) for (shard,) in shards]
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+async def worker_cli(queue: ShardQueue, worker: str | None = None, parse_workers: int = 0) -> int:
+    """Crawl shards claimed from ``queue`` until none is left; returns how many this worker finished.
+
+    Each shard is crawled like a normal run restricted to its worlds, with
+    the URL and rate limits the coordinator put in the queue. A shard whose
+    crawl had failed pages is given back for another attempt; after the last
+    attempt its partial result is kept and the failure noted.
+    """
+    settings = queue.settings()
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+    scheduler = RequestScheduler(**settings["scheduler"])
+    finished = 0
+    while (claimed := queue.claim(worker)) is not None:
+        shard, plan = claimed
+        part = queue.part_path(shard)
+        attempt = f"{os.path.splitext(part)[0]}.{worker}.csv"
+        metrics = CrawlMetrics()
+        error = None
+        try:
+            await main_cli(
+                attempt,
+                scheduler=scheduler,
+                parse_workers=parse_workers,
+                plan=plan,
+                url=settings["url"],
+                metrics=metrics,
+            )
+            if metrics.failed:
+                error = f"{metrics.failed} of {metrics.total_units} pages failed"
+        except Exception as exc:
+            error = str(exc) or type(exc).__name__
+            save_houses_to_file(HouseTable(), attempt)
+        if error is not None and queue.release(shard, worker, error):
+            print(f"Shard {shard}: {error}; returned to the queue")
+            os.remove(attempt)
+            continue
+        os.replace(attempt, part)
+        if queue.complete(shard, worker, error):
+            finished += 1
+    return finished
+
+
+def _shard_worker(directory: str, worker: str, parse_workers: int = 0):
+    """Entry point of a worker process started by :func:`shard_cli`."""
+    with ShardQueue(directory) as queue:
+        asyncio.run(worker_cli(queue, worker, parse_workers))
+
+
+async def _supervise(queue: ShardQueue, processes: dict[str, multiprocessing.Process], poll: float):
+    """Wait until every shard of ``queue`` is finished, requeueing the shards of crashed workers."""
+    workers = len(processes)
+    while not queue.finished():
+        await asyncio.sleep(poll)
+        for worker, process in list(processes.items()):
+            if process.exitcode is None:
+                continue
+            if process.exitcode != 0 and queue.release_worker(worker):
+                print(f"Warning: worker {worker} exited with code {process.exitcode}; its shard was requeued")
+            del processes[worker]
+        if workers and not processes and queue.counts()["claimed"] == 0 and not queue.finished():
+            raise NotAvailableElementError("Every worker process exited with shards left in the queue.")
+
+
+async def shard_cli(
+    output_file,
+    queue: ShardQueue,
+    workers: int,
+    shards: int,
+    scheduler_options: dict | None = None,
+    plan: CrawlPlan | None = None,
+    url: str = HOUSES_URL,
+    parse_workers: int = 0,
+    normalize: bool = False,
+    history: HistoryStore | None = None,
+    metrics: CrawlMetrics | None = None,
+    poll: float = 0.5,
+    aggregates: bool = False,
+    cheapest: int = 5,
+):
+    """Crawl ``plan`` split by world into ``shards`` and merge the results into ``output_file``.
+
+    ``workers`` local processes claim the shards from ``queue``; workers on
+    other hosts sharing the queue directory can join with the ``worker``
+    command. Each worker has its own client and its own rate limit set by
+    ``scheduler_options``. The parts are merged in shard order, so the output
+    holds the same rows in the same order as a single-process crawl. Returns
+    the ``(shard, error)`` of every incomplete shard.
+    """
+    scheduler_options = scheduler_options or {}
+    metrics = metrics or CrawlMetrics()
+    plan = plan or CrawlPlan()
+    crawled_at = datetime.now(timezone.utc)
+    form_data = await plan_forms(create_client(), url, plan, RequestScheduler(**scheduler_options), None, metrics)
+    plans = shard_plans(plan, form_data, shards)
+    queue.reset(plans, {"url": url, "scheduler": scheduler_options})
+    print(f"Queued {len(plans)} shards of {len(form_data)} pages in {queue.directory}")
+    # Spawned rather than forked: the parent already runs an event loop.
+    context = multiprocessing.get_context("spawn")
+    names = [f"{socket.gethostname()}-{os.getpid()}-{index}" for index in range(workers)]
+    processes = {
+        name: context.Process(target=_shard_worker, args=(queue.directory, name, parse_workers)) for name in names
+    }
+    for process in processes.values():
+        process.start()
+    try:
+        await _supervise(queue, dict(processes), poll)
+    finally:
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()
+            process.join()
+    with metrics.stage("save"):
+        result = merge_parts(queue.parts())
+        frame = normalized_frame(result, crawled_at) if normalize else None
+        save_houses_to_file(frame if normalize else result, output_file)
+        if history is not None:
+            with history.run(crawled_at) as run:
+                for batch in result.batches:
+                    run.add_batch(batch)
+    if aggregates:
+        from tibiahouses.aggregates import write_aggregates
+
+        with metrics.stage("aggregate"):
+            write_aggregates(result, crawled_at, output_file, cheapest, frame)
+    errors = queue.errors()
+    if errors:
+        print(f"Warning: {len(errors)} of {len(plans)} shards are incomplete:")
+        for shard, error in errors:
+            print(f"  shard {shard}: {error}")
+    print(f"Merged {len(plans)} shards: {len(result)} houses -> {output_file}")
+    return errors
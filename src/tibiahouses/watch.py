@@ -0,0 +1,268 @@
+import asyncio
+import heapq
+import signal
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Iterator, TextIO
+
+import pandas as pd
+import rnet
+
+from tibiahouses.aggregates import write_aggregates
+from tibiahouses.cache import ResponseCache, cache_key
+from tibiahouses.history import HistoryStore
+from tibiahouses.main import (
+    HOUSES_URL,
+    NotAvailableElementError,
+    create_client,
+    fetch_data_as_completed,
+    normalized_frame,
+    plan_forms,
+    read_batch,
+    save_houses_to_file,
+)
+from tibiahouses.metrics import CrawlMetrics
+from tibiahouses.normalize import normalize_houses
+from tibiahouses.planner import CrawlPlan
+from tibiahouses.rows import HouseBatch, HouseTable
+from tibiahouses.scheduler import RequestScheduler
+from tibiahouses.writers import HOUSE_FIELDS
+
+
+def soonest_auction_end(houses: HouseBatch, crawled_at: datetime) -> float | None:
+    """Epoch seconds at which the first auction among ``houses`` ends, if any is running."""
+    if not houses:
+        return None
+    frame = pd.DataFrame(list(houses.records()), columns=HOUSE_FIELDS)
+    frame = normalize_houses(frame, pd.Timestamp(crawled_at))
+    ends = frame["auction_end"].dropna()
+    return ends.min().timestamp() if len(ends) else None
+
+
+@contextmanager
+def stop_on_signals(stop: asyncio.Event) -> Iterator[None]:
+    """Set ``stop`` on SIGINT or SIGTERM instead of interrupting the running loop.
+
+    Platforms and threads without loop signal handlers keep the default ones.
+    """
+    loop = asyncio.get_running_loop()
+    installed = []
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError, ValueError):
+            continue
+        installed.append(signum)
+    try:
+        yield
+    finally:
+        for signum in installed:
+            loop.remove_signal_handler(signum)
+
+
+def refresh_interval(
+    previous: float,
+    changed: bool,
+    auction_end: float | None,
+    now: float,
+    min_interval: float,
+    max_interval: float,
+) -> float:
+    """Seconds until a unit is crawled again.
+
+    A unit that changed is refreshed again after ``min_interval``; one that
+    did not waits twice as long as last time, up to ``max_interval``. A
+    running auction caps the wait at half the time left before it ends, so
+    refreshes get denser as the end approaches.
+    """
+    interval = min_interval if changed else min(max_interval, previous * 2)
+    if auction_end is not None:
+        interval = min(interval, (auction_end - now) / 2)
+    return max(min_interval, interval)
+
+
+class RefreshSchedule:
+    """Priority queue of crawl units ordered by when they are next due.
+
+    Every unit starts out due, so the first cycle is a full crawl. After
+    that each unit is rescheduled with :func:`refresh_interval`, and units
+    that failed are retried after ``min_interval``. Intervals count from the
+    moment a unit was taken from the queue, so units crawled together come
+    due together and are fetched as one batch.
+    """
+
+    def __init__(
+        self,
+        forms: list[list[tuple[str, str]]],
+        min_interval: float = 300.0,
+        max_interval: float = 6 * 3600.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("intervals must satisfy 0 < min_interval <= max_interval")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.clock = clock
+        self.forms = {cache_key(form): form for form in forms}
+        self.intervals = dict.fromkeys(self.forms, min_interval)
+        now = clock()
+        self._heap = [(now, order, key) for order, key in enumerate(self.forms)]
+        self._order = dict(zip(self.forms, range(len(self.forms))))
+        self._taken_at = dict.fromkeys(self.forms, now)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def wait(self) -> float:
+        """Seconds until the next unit is due, 0 when one already is."""
+        return max(0.0, self._heap[0][0] - self.clock()) if self._heap else self.min_interval
+
+    def due(self) -> list[list[tuple[str, str]]]:
+        """Take every unit that is due now out of the queue, in plan order."""
+        now = self.clock()
+        taken = []
+        while self._heap and self._heap[0][0] <= now:
+            taken.append(heapq.heappop(self._heap))
+            self._taken_at[taken[-1][2]] = now
+        return [self.forms[key] for _, _, key in sorted(taken, key=lambda entry: entry[1])]
+
+    def reschedule(self, form: list[tuple[str, str]], changed: bool, auction_end: float | None = None) -> float:
+        """Queue a crawled unit again and return its new interval."""
+        key = cache_key(form)
+        taken_at = self._taken_at[key]
+        interval = refresh_interval(
+            self.intervals[key], changed, auction_end, taken_at, self.min_interval, self.max_interval
+        )
+        self.intervals[key] = interval
+        heapq.heappush(self._heap, (taken_at + interval, self._order[key], key))
+        return interval
+
+    def retry(self, form: list[tuple[str, str]]):
+        """Queue a failed unit to be tried again after ``min_interval``."""
+        key = cache_key(form)
+        heapq.heappush(self._heap, (self._taken_at[key] + self.min_interval, self._order[key], key))
+
+
+async def _stopped(stop: asyncio.Event, timeout: float) -> bool:
+    """Wait up to ``timeout`` seconds for ``stop``; whether it is set."""
+    try:
+        await asyncio.wait_for(stop.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    return stop.is_set()
+
+
+async def _refresh(
+    client: rnet.Client,
+    url: str,
+    schedule: RefreshSchedule,
+    latest: dict[str, HouseBatch],
+    scheduler: RequestScheduler,
+    cache: ResponseCache | None,
+    crawled_at: datetime,
+    metrics: CrawlMetrics,
+) -> tuple[list[HouseBatch], list[HouseBatch], int]:
+    """Crawl the units that are due into ``latest`` and reschedule them.
+
+    Returns the refreshed batches, those of them that changed and how many
+    units failed.
+    """
+    due = schedule.due()
+    metrics.start(len(due))
+    refreshed, changed, failed = [], [], 0
+    async for form, response in fetch_data_as_completed(
+        client, url, due, scheduler=scheduler, return_exceptions=True, metrics=metrics
+    ):
+        try:
+            if isinstance(response, Exception):
+                raise response
+            batch = await read_batch(response, scheduler.retry_statuses, None, cache, form, metrics)
+            if batch is None:
+                raise NotAvailableElementError(f"still throttled after {scheduler.max_retries} retries")
+        except Exception as error:
+            print(f"Warning: {form[0][1]} / {form[1][1]}: {str(error) or type(error).__name__}")
+            schedule.retry(form)
+            failed += 1
+            metrics.done(form, str(error) or type(error).__name__)
+            continue
+        key = cache_key(form)
+        unit_changed = latest.get(key) != batch
+        latest[key] = batch
+        schedule.reschedule(form, unit_changed, soonest_auction_end(batch, crawled_at))
+        refreshed.append(batch)
+        if unit_changed:
+            changed.append(batch)
+        metrics.done(form)
+    metrics.finish()
+    return refreshed, changed, failed
+
+
+async def watch_cli(
+    output_file,
+    scheduler: RequestScheduler | None = None,
+    plan: CrawlPlan | None = None,
+    url: str = HOUSES_URL,
+    min_interval: float = 300.0,
+    max_interval: float = 6 * 3600.0,
+    cache: ResponseCache | None = None,
+    normalize: bool = False,
+    history: HistoryStore | None = None,
+    metrics_file: str | None = None,
+    progress: TextIO | None = None,
+    cycles: int | None = None,
+    clock: Callable[[], float] = time.time,
+    aggregates: bool = False,
+    cheapest: int = 5,
+):
+    """Keep crawling the units of ``plan`` with one client, each when it is due.
+
+    Units are refreshed on a :class:`RefreshSchedule`: towns with auctions
+    ending soon or rows that just changed come back after ``min_interval``,
+    quiet ones back off to ``max_interval``. After every cycle the output
+    file is rewritten with the latest rows of every unit, the refreshed
+    units are appended to ``history`` and the ``cache`` is committed and
+    evicted. Runs until ``cycles`` are done or SIGINT/SIGTERM arrives, which
+    lets the current cycle finish first.
+    """
+    scheduler = scheduler or RequestScheduler()
+    client = create_client()
+    stop = asyncio.Event()
+    with stop_on_signals(stop):
+        form_data = await plan_forms(client, url, plan or CrawlPlan(), scheduler, None, CrawlMetrics())
+        schedule = RefreshSchedule(form_data, min_interval, max_interval, clock)
+        latest: dict[str, HouseBatch] = {}
+        cycle = 0
+        while cycles is None or cycle < cycles:
+            if await _stopped(stop, schedule.wait()):
+                break
+            crawled_at = datetime.now(timezone.utc)
+            metrics = CrawlMetrics(progress=progress)
+            refreshed, changed, failed = await _refresh(
+                client, url, schedule, latest, scheduler, cache, crawled_at, metrics
+            )
+            with metrics.stage("save"):
+                snapshot = HouseTable(latest[key] for key in schedule.forms if key in latest)
+                frame = normalized_frame(snapshot, crawled_at) if normalize else None
+                save_houses_to_file(frame if normalize else snapshot, output_file)
+                if history is not None and refreshed:
+                    with history.run(crawled_at) as run:
+                        for batch in refreshed:
+                            run.add_batch(batch)
+            if cache is not None:
+                # The daemon may never reach ``close``: commit this cycle's pages and apply the TTL and size limit now.
+                cache.evict()
+            if aggregates:
+                with metrics.stage("aggregate"):
+                    # After the first cycle the aggregates on disk are this daemon's, so the changes are known.
+                    towns = {(batch.server, batch.city) for batch in changed} if cycle else None
+                    write_aggregates(snapshot, crawled_at, output_file, cheapest, frame, towns)
+            if metrics_file:
+                metrics.save(metrics_file)
+            cycle += 1
+            print(
+                f"{crawled_at:%Y-%m-%d %H:%M:%S}: refreshed {len(refreshed)} of {len(form_data)} units "
+                f"({len(changed)} changed, {failed} failed), next in {schedule.wait():.0f}s"
+            )
+    if stop.is_set():
+        print(f"Stopped after cycle {cycle}")
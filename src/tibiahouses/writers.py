@@ -0,0 +1,214 @@
+import csv
+import os
+import shutil
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from tibiahouses.rows import HouseBatch
+
+HOUSE_FIELDS = ["name", "size", "rent", "status", "city", "server"]
+
+
+class CsvHouseWriter:
+    """Incremental CSV writer that buffers rows and flushes them in chunks.
+
+    Produces the same file as ``save_houses_to_file`` but never needs the
+    whole result set in memory. Rows are buffered as tuples in field order.
+    When ``atomic``, the file is written next to ``filename`` and replaces it
+    on ``close``, so a reader such as the query server never sees half of
+    it; without, rows reach ``filename`` as they are flushed.
+    """
+
+    def __init__(self, filename: str, chunk_size: int = 500, fields: list[str] | None = None, atomic: bool = True):
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.fields = fields or HOUSE_FIELDS
+        self.rows_written = 0
+        self._buffer: list[tuple] = []
+        self._path = f"{filename}.tmp" if atomic else filename
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self._path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file, lineterminator=os.linesep)
+        self._writer.writerow(self.fields)
+
+    def write(self, rows: list[dict]):
+        fields = self.fields
+        self._buffer.extend(tuple(row.get(field, "") for field in fields) for row in rows)
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def write_batch(self, batch: "HouseBatch"):
+        """Write the rows of a page straight from its tuples; pages are flushed at once until rows reach the disk."""
+        if self.fields != HOUSE_FIELDS:
+            raise ValueError("batches can only be written with the house fields")
+        self._buffer.extend(batch.records())
+        if len(self._buffer) >= self.chunk_size or not self.rows_written:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._writer.writerows(self._buffer)
+            self.rows_written += len(self._buffer)
+            self._buffer.clear()
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+            if self._path != self.filename:
+                os.replace(self._path, self.filename)
+
+    def discard(self):
+        """Close without replacing ``filename``, e.g. when the crawl failed; an atomic writer drops its file."""
+        if not self._file.closed:
+            self._file.close()
+            if self._path != self.filename:
+                os.remove(self._path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.discard()
+        else:
+            self.close()
+
+
+class ParquetHouseWriter:
+    """Incremental Parquet writer partitioned by server.
+
+    Writes a hive-style dataset (``<filename>/server=<name>/part-0.parquet``)
+    that ``pd.read_parquet(filename)`` or ``pyarrow.dataset`` can load a few
+    servers and columns at a time. Rows are buffered per server and written
+    as a row group every ``chunk_size`` rows; ``city`` is dictionary encoded
+    and ``server`` comes back from the partition path. The dataset is built
+    next to ``filename`` and swapped in on ``close`` so readers never see a
+    half-written crawl.
+    """
+
+    def __init__(self, filename: str, chunk_size: int = 500, fields: list[str] | None = None):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as error:
+            raise ImportError(
+                "Parquet output requires pyarrow: pip install 'tibiahouses[parquet]'"
+            ) from error
+        self._pa = pa
+        self._pq = pq
+        self.filename = filename.rstrip("/")
+        self.chunk_size = chunk_size
+        self.fields = [field for field in (fields or HOUSE_FIELDS) if field != "server"]
+        self.schema = pa.schema(
+            [
+                (field, pa.dictionary(pa.int32(), pa.string()) if field == "city" else pa.string())
+                for field in self.fields
+            ]
+        )
+        self.rows_written = 0
+        self._staging = f"{self.filename}.tmp"
+        self._buffers: dict[str, list[tuple]] = {}
+        self._writers: dict = {}
+        self._closed = False
+        if os.path.exists(self._staging):
+            shutil.rmtree(self._staging)
+        os.makedirs(self._staging)
+
+    def write(self, rows: list[dict]):
+        fields = self.fields
+        for row in rows:
+            buffer = self._buffers.setdefault(row["server"], [])
+            buffer.append(tuple(row.get(field) for field in fields))
+            if len(buffer) >= self.chunk_size:
+                self._write_row_group(row["server"])
+
+    def write_batch(self, batch: "HouseBatch"):
+        """Write the rows of a page straight from its tuples."""
+        if self.fields != HOUSE_FIELDS[:-1]:
+            raise ValueError("batches can only be written with the house fields")
+        buffer = self._buffers.setdefault(batch.server, [])
+        city = batch.city
+        buffer.extend((name, size, rent, status, city) for name, size, rent, status in batch.rows)
+        if len(buffer) >= self.chunk_size:
+            self._write_row_group(batch.server)
+
+    def write_frame(self, frame):
+        """Write a DataFrame, e.g. normalized typed columns, keeping its dtypes."""
+        for server, group in frame.groupby("server", observed=True, sort=False):
+            table = self._pa.Table.from_pandas(group.drop(columns="server"), preserve_index=False)
+            self._writer(str(server), table.schema).write_table(table)
+            self.rows_written += len(group)
+
+    def _writer(self, server: str, schema):
+        writer = self._writers.get(server)
+        if writer is None:
+            directory = os.path.join(self._staging, f"server={server}")
+            os.makedirs(directory, exist_ok=True)
+            writer = self._pq.ParquetWriter(os.path.join(directory, "part-0.parquet"), schema, compression="zstd")
+            self._writers[server] = writer
+        return writer
+
+    def _write_row_group(self, server: str):
+        rows = self._buffers.pop(server, None)
+        if not rows:
+            return
+        columns = {field: [row[index] for row in rows] for index, field in enumerate(self.fields)}
+        self._writer(server, self.schema).write_table(self._pa.Table.from_pydict(columns, schema=self.schema))
+        self.rows_written += len(rows)
+
+    def flush(self):
+        for server in list(self._buffers):
+            self._write_row_group(server)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        for writer in self._writers.values():
+            writer.close()
+        previous = f"{self.filename}.old"
+        if os.path.exists(self.filename):
+            os.replace(self.filename, previous)
+        os.replace(self._staging, self.filename)
+        if os.path.isdir(previous):
+            shutil.rmtree(previous)
+        elif os.path.exists(previous):
+            os.remove(previous)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def output_format(filename: str) -> str:
+    """``"parquet"`` for ``*.parquet`` paths, ``"csv"`` otherwise."""
+    return "parquet" if filename.rstrip("/").endswith(".parquet") else "csv"
+
+
+def open_house_writer(
+    filename: str, chunk_size: int = 500, atomic: bool = True
+) -> CsvHouseWriter | ParquetHouseWriter:
+    """Incremental writer for ``filename``, picked by its extension; a Parquet dataset is always swapped in."""
+    if output_format(filename) == "parquet":
+        return ParquetHouseWriter(filename, chunk_size=chunk_size)
+    return CsvHouseWriter(filename, chunk_size=chunk_size, atomic=atomic)
+
+
+def read_houses_file(filename: str) -> list[dict]:
+    """Load rows previously written to a CSV file or a Parquet dataset, as strings."""
+    if output_format(filename) == "parquet":
+        import pyarrow.dataset as ds
+
+        table = ds.dataset(filename, format="parquet", partitioning="hive").to_table()
+        return [
+            {key: "" if value is None else str(value) for key, value in row.items()} for row in table.to_pylist()
+        ]
+    with open(filename, newline="", encoding="utf-8") as file:
+        return list(csv.DictReader(file))
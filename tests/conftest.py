@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture
+def form():
+    """Build the search form of one (world, town) unit, as the crawl plan does."""
+
+    def build(world, town):
+        return [("world", world), ("town", town), ("state", "auctioned"), ("type", "houses"), ("order", "")]
+
+    return build
@@ -0,0 +1,153 @@
+import sys
+import os
+
+# Add src directory to sys.path for proper imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+# Repository root, for the mock server
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import zlib
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from benchmarks.mock_server import MockTibiaServer
+from benchmarks.pages import make_houses
+from tibiahouses.aggregates import (
+    aggregate_houses,
+    aggregate_paths,
+    aggregates_follow,
+    load_aggregates,
+    save_aggregates,
+    town_fingerprints,
+    update_aggregates,
+    write_aggregates,
+)
+from tibiahouses.main import main_cli, normalized_frame
+from tibiahouses.rows import HouseBatch, HouseTable
+from tibiahouses.scheduler import RequestScheduler
+
+CRAWLED_AT = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def town(city, server, seed=0, houses=12):
+    rows = make_houses(houses, seed=zlib.crc32(f"{seed}/{server}/{city}".encode()))
+    return HouseBatch(city, server, [tuple(value.replace("\xa0", " ") for value in row[1:]) for row in rows])
+
+
+def read_back(tables, tmp_path):
+    """``tables`` as :func:`load_aggregates` reads them from disk."""
+    output = str(tmp_path / "expected.csv")
+    save_aggregates(tables, output)
+    return load_aggregates(output)
+
+
+def test_aggregates_of_a_town():
+    batch = HouseBatch(
+        "Thais",
+        "Antica",
+        [
+            ("A", "25 sqm", "1,000 gold", "rented"),
+            ("B", "40 sqm", "2,000 gold", "auctioned (12,000 gold; 5 hours left)"),
+            ("C", "30 sqm", "1,500 gold", "auctioned (no bid yet)"),
+            ("D", "100 sqm", "4,000 gold", "auctioned (5,000 gold; 1 day left)"),
+        ],
+    )
+    tables = aggregate_houses(normalized_frame(HouseTable([batch]), CRAWLED_AT), top=2)
+    towns = tables["towns"].iloc[0]
+    assert (towns["houses"], towns["auctions"], towns["bids"], towns["rented"]) == (4, 3, 2, 1)
+    assert towns["median_rent"] == 1750
+    assert towns["median_bid_per_sqm"] == (12000 / 40 + 5000 / 100) / 2
+    assert towns["max_bid"] == 12000
+    assert tables["worlds"]["houses"].tolist() == [4]
+    cheapest = tables["cheapest"]
+    assert cheapest["name"].tolist() == ["C", "D"]
+    assert cheapest["rank"].tolist() == [1, 2]
+
+
+def test_incremental_update_matches_a_full_recompute(tmp_path):
+    before = HouseTable([town("Thais", "Antica"), town("Venore", "Antica"), town("Thais", "Secura")])
+    after = HouseTable([town("Thais", "Antica"), town("Venore", "Antica", seed=1), town("Carlin", "Bona")])
+    output = str(tmp_path / "houses.csv")
+    save_aggregates(aggregate_houses(normalized_frame(before, CRAWLED_AT)), output)
+
+    tables, recomputed = update_aggregates(normalized_frame(after, CRAWLED_AT), load_aggregates(output))
+    assert recomputed == 2  # Antica/Venore changed, Bona/Carlin is new
+    assert tables["worlds"]["server"].tolist() == ["Antica", "Bona"]
+    save_aggregates(tables, output)
+    incremental = {table: open(path).read() for table, path in aggregate_paths(output).items()}
+    save_aggregates(aggregate_houses(normalized_frame(after, CRAWLED_AT)), output)
+    assert incremental == {table: open(path).read() for table, path in aggregate_paths(output).items()}
+
+
+def test_known_changes_skip_the_fingerprints_and_the_unchanged_worlds(tmp_path):
+    before = HouseTable([town("Thais", "Antica"), town("Venore", "Antica"), town("Thais", "Secura")])
+    after = HouseTable([town("Thais", "Antica"), town("Venore", "Antica", seed=1), town("Carlin", "Bona")])
+    output = str(tmp_path / "houses.csv")
+    save_aggregates(aggregate_houses(normalized_frame(before, CRAWLED_AT)), output)
+    expected = aggregate_houses(normalized_frame(after, CRAWLED_AT))
+
+    # Only the Antica rows are handed over; Bona/Carlin is new and Secura is gone.
+    antica = normalized_frame(HouseTable(after.batches[:2]), CRAWLED_AT)
+    towns = {("Antica", "Thais"), ("Antica", "Venore"), ("Bona", "Carlin")}
+    with patch("tibiahouses.aggregates.town_fingerprints", side_effect=town_fingerprints) as fingerprints:
+        tables, recomputed = update_aggregates(
+            antica, load_aggregates(output), changed={("Antica", "Venore")}, towns=towns
+        )
+    assert recomputed == 2
+    assert len(fingerprints.call_args.args[0]) == 12  # only the rows of the changed town
+    assert tables["worlds"]["server"].tolist() == ["Antica"]  # Bona has no rows here to summarize
+
+    save_aggregates(aggregate_houses(normalized_frame(before, CRAWLED_AT)), output)
+    assert write_aggregates(after, CRAWLED_AT, output, changed={("Antica", "Venore")}) == 2
+    written, expected = load_aggregates(output), read_back(expected, tmp_path)
+    for table in ("towns", "worlds", "cheapest"):
+        pd.testing.assert_frame_equal(written[table], expected[table])
+
+
+def test_aggregates_written_before_the_output_are_not_trusted(tmp_path):
+    output = tmp_path / "houses.csv"
+    assert not aggregates_follow(str(output))
+    output.write_text("name\n")
+    save_aggregates(aggregate_houses(normalized_frame(HouseTable([town("Thais", "Antica")]), CRAWLED_AT)), str(output))
+    assert aggregates_follow(str(output))
+    os.utime(output, (os.path.getmtime(output) + 60,) * 2)
+    assert not aggregates_follow(str(output))
+
+
+@pytest.mark.asyncio
+async def test_crawl_writes_aggregates_and_reuses_unchanged_towns(tmp_path, capsys):
+    output = str(tmp_path / "houses.csv")
+    with MockTibiaServer(worlds=2, towns=3, houses=5) as server:
+        for crawl in range(2):
+            # The second crawl takes the changed towns from the delta instead of fingerprinting them.
+            fingerprints = AssertionError("fingerprinted") if crawl else town_fingerprints
+            with patch("tibiahouses.aggregates.town_fingerprints", side_effect=fingerprints):
+                await main_cli(
+                    output,
+                    scheduler=RequestScheduler(rate=1000.0),
+                    url=server.url,
+                    delta_file=str(tmp_path / "delta.csv"),
+                    aggregates=True,
+                )
+    printed = capsys.readouterr().out
+    towns = pd.read_csv(aggregate_paths(output)["towns"])
+    assert f"Aggregates: {len(towns)} towns recomputed" in printed
+    assert "Aggregates: 0 towns recomputed" in printed
+    houses = pd.read_csv(output)
+    assert towns["houses"].sum() == len(houses)
+    assert os.path.getsize(aggregate_paths(output)["worlds"]) < 1024
+
+
+def test_changing_the_cheapest_count_recomputes_every_town(tmp_path):
+    table = HouseTable([town("Thais", "Antica", houses=40), town("Venore", "Antica", houses=40)])
+    houses = normalized_frame(table, CRAWLED_AT)
+    output = str(tmp_path / "houses.csv")
+    save_aggregates(aggregate_houses(houses, top=5), output)
+
+    tables, recomputed = update_aggregates(houses, load_aggregates(output), top=2)
+    assert recomputed == 2
+    assert tables["cheapest"].groupby("city")["rank"].max().tolist() == [2, 2]
+    save_aggregates(tables, output)
+    assert update_aggregates(houses, load_aggregates(output), top=2)[1] == 0
@@ -0,0 +1,50 @@
+import sys
+import os
+
+# Add src directory to sys.path for proper imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+# Repository root, for the mock server
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import subprocess
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+from benchmarks.mock_server import MockTibiaServer
+from tibiahouses import iter_houses
+from tibiahouses.main import NotAvailableElementError, main_cli
+from tibiahouses.planner import CrawlPlan
+
+
+def test_library_import_does_not_load_pandas():
+    code = "import sys, tibiahouses.main; from tibiahouses import iter_houses; print('pandas' in sys.modules)"
+    env = {**os.environ, "PYTHONPATH": os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))}
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+@pytest.mark.asyncio
+async def test_iter_houses_yields_the_rows_main_cli_writes(tmp_path):
+    output = tmp_path / "houses.csv"
+    with MockTibiaServer(worlds=3, towns=4, houses=10) as server:
+        rows = [house async for house in iter_houses(worlds=["Antica", "Bona"], url=server.url)]
+        await main_cli(str(output), plan=CrawlPlan(worlds=["Antica", "Bona"]), url=server.url)
+    key = ["server", "city", "name"]
+    expected = pd.read_csv(output, dtype=str).sort_values(key).reset_index(drop=True)
+    assert pd.DataFrame(rows).sort_values(key).reset_index(drop=True).equals(expected)
+
+
+@pytest.mark.asyncio
+async def test_iter_houses_raises_on_throttled_page():
+    response = MagicMock()
+    response.status = 403
+
+    async def fake_as_completed(client, url, form_data, scheduler=None, return_exceptions=False, metrics=None):
+        for form in form_data:
+            yield form, response
+
+    with patch("tibiahouses.api.fetch_data_as_completed", fake_as_completed):
+        with pytest.raises(NotAvailableElementError, match="Antica / Thais still throttled"):
+            async for _ in iter_houses(worlds=["Antica"], towns=["Thais"], client=MagicMock()):
+                pass
@@ -0,0 +1,84 @@
+import sys
+import os
+
+# Add src directory to sys.path for proper imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+# Repository root, for the mock server
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from datetime import datetime, timezone
+
+import pytest
+from benchmarks.mock_server import MockTibiaServer
+from tibiahouses.archive import PageArchive, decompress_page, replay_cli
+from tibiahouses.history import HistoryStore
+from tibiahouses.main import main_cli
+from tibiahouses.planner import CrawlPlan
+from tibiahouses.scheduler import RequestScheduler
+
+
+def test_pages_are_stored_once_and_indexed(tmp_path, form):
+    first, second = datetime(2024, 1, 1, tzinfo=timezone.utc), datetime(2024, 1, 2, tzinfo=timezone.utc)
+    with PageArchive(str(tmp_path / "archive.sqlite")) as archive:
+        run = archive.run(first)
+        run.plan([form("Antica", "Thais"), form("Antica", "Venore")])
+        run.add(form("Antica", "Venore"), "<html>venore</html>" * 100)
+        run.add(form("Antica", "Thais"), "<html>thais</html>" * 100)
+        run.add(None, "<html>bootstrap</html>")
+        archive.run(second).add(form("Antica", "Thais"), "<html>thais</html>" * 100)
+
+        assert [unit for unit, _ in archive.pages(run.crawl_id)] == [
+            "bootstrap",
+            "world=Antica&town=Thais&state=auctioned&type=houses",
+            "world=Antica&town=Venore&state=auctioned&type=houses",
+        ]
+        assert decompress_page(archive.pages(run.crawl_id)[2][1]) == "<html>venore</html>" * 100
+        assert [crawled_at for crawled_at, _ in archive.find("Antica", "Thais")] == [
+            first.isoformat(),
+            second.isoformat(),
+        ]
+        assert len(archive.find("Antica", "Thais", since=second)) == 1
+        assert [crawl["pages"] for crawl in archive.crawls()] == [3, 1]
+        assert archive.latest() == archive.crawls()[-1]["id"]
+        stats = archive.stats()
+    assert (stats["pages"], stats["blobs"]) == (4, 3)
+    assert stats["stored_bytes"] < stats["raw_bytes"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("processes", [0, 2])
+async def test_replay_matches_the_archived_crawl_offline(tmp_path, processes):
+    output, replayed = tmp_path / "houses.csv", tmp_path / "replayed.csv"
+    with PageArchive(str(tmp_path / "archive.sqlite")) as archive:
+        with MockTibiaServer(worlds=3, towns=3, houses=5) as server:
+            await main_cli(
+                str(output), scheduler=RequestScheduler(rate=1000.0), url=server.url, archive=archive, stream=True
+            )
+        # The server is gone: the replay only reads the archive.
+        with HistoryStore(str(tmp_path / "history.sqlite")) as history:
+            failed = replay_cli(archive, str(replayed), processes=processes, history=history)
+            runs = history.runs()
+        crawled_at = archive.crawled_at(archive.latest())
+    assert failed == []
+    assert sorted(replayed.read_text().splitlines()) == sorted(output.read_text().splitlines())
+    assert runs[0]["crawled_at"] == crawled_at.isoformat()
+
+
+@pytest.mark.asyncio
+async def test_replay_keeps_crawl_order_and_reports_broken_pages(tmp_path, form):
+    output, replayed = tmp_path / "houses.csv", tmp_path / "replayed.csv"
+    with PageArchive(str(tmp_path / "archive.sqlite")) as archive:
+        with MockTibiaServer(worlds=2, towns=2, houses=5) as server:
+            await main_cli(
+                str(output),
+                scheduler=RequestScheduler(rate=1000.0),
+                url=server.url,
+                archive=archive,
+                plan=CrawlPlan(worlds=["Antica"]),
+            )
+        archive.run(datetime.now(timezone.utc)).add(form("Antica", "Thais"), "<html>new markup</html>")
+        previous = archive.crawls()[0]["id"]
+        assert replay_cli(archive, str(replayed), crawl_id=previous, processes=0) == []
+        assert replayed.read_bytes() == output.read_bytes()
+        failed = replay_cli(archive, str(replayed), processes=0)
+    assert [unit for unit, _ in failed] == ["world=Antica&town=Thais&state=auctioned&type=houses"]
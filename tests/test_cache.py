@@ -0,0 +1,106 @@
+import sys
+import os
+
+# Add src directory to sys.path for proper imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from tibiahouses.cache import ResponseCache, cache_key, content_digest
+from tibiahouses.main import read_batch, read_houses
+
+FORM = [("world", "Antica"), ("town", "Thais"), ("state", "auctioned"), ("type", "houses"), ("order", "")]
+PAYLOAD = ("Thais", "Antica", [("House One", "25 sqm", "1000 gold", "rented")])
+
+
+def test_cache_key_ignores_order():
+    assert cache_key(FORM) == "world=Antica&town=Thais&state=auctioned&type=houses"
+
+
+def test_content_digest_ignores_content_before_house_box():
+    page = '<div id="houses">rows</div>'
+    assert content_digest("<p>12 players online</p>" + page) == content_digest("<p>15 players online</p>" + page)
+    assert content_digest(page) != content_digest('<div id="houses">other rows</div>')
+
+
+def test_cache_hit_requires_matching_digest(tmp_path):
+    with ResponseCache(str(tmp_path / "cache.sqlite")) as cache:
+        cache.store("key", "digest", PAYLOAD)
+        assert cache.lookup("key", "digest") == PAYLOAD
+        assert cache.lookup("key", "changed") is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_persists_between_runs(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    with ResponseCache(path) as cache:
+        cache.store("key", "digest", PAYLOAD)
+    with ResponseCache(path) as cache:
+        assert cache.lookup("key", "digest") == PAYLOAD
+
+
+def test_cache_expires_entries_after_ttl(tmp_path):
+    with ResponseCache(str(tmp_path / "cache.sqlite"), ttl=60) as cache:
+        with patch("tibiahouses.cache.time.time", return_value=1000.0):
+            cache.store("key", "digest", PAYLOAD)
+        with patch("tibiahouses.cache.time.time", return_value=1061.0):
+            assert cache.lookup("key", "digest") is None
+            cache.evict()
+        assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    with ResponseCache(str(tmp_path / "cache.sqlite"), max_entries=2) as cache:
+        for now, key in enumerate(["a", "b", "c"]):
+            with patch("tibiahouses.cache.time.time", return_value=1000.0 + now):
+                cache.store(key, "digest", PAYLOAD)
+        with patch("tibiahouses.cache.time.time", return_value=1010.0):
+            cache.lookup("a", "digest")
+            cache.evict()
+            assert len(cache) == 2
+            assert cache.lookup("b", "digest") is None
+            assert cache.lookup("a", "digest") == PAYLOAD
+
+
+@pytest.mark.asyncio
+async def test_read_houses_skips_parsing_unchanged_pages(tmp_path):
+    response = MagicMock()
+    response.status = 200
+
+    async def text():
+        return '<div id="houses">unchanged</div>'
+
+    response.text = text
+    with ResponseCache(str(tmp_path / "cache.sqlite")) as cache:
+        with patch("tibiahouses.main.parse_houses_compact", return_value=PAYLOAD) as mock_parse:
+            first = await read_houses(response, (403, 429), cache=cache, form=FORM)
+            second = await read_houses(response, (403, 429), cache=cache, form=FORM)
+        mock_parse.assert_called_once()
+    assert first == second
+    assert first[0]["name"] == "House One"
+    assert first[0]["server"] == "Antica"
+
+
+@pytest.mark.asyncio
+async def test_cached_house_ids_are_reused_without_parsing(tmp_path):
+    response = MagicMock()
+    response.status = 200
+
+    async def text():
+        return '<div id="houses">unchanged</div>'
+
+    response.text = text
+    with ResponseCache(str(tmp_path / "cache.sqlite")) as cache:
+        # An entry stored without ids is parsed again once when the ids are needed.
+        with patch("tibiahouses.main.parse_houses_compact", return_value=PAYLOAD):
+            await read_batch(response, (403, 429), cache=cache, form=FORM)
+        with patch("tibiahouses.main.parse_houses_compact", return_value=PAYLOAD + (["12000"],)) as mock_parse:
+            first = await read_batch(response, (403, 429), cache=cache, form=FORM, ids=True)
+        mock_parse.assert_called_once_with('<div id="houses">unchanged</div>', ids=True)
+        with patch("tibiahouses.main.parse_houses_compact", side_effect=AssertionError("parsed again")):
+            second = await read_batch(response, (403, 429), cache=cache, form=FORM, ids=True)
+            plain = await read_batch(response, (403, 429), cache=cache, form=FORM)
+    assert first.ids == second.ids == ["12000"]
+    assert second == first
+    assert plain.ids is None
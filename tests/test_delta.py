@@ -0,0 +1,63 @@
+import sys
+import os
+
+# Add src directory to sys.path for proper imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import pandas as pd
+from tibiahouses.delta import DeltaTracker, load_snapshot, save_delta_to_file
+from tibiahouses.main import save_houses_to_file
+
+
+def house(name, status, city="Thais", server="Antica"):
+    return {"name": name, "size": "25 sqm", "rent": "1,000 gold", "status": status, "city": city, "server": server}
+
+
+def test_load_snapshot_indexes_by_server_city_name(tmp_path):
+    filename = tmp_path / "houses.csv"
+    save_houses_to_file([house("House One", "rented")], str(filename))
+    snapshot = load_snapshot(str(filename))
+    assert snapshot[("Antica", "Thais", "House One")]["status"] == "rented"
+    assert load_snapshot(str(tmp_path / "missing.csv")) == {}
+
+
+def test_delta_tracks_inserted_changed_and_removed(tmp_path):
+    filename = tmp_path / "houses.csv"
+    save_houses_to_file(
+        [
+            house("Kept", "rented"),
+            house("Bid Placed", "auctioned (no bid yet)"),
+            house("Sold", "auctioned (no bid yet)"),
+            house("Other Town", "rented", city="Venore"),
+        ],
+        str(filename),
+    )
+    tracker = DeltaTracker.from_file(str(filename))
+    tracker.update(
+        [
+            house("Kept", "rented"),
+            house("Bid Placed", "auctioned (5,000 gold; 2 days left)"),
+            house("New", "auctioned (no bid yet)"),
+        ]
+    )
+    changes = tracker.finish()
+    assert {(change["change"], change["name"]) for change in changes} == {
+        ("changed", "Bid Placed"),
+        ("inserted", "New"),
+        ("removed", "Sold"),
+    }
+    assert tracker.summary() == {"inserted": 1, "changed": 1, "removed": 1}
+
+
+def test_delta_reports_removals_for_emptied_pages():
+    tracker = DeltaTracker({("Antica", "Thais", "Sold"): house("Sold", "auctioned (no bid yet)")})
+    tracker.update([], ("Antica", "Thais"))
+    assert [change["change"] for change in tracker.finish()] == ["removed"]
+
+
+def test_save_delta_to_file(tmp_path):
+    filename = tmp_path / "delta.csv"
+    save_delta_to_file([{"change": "inserted", **house("New", "rented")}], str(filename))
+    df = pd.read_csv(filename)
+    assert list(df.columns) == ["change", "name", "size", "rent", "status", "city", "server"]
+    assert df.iloc[0]["change"] == "inserted"
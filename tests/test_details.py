@@ -0,0 +1,99 @@
+import sys
+import os
+
+# Add src directory to sys.path for proper imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+# Repository root, for the mock server
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+import pytest
+from benchmarks.mock_server import MockTibiaServer
+from benchmarks.pages import make_houses, render_house_page, render_houses_page
+from tibiahouses.details import HouseDetailStore, detail_url, house_summary, parse_house_details
+from tibiahouses.main import main_cli, parse_houses_compact
+from tibiahouses.planner import CrawlPlan
+from tibiahouses.scheduler import RequestScheduler
+
+
+def test_parse_house_page_and_ids():
+    houses = make_houses(3, seed=4, first_id=12000)
+    page = render_houses_page("Antica", "Thais", houses, ["Antica"], ["Thais"])
+    city, server, rows, ids = parse_houses_compact(page, ids=True)
+    assert ids == ["12000", "12001", "12002"]
+    assert (city, server, rows) == parse_houses_compact(page)
+
+    rented = (12000, "Market Street 1", "25\xa0sqm", "2,500\xa0gold", "rented")
+    details = parse_house_details(render_house_page("Antica", rented))
+    assert details["name"] == "Market Street 1"
+    assert details["beds"].isdigit()
+    assert details["owner"].startswith("Player ")
+    assert details["paid_until"].endswith("2025, 10:00:00 CET")
+    assert details["auction_end"] == details["bid"] == details["bidder"] == ""
+    assert details["description"].startswith("This house has")
+
+    auctioned = (12001, "Market Street 2", "25\xa0sqm", "2,500\xa0gold", "auctioned (1,200\xa0gold; 3\xa0hours left)")
+    details = parse_house_details(render_house_page("Antica", auctioned))
+    assert details["owner"] == ""
+    assert details["bid"] == "1200"
+    assert details["bidder"].startswith("Bidder ")
+    assert details["auction_end"].startswith("Jan ")
+
+
+def test_detail_url():
+    assert detail_url("https://www.tibia.com/community/?subtopic=houses", "Antica", "59012") == (
+        "https://www.tibia.com/community/?subtopic=houses&page=view&world=Antica&houseid=59012"
+    )
+    assert detail_url("http://127.0.0.1:8080/community/", "Secura", "1") == (
+        "http://127.0.0.1:8080/community/?page=view&world=Secura&houseid=1"
+    )
+
+
+def test_store_reuses_details_until_the_row_changes(tmp_path):
+    record = ("House One", "25 sqm", "1,000 gold", "auctioned (no bid yet)", "Thais", "Antica")
+    changed = record[:3] + ("auctioned (5,000 gold; 2 hours left)",) + record[4:]
+    path = str(tmp_path / "details.sqlite")
+    with HouseDetailStore(path) as store:
+        store.store("Antica", "1", house_summary(record), {"name": "House One", "beds": "2"})
+    with HouseDetailStore(path) as store:
+        assert store.lookup("Antica", "1", house_summary(record)) == {"name": "House One", "beds": "2"}
+        assert store.lookup("Antica", "1", house_summary(changed)) is None
+        assert store.lookup("Secura", "1", house_summary(record)) is None
+        assert (store.hits, store.misses, len(store)) == (1, 2, 1)
+
+
+@pytest.mark.asyncio
+async def test_crawl_fetches_each_house_once_and_reuses_stored_details(tmp_path):
+    details_file = tmp_path / "details.csv"
+    # Every house shows up under both states, but its detail page is fetched once.
+    plan = CrawlPlan(states=["auctioned", "rented"])
+    scheduler = RequestScheduler(rate=1000.0)
+    with MockTibiaServer(worlds=2, towns=2, houses=5) as server:
+        with HouseDetailStore(str(tmp_path / "details.sqlite")) as store:
+            await main_cli(
+                str(tmp_path / "houses.csv"),
+                scheduler=scheduler,
+                plan=plan,
+                url=server.url,
+                details_file=str(details_file),
+                detail_store=store,
+            )
+        first = server.stats()
+        with HouseDetailStore(str(tmp_path / "details.sqlite")) as store:
+            await main_cli(
+                str(tmp_path / "houses.csv"),
+                scheduler=scheduler,
+                plan=plan,
+                url=server.url,
+                details_file=str(details_file),
+                detail_store=store,
+            )
+            assert store.misses == 0
+        second = server.stats()
+    houses = pd.read_csv(tmp_path / "houses.csv")
+    details = pd.read_csv(details_file, keep_default_na=False)
+    unique = houses.drop_duplicates(["server", "city", "name"])
+    assert first["details"] == len(unique) == len(details) > 0
+    assert second["details"] == first["details"]
+    assert not details.duplicated(["server", "house_id"]).any()
+    assert set(details["name"]) == set(houses["name"])
@@ -0,0 +1,93 @@
+import sys
+import os
+
+# Add src directory to sys.path for proper imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from tibiahouses.history import HistoryStore
+from tibiahouses.main import cli
+
+
+def house(name, status, city="Thais", server="Antica"):
+    return {"name": name, "size": "25 sqm", "rent": "1,000 gold", "status": status, "city": city, "server": server}
+
+
+FIRST = datetime(2026, 1, 1, tzinfo=timezone.utc)
+SECOND = datetime(2026, 1, 2, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def store(tmp_path):
+    with HistoryStore(str(tmp_path / "history.sqlite")) as store:
+        store.record([house("House One", "auctioned (no bid yet)"), house("House Two", "rented")], FIRST)
+        store.record(
+            [
+                house("House One", "auctioned (5,000 gold; 1 day left)"),
+                house("House Two", "rented"),
+                house("Far Away", "rented", city="Venore"),
+            ],
+            SECOND,
+        )
+        yield store
+
+
+def test_history_of_a_house(store):
+    rows = store.history("Antica", "Thais", "House One")
+    assert [row["status"] for row in rows] == ["auctioned (no bid yet)", "auctioned (5,000 gold; 1 day left)"]
+    assert rows[0]["crawled_at"] == FIRST.isoformat()
+
+
+def test_history_of_a_town_and_time_range(store):
+    assert len(store.history("Antica", "Thais")) == 4
+    assert len(store.history("Antica")) == 5
+    assert len(store.history("Antica", "Thais", since=SECOND)) == 2
+    assert len(store.history("Antica", "Thais", until=FIRST)) == 2
+
+
+def test_history_records_runs(store):
+    assert [(run["crawled_at"], run["houses"]) for run in store.runs()] == [
+        (FIRST.isoformat(), 2),
+        (SECOND.isoformat(), 3),
+    ]
+
+
+def test_history_run_rolls_back_failed_crawl(store):
+    with pytest.raises(RuntimeError):
+        with store.run(datetime(2026, 1, 3, tzinfo=timezone.utc)) as run:
+            run.add([house("House One", "rented")])
+            raise RuntimeError("crawl failed")
+    assert len(store.runs()) == 2
+    assert len(store.history("Antica", "Thais", "House One")) == 2
+
+
+def test_history_queries_use_indexes(store):
+    plan = " ".join(
+        row[-1]
+        for row in store._connection.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM houses WHERE server = ? AND city = ? AND name = ?"
+            " ORDER BY crawled_at",
+            ("Antica", "Thais", "House One"),
+        )
+    )
+    assert "houses_house" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_history_name_needs_city(store):
+    with pytest.raises(ValueError):
+        store.history("Antica", name="House One")
+
+
+def test_history_subcommand_prints_csv(store, tmp_path, capsys):
+    argv = ["tibiahouses", "history", "--db", str(tmp_path / "history.sqlite"), "--server", "Antica"]
+    argv += ["--city", "Thais", "--name", "House One", "--since", "2026-01-02"]
+    with patch.object(sys, "argv", argv):
+        cli()
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "crawled_at,server,city,name,size,rent,status"
+    assert len(lines) == 2
+    assert lines[1].endswith('"auctioned (5,000 gold; 1 day left)"')
@@ -0,0 +1,192 @@
+import sys
+import os
+
+# Add src directory to sys.path for proper imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+from tibiahouses.delta import kept_path
+from tibiahouses.history import HistoryStore
+from tibiahouses.journal import CrawlJournal
+from tibiahouses.main import main_cli
+from tibiahouses.rows import HouseBatch
+
+
+def house(name, town="Thais", world="Antica"):
+    return {"name": name, "size": "25 sqm", "rent": "1,000 gold", "status": "rented", "city": town, "server": world}
+
+
+def test_journal_resume_keeps_completed_units(tmp_path, form):
+    path = str(tmp_path / "journal.jsonl")
+    with CrawlJournal(path) as journal:
+        journal.record(form("Antica", "Thais"), HouseBatch.from_dicts([house("House One")]))
+        journal.fail(form("Antica", "Venore"), "status code: 500")
+    with open(path, "a") as file:
+        file.write('{"unit": "world=Bona&town=Thais", "status": "done", "houses": []}\n')
+        file.write('{"unit": "cut short')
+    with CrawlJournal(path, resume=True) as journal:
+        assert journal.completed == {
+            "world=Antica&town=Thais&state=auctioned&type=houses": HouseBatch.from_dicts([house("House One")]),
+            "world=Bona&town=Thais": HouseBatch("", "", []),
+        }
+        assert journal.failed == {"world=Antica&town=Venore&state=auctioned&type=houses": "status code: 500"}
+        assert journal.pending([form("Antica", "Thais"), form("Antica", "Venore")]) == [form("Antica", "Venore")]
+
+
+def test_journal_without_resume_starts_over(tmp_path, form):
+    path = str(tmp_path / "journal.jsonl")
+    with CrawlJournal(path) as journal:
+        journal.record(form("Antica", "Thais"), HouseBatch.from_dicts([house("House One")]))
+    with CrawlJournal(path) as journal:
+        assert journal.completed == {}
+    with CrawlJournal(path, resume=True) as journal:
+        assert journal.completed == {}
+
+
+def make_response(status, text="page"):
+    response = MagicMock()
+    response.status = status
+
+    async def read():
+        return text
+
+    response.text = read
+    return response
+
+
+@pytest.mark.asyncio
+async def test_failed_units_are_reported_and_resumed(tmp_path, capsys):
+    journal_path = str(tmp_path / "journal.jsonl")
+    output = str(tmp_path / "houses.csv")
+    requested = []
+    statuses = {"Thais": [200, 200], "Venore": [500, 200]}
+
+    async def fake_fetch(client, url, form_data, scheduler=None, return_exceptions=False, metrics=None):
+        requested.append([dict(form)["town"] for form in form_data])
+        for form in form_data:
+            yield form, make_response(statuses[dict(form)["town"]].pop(0), dict(form)["town"])
+
+    def fake_parse(town):
+        return town, "Antica", [(f"{town} House", "25 sqm", "1,000 gold", "rented")]
+
+    with patch("tibiahouses.main.create_client", return_value=MagicMock()):
+        with patch("tibiahouses.main.fetch_data", return_value=[make_response(200)]):
+            with patch("tibiahouses.main.fetch_data_as_completed", fake_fetch):
+                with patch("tibiahouses.main.parse_cities", return_value=["Thais", "Venore"]):
+                    with patch("tibiahouses.main.parse_servers", return_value=["Antica"]):
+                        with patch("tibiahouses.main.parse_houses_compact", fake_parse):
+                            with CrawlJournal(journal_path) as journal:
+                                await main_cli(output, journal=journal)
+                            printed = capsys.readouterr().out
+                            assert "Antica / Venore: Failed to fetch houses data, status code: 500" in printed
+                            assert list(pd.read_csv(output)["name"]) == ["Thais House"]
+
+                            with CrawlJournal(journal_path, resume=True) as journal:
+                                await main_cli(output, journal=journal)
+
+    assert requested == [["Thais", "Venore"], ["Venore"]]
+    assert list(pd.read_csv(output)["name"]) == ["Thais House", "Venore House"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("stream", [False, True])
+async def test_failed_towns_are_kept_for_the_next_delta(tmp_path, stream):
+    output = str(tmp_path / "houses.csv")
+    delta_file = str(tmp_path / "delta.csv")
+    statuses = {"Thais": [200, 200, 200], "Venore": [200, 500, 200]}
+
+    async def fake_fetch(client, url, form_data, scheduler=None, return_exceptions=False, metrics=None):
+        for form in form_data:
+            yield form, make_response(statuses[dict(form)["town"]].pop(0), dict(form)["town"])
+
+    def fake_parse(town):
+        return town, "Antica", [(f"{town} House", "25 sqm", "1,000 gold", "rented")]
+
+    runs = []
+    with patch("tibiahouses.main.create_client", return_value=MagicMock()):
+        with patch("tibiahouses.main.fetch_data", return_value=[make_response(200)]):
+            with patch("tibiahouses.main.fetch_data_as_completed", fake_fetch):
+                with patch("tibiahouses.main.parse_cities", return_value=["Thais", "Venore"]):
+                    with patch("tibiahouses.main.parse_servers", return_value=["Antica"]):
+                        with patch("tibiahouses.main.parse_houses_compact", fake_parse):
+                            for _ in range(3):
+                                failed = await main_cli(output, stream=stream, delta_file=delta_file)
+                                delta = list(pd.read_csv(delta_file)["change"])
+                                kept = os.path.exists(kept_path(output))
+                                runs.append((len(failed), list(pd.read_csv(output)["name"]), delta, kept))
+
+    # The failed town is left out of the output but is neither removed nor inserted again.
+    assert runs == [
+        (0, ["Thais House", "Venore House"], ["inserted", "inserted"], False),
+        (1, ["Thais House"], [], True),
+        (0, ["Thais House", "Venore House"], [], False),
+    ]
+
+
+def test_cli_exits_with_an_error_when_pages_failed(tmp_path, form):
+    from tibiahouses.main import cli
+
+    async def fake_main_cli(output_file, **options):
+        return [(form("Antica", "Venore"), "status code: 500")]
+
+    argv = ["tibiahouses", "-o", str(tmp_path / "houses.csv"), "--no-cache", "--journal", str(tmp_path / "j.jsonl")]
+    with patch.object(sys, "argv", argv), patch("tibiahouses.main.main_cli", fake_main_cli):
+        with pytest.raises(SystemExit) as exit_info:
+            cli()
+    assert exit_info.value.code == 1
+
+
+def test_recorded_units_do_not_keep_their_rows(tmp_path, form):
+    path = str(tmp_path / "journal.jsonl")
+    with CrawlJournal(path) as journal:
+        journal.record(form("Antica", "Thais"), HouseBatch.from_dicts([house("House One")]))
+        assert journal.completed == {}
+        assert journal.pending([form("Antica", "Thais"), form("Antica", "Venore")]) == [form("Antica", "Venore")]
+    with CrawlJournal(path, resume=True) as journal:
+        assert list(journal.completed.values()) == [HouseBatch.from_dicts([house("House One")])]
+
+
+@pytest.mark.asyncio
+async def test_resume_keeps_restored_pages_out_of_the_new_history_run(tmp_path):
+    journal_path = str(tmp_path / "journal.jsonl")
+    statuses = {"Thais": [200], "Venore": [500, 500, 200]}
+
+    async def fake_fetch(client, url, form_data, scheduler=None, return_exceptions=False, metrics=None):
+        for form in form_data:
+            yield form, make_response(statuses[dict(form)["town"]].pop(0), dict(form)["town"])
+
+    def fake_parse(town):
+        return town, "Antica", [(f"{town} House", "25 sqm", "1,000 gold", "rented")]
+
+    with HistoryStore(str(tmp_path / "history.sqlite")) as history:
+        with patch("tibiahouses.main.create_client", return_value=MagicMock()):
+            with patch("tibiahouses.main.fetch_data", return_value=[make_response(200)]):
+                with patch("tibiahouses.main.fetch_data_as_completed", fake_fetch):
+                    with patch("tibiahouses.main.parse_cities", return_value=["Thais", "Venore"]):
+                        with patch("tibiahouses.main.parse_servers", return_value=["Antica"]):
+                            with patch("tibiahouses.main.parse_houses_compact", fake_parse):
+                                for resume in (False, True, True):
+                                    with CrawlJournal(journal_path, resume=resume) as journal:
+                                        await main_cli(str(tmp_path / "houses.csv"), history=history, journal=journal)
+        runs = history.runs()
+        first = history.history("Antica", "Thais")
+    assert [run["houses"] for run in runs] == [1, 0, 1]
+    assert [row["crawled_at"] for row in first] == [runs[0]["crawled_at"]]
+
+
+def test_crashed_crawl_is_backfilled_under_its_own_time(tmp_path, form):
+    path = str(tmp_path / "journal.jsonl")
+    crawled_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    with CrawlJournal(path) as journal:
+        journal.record(form("Antica", "Thais"), HouseBatch.from_dicts([house("House One")]), crawled_at)
+    with CrawlJournal(path, resume=True) as journal:
+        restored = journal.restored_runs([form("Antica", "Thais")])
+    assert list(restored) == [crawled_at]
+    with HistoryStore(str(tmp_path / "history.sqlite")) as history:
+        assert history.backfill(crawled_at, restored[crawled_at]) == 1
+        assert history.backfill(crawled_at, restored[crawled_at]) == 0
+        assert [run["crawled_at"] for run in history.runs()] == [crawled_at.isoformat()]
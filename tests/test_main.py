@@ -3,23 +3,32 @@ import os
 
 # Add src directory to sys.path for proper imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+# Repository root, for the benchmark page generators and reference parser
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import pytest
 import asyncio  # noqa: F401
 from unittest.mock import MagicMock, patch
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from benchmarks.legacy import parse_houses_legacy
+from benchmarks.pages import make_houses, render_houses_page
 from tibiahouses.main import (
     create_client,
     fetch_data,  # noqa: F401
     parse_cities,
     parse_servers,
     parse_houses,
+    parse_houses_compact,
+    expand_houses,
+    read_houses,
     save_houses_to_file,
     NotAvailableElementError,
 )
 
 # Import main_cli for testing main functionality
 from tibiahouses.main import main_cli as main
+from tibiahouses.planner import CrawlPlan
 
 
 @pytest.fixture
@@ -165,6 +174,58 @@ def sample_html_response():
     """
 
 
+@pytest.fixture
+def tibia_houses_html():
+    """House list page laid out like the one served by tibia.com."""
+    return """
+    <div id="houses" class="Box">
+      <div class="Border_1"></div>
+      <div class="Border_2">
+        <div class="Border_3">
+          <div class="BoxContent">
+            <div class="TableContainer">
+              <div class="CaptionContainer">
+                <div class="CaptionInnerContainer">
+                  <div class="Text">Houses and Guildhalls in Thais on Antica</div>
+                </div>
+              </div>
+              <table class="Table3">
+                <tbody><tr><td>
+                  <div class="InnerTableContainer">
+                    <table><tbody><tr><td>
+                      <div class="TableContentContainer">
+                        <table class="TableContent"><tbody>
+                          <tr class="LabelH">
+                            <td>Name</td><td>Size</td><td>Rent</td><td>Status</td><td>&#160;</td>
+                          </tr>
+                          <tr>
+                            <td><nobr>Alai Flats, Flat 01</nobr></td>
+                            <td><nobr>21&#160;sqm</nobr></td>
+                            <td><nobr>1,500&#160;gold</nobr></td>
+                            <td><nobr>auctioned (no bid yet)</nobr></td>
+                            <td><form><input type="hidden" name="houseid" value="59012"/></form></td>
+                          </tr>
+                          <tr>
+                            <td><nobr>Upper Swamp Lane 8</nobr></td>
+                            <td><nobr>120&#160;sqm</nobr></td>
+                            <td><nobr>8,000&#160;gold</nobr></td>
+                            <td><nobr>auctioned (12,345&#160;gold; 5&#160;hours left)</nobr></td>
+                            <td><form><input type="hidden" name="houseid" value="59013"/></form></td>
+                          </tr>
+                        </tbody></table>
+                      </div>
+                    </td></tr></tbody></table>
+                  </div>
+                </td></tr></tbody>
+              </table>
+            </div>
+          </div>
+        </div>
+      </div>
+    </div>
+    """
+
+
 def test_create_client():
     """Test client creation."""
     with patch("tibiahouses.main.rnet.Client") as mock_client_class:
@@ -306,6 +367,87 @@ def test_parse_houses_error():
         parse_houses("<html></html>")
 
 
+def test_parse_houses_tibia_layout(tibia_houses_html):
+    """Test parsing a house list laid out like tibia.com."""
+    houses = parse_houses(tibia_houses_html)
+    assert houses == [
+        {
+            "name": "Alai Flats, Flat 01",
+            "size": "21 sqm",
+            "rent": "1,500 gold",
+            "status": "auctioned (no bid yet)",
+            "city": "Thais",
+            "server": "Antica",
+        },
+        {
+            "name": "Upper Swamp Lane 8",
+            "size": "120 sqm",
+            "rent": "8,000 gold",
+            "status": "auctioned (12,345 gold; 5 hours left)",
+            "city": "Thais",
+            "server": "Antica",
+        },
+    ]
+
+
+def assert_matches_legacy(page):
+    try:
+        expected = parse_houses_legacy(page)
+    except NotAvailableElementError:
+        with pytest.raises(NotAvailableElementError):
+            parse_houses(page)
+    else:
+        assert parse_houses(page) == expected
+
+
+@pytest.mark.parametrize(
+    "page",
+    [
+        "<html></html>",
+        render_houses_page("Antica", "Thais", make_houses(150)),
+        render_houses_page("Secura", "Venore", []),
+    ],
+)
+def test_parse_houses_matches_legacy_parser(page):
+    """Test the single-pass parser reproduces the original selector-based output."""
+    assert_matches_legacy(page)
+
+
+def test_parse_houses_matches_legacy_on_fixtures(sample_html_response, tibia_houses_html):
+    """Test the single-pass parser agrees with the original on the hand-written fixtures."""
+    for page in (sample_html_response, tibia_houses_html):
+        assert_matches_legacy(page)
+
+
+def test_parse_houses_multi_word_town():
+    """Test towns with spaces in their name are kept whole."""
+    houses = parse_houses(render_houses_page("Antica", "Liberty Bay", make_houses(3)))
+    assert {(house["city"], house["server"]) for house in houses} == {("Liberty Bay", "Antica")}
+
+
+def test_parse_houses_compact_round_trip(tibia_houses_html):
+    """Test the compact worker payload expands back to parse_houses output."""
+    city, server, rows = parse_houses_compact(tibia_houses_html)
+    assert (city, server) == ("Thais", "Antica")
+    assert rows[0] == ("Alai Flats, Flat 01", "21 sqm", "1,500 gold", "auctioned (no bid yet)")
+    assert expand_houses((city, server, rows)) == parse_houses(tibia_houses_html)
+
+
+@pytest.mark.asyncio
+async def test_read_houses_in_process_pool(tibia_houses_html):
+    """Test parsing through a process pool returns the same rows."""
+    mock_response = MagicMock()
+    mock_response.status = 200
+
+    async def mock_text():
+        return tibia_houses_html
+
+    mock_response.text = mock_text
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        houses = await read_houses(mock_response, (403, 429), executor)
+    assert houses == parse_houses(tibia_houses_html)
+
+
 def test_save_houses_to_file(tmp_path):
     """Test saving houses data to a CSV file."""
     houses = [
@@ -350,7 +492,7 @@ async def test_main_successful_execution():
     mock_response1.text = mock_text
     mock_response2.text = mock_text
 
-    mock_cities = ["Thais"]
+    mock_cities = ["Thais", "Venore"]
     mock_servers = ["Antica"]
     mock_houses = [
         {
@@ -362,23 +504,24 @@ async def test_main_successful_execution():
             "server": "Antica",
         }
     ]
+    mock_payload = ("Thais", "Antica", [("House One", "25 sqm", "1000 gold", "rented by")])
+
+    async def mock_as_completed(client, url, form_data, scheduler=None, return_exceptions=False, metrics=None):
+        for form in reversed(form_data):
+            yield form, mock_response2
 
     with patch("tibiahouses.main.create_client", return_value=mock_client):
-        with patch(
-            "tibiahouses.main.fetch_data",
-            side_effect=[
-                [mock_response1],  # First call for cities and servers
-                [mock_response2, mock_response2],  # Multiple responses for houses
-            ],
-        ):
-            with patch("tibiahouses.main.parse_cities", return_value=mock_cities):
-                with patch("tibiahouses.main.parse_servers", return_value=mock_servers):
-                    with patch("tibiahouses.main.parse_houses", return_value=mock_houses):
-                        with patch("tibiahouses.main.save_houses_to_file") as mock_save:
-                            await main("data/houses.csv")
-                            mock_save.assert_called_once_with(
-                                mock_houses + mock_houses, "data/houses.csv"
-                            )
+        with patch("tibiahouses.main.fetch_data", return_value=[mock_response1]):  # cities and servers
+            with patch("tibiahouses.main.fetch_data_as_completed", mock_as_completed):  # one page per town
+                with patch("tibiahouses.main.parse_cities", return_value=mock_cities):
+                    with patch("tibiahouses.main.parse_servers", return_value=mock_servers):
+                        with patch("tibiahouses.main.parse_houses_compact", return_value=mock_payload):
+                            with patch("tibiahouses.main.save_houses_to_file") as mock_save:
+                                await main("data/houses.csv")
+                                mock_save.assert_called_once()
+                                houses, filename = mock_save.call_args.args
+                                assert houses.dicts() == mock_houses + mock_houses
+                                assert filename == "data/houses.csv"
 
 
 @pytest.mark.asyncio
@@ -393,3 +536,72 @@ async def test_main_error_handling():
             with pytest.raises(NotAvailableElementError) as excinfo:
                 await main("data/houses.csv")
             assert "Failed to fetch data, status code: 404" in str(excinfo.value)
+
+
+@pytest.mark.asyncio
+async def test_main_stream_writes_rows_incrementally(tmp_path):
+    """Test streaming mode writes parsed rows without collecting them first."""
+    mock_response = MagicMock()
+    mock_response.status = 200
+
+    async def mock_text():
+        return "mock_html_data"
+
+    mock_response.text = mock_text
+    mock_payload = ("Thais", "Antica", [("House One", "25 sqm", "1000 gold", "rented by")])
+
+    output = tmp_path / "houses.csv"
+    on_disk = []
+
+    async def mock_as_completed(client, url, form_data, scheduler=None, return_exceptions=False, metrics=None):
+        for index, form in enumerate(form_data):
+            if index:
+                on_disk.append(len(output.read_text().splitlines()))
+            yield form, mock_response
+
+    with patch("tibiahouses.main.create_client", return_value=MagicMock()):
+        with patch("tibiahouses.main.fetch_data", return_value=[mock_response]):
+            with patch("tibiahouses.main.fetch_data_as_completed", mock_as_completed):
+                with patch("tibiahouses.main.parse_cities", return_value=["Thais", "Venore"]):
+                    with patch("tibiahouses.main.parse_servers", return_value=["Antica"]):
+                        with patch("tibiahouses.main.parse_houses_compact", return_value=mock_payload):
+                            with patch("tibiahouses.main.save_houses_to_file") as mock_save:
+                                await main(str(output), stream=True)
+                                mock_save.assert_not_called()
+    assert on_disk == [2]  # the first page reached the output before the second arrived
+    df = pd.read_csv(output)
+    assert len(df) == 2
+    assert list(df["name"]) == ["House One", "House One"]
+
+
+@pytest.mark.asyncio
+async def test_main_parses_pages_while_fetching_and_keeps_plan_order(tmp_path):
+    """Test pages are parsed as they arrive without --stream and saved in the order of the plan."""
+    events = []
+
+    def make_response(town):
+        response = MagicMock()
+        response.status = 200
+
+        async def text():
+            return town
+
+        response.text = text
+        return response
+
+    async def mock_as_completed(client, url, form_data, scheduler=None, return_exceptions=False, metrics=None):
+        for form in reversed(form_data):
+            events.append(("fetched", dict(form)["town"]))
+            yield form, make_response(dict(form)["town"])
+
+    def mock_parse(town):
+        events.append(("parsed", town))
+        return town, "Antica", [(f"{town} House", "25 sqm", "1000 gold", "rented by")]
+
+    output = tmp_path / "houses.csv"
+    with patch("tibiahouses.main.create_client", return_value=MagicMock()):
+        with patch("tibiahouses.main.fetch_data_as_completed", mock_as_completed):
+            with patch("tibiahouses.main.parse_houses_compact", mock_parse):
+                await main(str(output), plan=CrawlPlan(worlds=["Antica"], towns=["Thais", "Venore", "Carlin"]))
+    assert events.index(("parsed", "Carlin")) < events.index(("fetched", "Thais"))
+    assert list(pd.read_csv(output)["city"]) == ["Thais", "Venore", "Carlin"]
@@ -0,0 +1,119 @@
+import sys
+import os
+
+# Add src directory to sys.path for proper imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+# Repository root, for the mock server
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import io
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from benchmarks.mock_server import MockTibiaServer
+from tibiahouses.main import main_cli
+from tibiahouses.metrics import CrawlMetrics
+from tibiahouses.scheduler import RequestScheduler
+
+
+def record_crawl(metrics, form):
+    metrics.start(2)
+    metrics.attempt(None, 200, 0.2)
+    metrics.attempt(form("Antica", "Thais"), 403, 0.1)
+    metrics.attempt(form("Antica", "Thais"), 200, 0.3)
+    metrics.read(form("Antica", "Thais"), 2048, 0.01)
+    metrics.parsed(form("Antica", "Thais"), 12, 0.004)
+    metrics.done(form("Antica", "Thais"))
+    metrics.attempt(form("Bona", "Venore"), 500, 1.5)
+    metrics.done(form("Bona", "Venore"), "status code: 500")
+
+
+def test_metrics_summary_counts_requests_pages_and_rows(form):
+    metrics = CrawlMetrics()
+    record_crawl(metrics, form)
+    summary = metrics.summary()
+    assert summary["requests"] == 4
+    assert summary["statuses"] == {"200": 2, "403": 1, "500": 1}
+    assert summary["throttled"] == 1
+    assert summary["retries"] == 1
+    assert summary["bytes"] == 2048
+    assert summary["pages"] == 2
+    assert summary["pages_failed"] == 1
+    assert summary["rows"] == 12
+    assert summary["latency_seconds"]["max"] == 1.5
+    assert summary["parse_seconds_per_page"] == pytest.approx(0.004)
+    assert summary["stage_seconds"]["request"] == pytest.approx(2.1)
+    thais = metrics.units["world=Antica&town=Thais&state=auctioned&type=houses"]
+    assert (thais["attempts"], thais["status"], thais["rows"]) == (2, 200, 12)
+
+
+def test_metrics_prometheus_export(form):
+    metrics = CrawlMetrics()
+    record_crawl(metrics, form)
+    text = metrics.to_prometheus()
+    assert "# TYPE tibiahouses_requests_total counter" in text
+    assert 'tibiahouses_requests_total{status="403"} 1' in text
+    assert 'tibiahouses_request_duration_seconds_bucket{le="0.25"} 2' in text
+    assert 'tibiahouses_request_duration_seconds_bucket{le="+Inf"} 4' in text
+    assert "tibiahouses_request_duration_seconds_count 4" in text
+    assert 'tibiahouses_world_request_seconds_total{world="Bona"} 1.5' in text
+    assert 'tibiahouses_pages_total{result="failed"} 1' in text
+    assert "tibiahouses_rows_total 12" in text
+
+
+def test_metrics_save_picks_format_from_extension(tmp_path, form):
+    metrics = CrawlMetrics()
+    record_crawl(metrics, form)
+    metrics.save(str(tmp_path / "metrics.prom"))
+    metrics.save(str(tmp_path / "out" / "metrics.json"))
+    assert (tmp_path / "metrics.prom").read_text().startswith("# HELP")
+    data = json.loads((tmp_path / "out" / "metrics.json").read_text())
+    assert data["summary"]["rows"] == 12
+    assert [unit["unit"] for unit in data["units"]][0] == "bootstrap"
+
+
+def test_metrics_progress_line(form):
+    stream = io.StringIO()
+    metrics = CrawlMetrics(progress=stream, refresh=0)
+    record_crawl(metrics, form)
+    metrics.finish()
+    lines = stream.getvalue().split("\r")
+    assert lines[-1].startswith("[2/2] 12 rows")
+    assert "1 throttled, 1 failed" in lines[-1]
+    assert lines[-1].endswith("\n")
+
+
+@pytest.mark.asyncio
+async def test_timed_send_records_failed_attempts(form):
+    metrics = CrawlMetrics()
+
+    async def send():
+        raise ConnectionError("reset")
+
+    with pytest.raises(ConnectionError):
+        await metrics.timed(send, form("Antica", "Thais"))()
+    response = MagicMock(status=200)
+
+    async def answer():
+        return response
+
+    assert await metrics.timed(answer)() is response
+    assert metrics.statuses == {0: 1, 200: 1}
+
+
+@pytest.mark.asyncio
+async def test_main_cli_records_metrics_against_mock_server(tmp_path):
+    metrics = CrawlMetrics()
+    scheduler = RequestScheduler(rate=1000.0, max_retries=10, backoff_base=0.001)
+    with MockTibiaServer(worlds=2, towns=3, houses=5, throttle_rate=0.3, seed=1) as server:
+        await main_cli(str(tmp_path / "houses.csv"), scheduler=scheduler, url=server.url, metrics=metrics)
+        stats = server.stats()
+    summary = metrics.summary()
+    assert summary["requests"] == stats["requests"]
+    assert summary["throttled"] == stats["throttled"] > 0
+    assert summary["pages"] == 6
+    assert summary["pages_failed"] == 0
+    assert summary["bytes"] > 0
+    assert summary["stage_seconds"]["save"] > 0
+    assert summary["rows"] == sum(1 for _ in open(tmp_path / "houses.csv")) - 1
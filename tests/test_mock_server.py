@@ -0,0 +1,48 @@
+import sys
+import os
+
+# Add src directory to sys.path for proper imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+# Repository root, for the benchmark page generators and mock server
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+
+import pandas as pd
+import pytest
+from benchmarks.mock_server import MockTibiaServer
+from tibiahouses.main import main_cli
+from tibiahouses.scheduler import RequestScheduler
+
+
+@pytest.fixture(scope="module")
+def reference_rows(tmp_path_factory):
+    """Rows of a clean crawl of the mock server."""
+    output = tmp_path_factory.mktemp("reference") / "houses.csv"
+    with MockTibiaServer(worlds=3, towns=4, houses=10) as server:
+        asyncio.run(main_cli(str(output), url=server.url))
+        stats = server.stats()
+    assert stats["pages"] == 12
+    return pd.read_csv(output)
+
+
+@pytest.mark.asyncio
+async def test_crawl_mock_server_end_to_end(reference_rows, tmp_path):
+    assert set(reference_rows["server"]) == {"Antica", "Astera", "Bona"}
+    assert reference_rows["city"].nunique() == 4
+    assert reference_rows["size"].str.endswith(" sqm").all()
+
+
+@pytest.mark.asyncio
+async def test_crawl_recovers_from_injected_throttling(reference_rows, tmp_path):
+    output = tmp_path / "houses.csv"
+    scheduler = RequestScheduler(rate=1000.0, max_retries=10, backoff_base=0.001)
+    with MockTibiaServer(worlds=3, towns=4, houses=10, throttle_rate=0.3, seed=0) as server:
+        await main_cli(str(output), scheduler=scheduler, stream=True, url=server.url)
+        stats = server.stats()
+    assert stats["throttled"] > 0
+    streamed = pd.read_csv(output)
+    key = ["server", "city", "name"]
+    assert streamed.sort_values(key).reset_index(drop=True).equals(
+        reference_rows.sort_values(key).reset_index(drop=True)
+    )
@@ -0,0 +1,88 @@
+import sys
+import os
+
+# Add src directory to sys.path for proper imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import pandas as pd
+import pytest
+from tibiahouses.main import save_houses_to_file
+from tibiahouses.normalize import normalize_houses, parse_amounts
+
+CRAWLED_AT = pd.Timestamp("2026-01-01 12:00", tz="UTC")
+HOUSES = pd.DataFrame(
+    [
+        {
+            "name": "Alai Flats, Flat 01",
+            "size": "1,120 sqm",
+            "rent": "1,500 gold",
+            "status": "auctioned (no bid yet)",
+            "city": "Thais",
+            "server": "Antica",
+        },
+        {
+            "name": "Upper Swamp Lane 8",
+            "size": "120 sqm",
+            "rent": "8k gold",
+            "status": "auctioned (12,345 gold; 5 hours left)",
+            "city": "Thais",
+            "server": "Antica",
+        },
+        {
+            "name": "Harbour Place 2",
+            "size": "45 sqm",
+            "rent": "2kk gold",
+            "status": "auctioned (3k gold; 2 days left)",
+            "city": "Venore",
+            "server": "Secura",
+        },
+        {
+            "name": "Mill Avenue 1",
+            "size": "20 sqm",
+            "rent": "500 gold",
+            "status": "rented",
+            "city": "Venore",
+            "server": "Secura",
+        },
+    ]
+)
+
+
+def test_parse_amounts_handles_separators_and_suffixes():
+    amounts = parse_amounts(pd.Series(["1,234 gold", "1.5k gold", "2kk gold", "no bid"], dtype="string"))
+    assert amounts.tolist() == [1234, 1500, 2000000, pd.NA]
+
+
+def test_normalize_houses_types_columns():
+    normalized = normalize_houses(HOUSES, CRAWLED_AT)
+    assert normalized["size_sqm"].tolist() == [1120, 120, 45, 20]
+    assert normalized["rent_gold"].tolist() == [1500, 8000, 2000000, 500]
+    assert normalized["state"].tolist() == ["auctioned", "auctioned", "auctioned", "rented"]
+    assert normalized["bid_gold"].tolist() == [pd.NA, 12345, 3000, pd.NA]
+    assert normalized["time_left"].iloc[1] == pd.Timedelta(hours=5)
+    assert normalized["auction_end"].iloc[2] == pd.Timestamp("2026-01-03 12:00", tz="UTC")
+    assert pd.isna(normalized["auction_end"].iloc[3])
+    assert isinstance(normalized["state"].dtype, pd.CategoricalDtype)
+    assert isinstance(normalized["server"].dtype, pd.CategoricalDtype)
+    assert str(normalized["size_sqm"].dtype) == "Int32"
+
+
+def test_normalize_houses_supports_numeric_filtering():
+    normalized = normalize_houses(HOUSES, CRAWLED_AT)
+    cheap = normalized[(normalized["size_sqm"] > 100) & (normalized["state"] == "auctioned")]
+    assert cheap["name"].tolist() == ["Alai Flats, Flat 01", "Upper Swamp Lane 8"]
+
+
+def test_normalize_houses_keep_raw_columns():
+    normalized = normalize_houses(HOUSES, CRAWLED_AT, keep_raw=True)
+    assert list(normalized.columns[:4]) == ["name", "size", "rent", "status"]
+    assert normalized["status"].iloc[1] == "auctioned (12,345 gold; 5 hours left)"
+
+
+def test_normalized_houses_round_trip_through_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    dataset = tmp_path / "houses.parquet"
+    save_houses_to_file(normalize_houses(HOUSES, CRAWLED_AT, keep_raw=True), str(dataset))
+    df = pd.read_parquet(dataset, filters=[("server", "==", "Secura")])
+    assert sorted(df["rent_gold"].tolist()) == [500, 2000000]
+    assert str(df["size_sqm"].dtype) == "Int32"
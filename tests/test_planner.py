@@ -0,0 +1,77 @@
+import sys
+import os
+
+# Add src directory to sys.path for proper imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from tibiahouses.main import main_cli
+from tibiahouses.planner import CrawlPlan
+
+WORLDS = ["Antica", "Secura", "Bona"]
+TOWNS = ["Thais", "Venore", "Liberty Bay"]
+
+
+def test_default_plan_is_every_world_and_town_for_auctioned_houses():
+    plan = CrawlPlan()
+    assert plan.needs_bootstrap
+    forms = plan.forms(WORLDS, TOWNS)
+    assert len(forms) == 9
+    assert forms[0] == [("world", "Antica"), ("town", "Thais"), ("state", "auctioned"), ("type", "houses"), ("order", "")]
+
+
+def test_plan_filters_worlds_states_and_types():
+    plan = CrawlPlan(worlds=["secura"], states=["all", "rented"], types=["guildhalls"])
+    forms = plan.forms(WORLDS, TOWNS)
+    assert len(forms) == 6
+    assert {dict(form)["world"] for form in forms} == {"Secura"}
+    assert {dict(form)["state"] for form in forms} == {"", "rented"}
+    assert {dict(form)["type"] for form in forms} == {"guildhalls"}
+
+
+def test_plan_with_worlds_and_towns_skips_bootstrap():
+    plan = CrawlPlan(worlds=["Antica"], towns=["Thais", "Liberty Bay"])
+    assert not plan.needs_bootstrap
+    assert [dict(form)["town"] for form in plan.forms()] == ["Thais", "Liberty Bay"]
+
+
+def test_plan_rejects_unknown_names():
+    with pytest.raises(ValueError, match="unknown world: Atlantis"):
+        CrawlPlan(worlds=["Atlantis"]).forms(WORLDS, TOWNS)
+    with pytest.raises(ValueError):
+        CrawlPlan(states=["sold"])
+    with pytest.raises(ValueError):
+        CrawlPlan(types=["castles"])
+
+
+@pytest.mark.asyncio
+async def test_main_cli_targeted_plan_fetches_only_needed_forms(tmp_path):
+    requested = []
+
+    async def fake_fetch(client, url, form_data, scheduler=None, return_exceptions=False, metrics=None):
+        requested.extend(form_data)
+        response = MagicMock()
+        response.status = 200
+
+        async def text():
+            return "page"
+
+        response.text = text
+        for form in form_data:
+            yield form, response
+
+    plan = CrawlPlan(worlds=["Antica", "Secura"], towns=["Thais"], types=["houses", "guildhalls"])
+    with patch("tibiahouses.main.create_client", return_value=MagicMock()):
+        with patch("tibiahouses.main.fetch_data", side_effect=AssertionError("bootstrap page should not be fetched")):
+            with patch("tibiahouses.main.fetch_data_as_completed", fake_fetch):
+                with patch("tibiahouses.main.parse_houses_compact", return_value=("Thais", "Antica", [])):
+                    with patch("tibiahouses.main.save_houses_to_file"):
+                        await main_cli(str(tmp_path / "houses.csv"), plan=plan)
+    assert [(dict(form)["world"], dict(form)["type"]) for form in requested] == [
+        ("Antica", "houses"),
+        ("Antica", "guildhalls"),
+        ("Secura", "houses"),
+        ("Secura", "guildhalls"),
+    ]
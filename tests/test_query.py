@@ -0,0 +1,115 @@
+import sys
+import os
+
+# Add src directory to sys.path for proper imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+# Repository root, for the synthetic pages
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+import zlib
+
+import pandas as pd
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from benchmarks.pages import make_houses
+from tibiahouses.main import save_houses_to_file
+from tibiahouses.normalize import normalize_houses
+from tibiahouses.query import HouseIndex
+from tibiahouses.rows import HouseBatch, HouseTable
+from tibiahouses.server import build_app
+
+
+def snapshot(worlds=("Antica", "Secura"), towns=("Thais", "Venore", "Carlin"), houses=40, seed=0) -> HouseTable:
+    table = HouseTable()
+    for world in worlds:
+        for number, town in enumerate(towns):
+            unit_seed = zlib.crc32(f"{seed}/{world}/{town}".encode())
+            rows = make_houses(houses, seed=unit_seed, first_id=10000 + 1000 * number)
+            rows = [tuple(value.replace("\xa0", " ") for value in row[1:]) for row in rows]
+            table.append(HouseBatch(town, world, rows))
+    return table
+
+
+def brute_force(frame: pd.DataFrame, sort: str, descending: bool, **filters) -> list[str]:
+    """The same query the way a bot would answer it with pandas."""
+    matches = frame
+    for key in ("server", "city", "state"):
+        if key in filters:
+            matches = matches[matches[key].astype(str).str.lower() == filters[key].lower()]
+    for name, column in (("size", "size_sqm"), ("rent", "rent_gold"), ("bid", "bid_gold")):
+        if f"min_{name}" in filters:
+            matches = matches[matches[column] >= filters[f"min_{name}"]]
+        if f"max_{name}" in filters:
+            matches = matches[matches[column] <= filters[f"max_{name}"]]
+    column = {"size": "size_sqm", "rent": "rent_gold", "bid": "bid_gold"}[sort]
+    matches = matches.assign(row=range(len(matches))).sort_values(
+        [column, "row"], ascending=[not descending, True], na_position="last", kind="stable"
+    )
+    return [f"{row.server}/{row.city}/{row.name}" for row in matches.itertuples()]
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {},
+        {"server": "antica"},
+        {"server": "Antica", "city": "Thais", "state": "auctioned", "min_size": 100},
+        {"state": "auctioned", "min_size": 100},
+        {"min_bid": 100000, "max_bid": 500000},
+        {"city": "Venore", "max_rent": 20000},
+        {"state": "rented", "min_bid": 1},
+    ],
+)
+@pytest.mark.parametrize("sort,descending", [("rent", False), ("size", True), ("bid", True), ("bid", False)])
+def test_query_matches_pandas(filters, sort, descending):
+    houses = pd.DataFrame(snapshot().columns())
+    index = HouseIndex(houses)
+    frame = normalize_houses(houses, keep_raw=True).reset_index(drop=True)
+    expected = brute_force(frame, sort, descending, **filters)
+    count, rows = index.query(sort=sort, descending=descending, limit=len(houses), **filters)
+    assert count == len(expected)
+    assert [f"{row['server']}/{row['city']}/{row['name']}" for row in rows] == expected
+    count, page = index.query(sort=sort, descending=descending, limit=5, offset=3, **filters)
+    assert page == rows[3:8]
+
+
+def test_query_rejects_unknown_values_and_sorts():
+    index = HouseIndex(pd.DataFrame(snapshot().columns()))
+    assert index.query(server="Nowhere") == (0, [])
+    assert index.values("server") == ["Antica", "Secura"]
+    with pytest.raises(ValueError):
+        index.query(sort="name")
+
+
+@pytest.mark.asyncio
+async def test_server_answers_queries_and_reloads_new_crawls(tmp_path):
+    path = str(tmp_path / "houses.csv")
+    save_houses_to_file(snapshot(worlds=("Antica",)), path)
+    client = TestClient(TestServer(build_app(path, reload_interval=0.02)))
+    await client.start_server()
+    try:
+        query = {"city": "thais", "state": "auctioned", "sort": "size", "limit": "1000"}
+        response = await client.get("/houses", params=query)
+        body = await response.json()
+        assert response.status == 200
+        assert body["count"] == len(body["houses"]) > 0
+        assert [house["size_sqm"] for house in body["houses"]] == sorted(house["size_sqm"] for house in body["houses"])
+        assert {house["server"] for house in body["houses"]} == {"Antica"}
+
+        response = await client.get("/houses", params={"sort": "name"})
+        assert response.status == 400
+        response = await client.get("/houses", params={"min_size": "big"})
+        assert response.status == 400
+
+        save_houses_to_file(snapshot(worlds=("Antica", "Secura")), path)
+        for _ in range(200):
+            status = await (await client.get("/status")).json()
+            if status["reloads"]:
+                break
+            await asyncio.sleep(0.01)
+        assert status["servers"] == ["Antica", "Secura"]
+        body = await (await client.get("/houses", params={"server": "Secura"})).json()
+        assert body["count"] > 0
+    finally:
+        await client.close()
@@ -0,0 +1,83 @@
+import sys
+import os
+
+# Add src directory to sys.path for proper imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+from tibiahouses.delta import DeltaTracker
+from tibiahouses.history import HistoryStore
+from tibiahouses.main import normalized_frame, save_houses_to_file
+from tibiahouses.rows import HouseBatch, HouseTable
+
+THAIS = HouseBatch(
+    "Thais",
+    "Antica",
+    [("House One", "25 sqm", "1,000 gold", "auctioned (no bid yet)"), ("House Two", "35 sqm", "1,500 gold", "rented")],
+)
+VENORE = HouseBatch("Venore", "Secura", [("House Three", "50 sqm", "2,000 gold", "rented")])
+
+
+def test_batch_shares_interned_city_and_server():
+    batch = HouseBatch("".join(["Tha", "is"]), "Antica", [])
+    assert batch.city is THAIS.city
+    assert not hasattr(batch, "__dict__")
+    assert THAIS.dicts()[1] == {
+        "name": "House Two",
+        "size": "35 sqm",
+        "rent": "1,500 gold",
+        "status": "rented",
+        "city": "Thais",
+        "server": "Antica",
+    }
+    assert HouseBatch.from_dicts(THAIS.dicts()) == THAIS
+    with pytest.raises(ValueError):
+        HouseBatch.from_dicts(THAIS.dicts() + VENORE.dicts())
+
+
+def test_table_columns():
+    table = HouseTable([THAIS, VENORE])
+    assert len(table) == 3
+    columns = table.columns()
+    assert columns["name"] == ["House One", "House Two", "House Three"]
+    assert columns["server"] == ["Antica", "Antica", "Secura"]
+    assert pd.DataFrame(columns).to_dict("records") == table.dicts()
+
+
+def test_save_table_matches_dict_rows(tmp_path):
+    table = HouseTable([THAIS, VENORE])
+    save_houses_to_file(table.dicts(), str(tmp_path / "dicts.csv"))
+    save_houses_to_file(table, str(tmp_path / "table.csv"))
+    assert (tmp_path / "table.csv").read_bytes() == (tmp_path / "dicts.csv").read_bytes()
+
+
+def test_save_table_to_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    dataset = tmp_path / "houses.parquet"
+    save_houses_to_file(HouseTable([THAIS, VENORE]), str(dataset))
+    df = pd.read_parquet(dataset).sort_values("name")
+    assert list(df["name"]) == ["House One", "House Three", "House Two"]
+    assert list(df["server"].astype(str)) == ["Antica", "Secura", "Antica"]
+
+
+def test_normalized_frame_from_table():
+    frame = normalized_frame(HouseTable([THAIS, VENORE]), datetime(2024, 1, 1, tzinfo=timezone.utc))
+    assert list(frame["size_sqm"]) == [25, 35, 50]
+    assert list(frame["city"].astype(str)) == ["Thais", "Thais", "Venore"]
+
+
+def test_delta_and_history_take_batches(tmp_path):
+    previous = {("Antica", "Thais", "House One"): THAIS.dicts()[0] | {"status": "rented"}}
+    from_dicts, from_batch = DeltaTracker(dict(previous)), DeltaTracker(dict(previous))
+    assert from_batch.update_batch(THAIS, ("Antica", "Thais")) == from_dicts.update(THAIS.dicts(), ("Antica", "Thais"))
+    assert [change["change"] for change in from_batch.changes] == ["changed", "inserted"]
+
+    with HistoryStore(str(tmp_path / "history.sqlite")) as store:
+        with store.run(datetime(2024, 1, 1, tzinfo=timezone.utc)) as run:
+            run.add_batch(THAIS)
+            run.add_batch(VENORE)
+        assert store.runs()[0]["houses"] == 3
+        assert [row["name"] for row in store.history("Antica", "Thais")] == ["House One", "House Two"]
@@ -0,0 +1,137 @@
+import sys
+import os
+
+# Add src directory to sys.path for proper imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from tibiahouses.main import fetch_data
+from tibiahouses.scheduler import RequestScheduler
+
+
+def make_response(status):
+    response = MagicMock()
+    response.status = status
+    return response
+
+
+class FakeClient:
+    """Client that answers with queued statuses and tracks concurrency."""
+
+    def __init__(self, statuses=None, delay=0.0):
+        self.statuses = list(statuses or [])
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = []
+
+    async def _send(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        status = self.statuses.pop(0) if self.statuses else 200
+        response = make_response(status)
+        response.form = kwargs.get("form")
+        return response
+
+    async def get(self, url):
+        return await self._send(url)
+
+    async def post(self, url, form=None):
+        return await self._send(url, form=form)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_caps_in_flight_requests():
+    client = FakeClient(delay=0.01)
+    scheduler = RequestScheduler(max_in_flight=3, rate=1000.0)
+    forms = [[("world", str(i))] for i in range(12)]
+    responses = await fetch_data(client, ["https://example.com"], forms, scheduler=scheduler)
+    assert client.peak == 3
+    assert [response.form for response in responses] == forms
+
+
+@pytest.mark.asyncio
+async def test_scheduler_retries_throttled_requests():
+    client = FakeClient(statuses=[429, 403, 200])
+    scheduler = RequestScheduler(rate=1000.0, backoff_base=0.001)
+    responses = await fetch_data(client, ["https://example.com"], scheduler=scheduler)
+    assert responses[0].status == 200
+    assert len(client.calls) == 3
+    assert scheduler.retries == 2
+
+
+@pytest.mark.asyncio
+async def test_scheduler_returns_last_response_after_max_retries():
+    client = FakeClient(statuses=[403] * 10)
+    scheduler = RequestScheduler(rate=1000.0, max_retries=2, backoff_base=0.001)
+    responses = await fetch_data(client, ["https://example.com"], scheduler=scheduler)
+    assert responses[0].status == 403
+    assert len(client.calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_scheduler_paces_with_token_bucket():
+    client = FakeClient()
+    scheduler = RequestScheduler(max_in_flight=10, rate=50.0, burst=1)
+    start = time.monotonic()
+    await fetch_data(client, ["https://example.com"] * 6, scheduler=scheduler)
+    # One token up front, then five more at 50/s.
+    assert time.monotonic() - start >= 0.09
+
+
+def test_scheduler_backs_off_rate_when_throttled():
+    scheduler = RequestScheduler(rate=8.0)
+    scheduler._throttled()
+    scheduler._throttled()
+    assert scheduler.rate == 2.0
+    for _ in range(100):
+        scheduler._succeeded()
+    assert scheduler.rate == 8.0
+
+
+def test_scheduler_rejects_invalid_limits():
+    with pytest.raises(ValueError):
+        RequestScheduler(max_in_flight=0)
+    with pytest.raises(ValueError):
+        RequestScheduler(rate=0)
+
+
+@pytest.mark.asyncio
+async def test_as_completed_yields_in_completion_order():
+    delays = [0.03, 0.0, 0.01]
+
+    def send(index):
+        async def run():
+            await asyncio.sleep(delays[index])
+            return make_response(200)
+
+        return run
+
+    scheduler = RequestScheduler(rate=1000.0)
+    order = [index async for index, _ in scheduler.as_completed(send(i) for i in range(3))]
+    assert order == [1, 2, 0]
+
+
+@pytest.mark.asyncio
+async def test_as_completed_bounds_scheduled_requests():
+    started = []
+
+    def send(index):
+        async def run():
+            started.append(index)
+            return make_response(200)
+
+        return run
+
+    scheduler = RequestScheduler(max_in_flight=2, rate=1000.0)
+    iterator = scheduler.as_completed(send(i) for i in range(50))
+    await iterator.__anext__()
+    assert len(started) <= 4
+    await iterator.aclose()
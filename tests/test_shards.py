@@ -0,0 +1,89 @@
+import sys
+import os
+
+# Add src directory to sys.path for proper imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+# Repository root, for the mock server
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from benchmarks.mock_server import MockTibiaServer
+from tibiahouses.main import main_cli
+from tibiahouses.planner import CrawlPlan
+from tibiahouses.rows import HouseBatch, HouseTable
+from tibiahouses.scheduler import RequestScheduler
+from tibiahouses.shards import ShardQueue, merge_parts, shard_cli, shard_plans, split_worlds
+from tibiahouses.writers import CsvHouseWriter
+
+
+def test_split_worlds_keeps_order():
+    worlds = ["Antica", "Bona", "Celesta", "Dolera", "Secura"]
+    assert split_worlds(worlds, 2) == [["Antica", "Bona", "Celesta"], ["Dolera", "Secura"]]
+    assert split_worlds(worlds, 10) == [[world] for world in worlds]
+    assert sum(split_worlds(worlds, 3), []) == worlds
+    with pytest.raises(ValueError):
+        split_worlds(worlds, 0)
+
+
+def test_shard_plans_need_no_bootstrap():
+    plan = CrawlPlan(states=["all"])
+    forms = plan.forms(["Antica", "Bona", "Secura"], ["Thais", "Venore"])
+    plans = shard_plans(plan, forms, 2)
+    assert not any(shard.needs_bootstrap for shard in plans)
+    assert sum((shard.forms() for shard in plans), []) == forms
+
+
+def test_queue_claims_retries_and_merges_in_shard_order(tmp_path):
+    plans = [CrawlPlan(worlds=[world], towns=["Thais"]) for world in ("Antica", "Bona")]
+    with ShardQueue(str(tmp_path), max_attempts=2) as queue:
+        queue.reset(plans, {"url": "http://localhost/", "scheduler": {"rate": 2.0}})
+        assert queue.settings() == {"url": "http://localhost/", "scheduler": {"rate": 2.0}}
+        shard, plan = queue.claim("a")
+        assert (shard, plan.worlds) == (0, ["Antica"])
+        assert queue.claim("b")[0] == 1
+        assert queue.claim("c") is None
+        assert queue.release(0, "a", "1 of 1 pages failed")
+        assert queue.claim("c")[0] == 0
+        assert not queue.release(0, "c", "1 of 1 pages failed")  # out of attempts
+        assert not queue.complete(0, "a")  # no longer a's shard
+        for shard, worker, world in ((1, "b", "Bona"), (0, "c", "Antica")):
+            with CsvHouseWriter(queue.part_path(shard)) as writer:
+                writer.write_batch(HouseBatch("Thais", world, [(f"{world} house", "25 sqm", "1 gold", "rented")]))
+            assert queue.complete(shard, worker, "1 of 1 pages failed" if shard == 0 else None)
+        assert queue.finished()
+        assert queue.errors() == [(0, "1 of 1 pages failed")]
+        merged = merge_parts(queue.parts())
+    assert isinstance(merged, HouseTable)
+    assert [batch.server for batch in merged.batches] == ["Antica", "Bona"]
+
+
+def test_abandoned_claims_are_taken_over(tmp_path):
+    with ShardQueue(str(tmp_path), lease=0.0) as queue:
+        queue.reset([CrawlPlan(worlds=["Antica"], towns=["Thais"])], {})
+        assert queue.claim("a")[0] == 0
+        assert queue.claim("b")[0] == 0
+        assert queue.release_worker("b") == 1
+        assert queue.counts()["pending"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sharded_crawl_matches_single_process(tmp_path):
+    single, sharded = tmp_path / "single.csv", tmp_path / "sharded.csv"
+    plan = CrawlPlan(states=["all"])
+    with MockTibiaServer(worlds=5, towns=3, houses=5) as server:
+        await main_cli(str(single), scheduler=RequestScheduler(rate=1000.0), plan=plan, url=server.url)
+        with ShardQueue(str(tmp_path / "queue")) as queue:
+            await shard_cli(
+                str(sharded),
+                queue,
+                workers=2,
+                shards=3,
+                scheduler_options={"rate": 1000.0},
+                plan=plan,
+                url=server.url,
+                poll=0.05,
+            )
+            assert queue.counts() == {"pending": 0, "claimed": 0, "done": 3}
+        stats = server.stats()
+    assert stats["pages"] == 2 * 15
+    assert sharded.read_bytes() == single.read_bytes()
@@ -0,0 +1,164 @@
+import sys
+import os
+
+# Add src directory to sys.path for proper imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+# Repository root, for the mock server
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import signal
+import sqlite3
+from contextlib import closing
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from benchmarks.mock_server import MockTibiaServer
+from tibiahouses import watch as tibiahouses_watch
+from tibiahouses.aggregates import aggregate_paths, town_fingerprints
+from tibiahouses.cache import ResponseCache
+from tibiahouses.history import HistoryStore
+from tibiahouses.rows import HouseBatch
+from tibiahouses.scheduler import RequestScheduler
+from tibiahouses.watch import RefreshSchedule, refresh_interval, soonest_auction_end, watch_cli
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_refresh_interval_backs_off_and_tightens_near_auction_end():
+    assert refresh_interval(60, True, None, 0, 60, 3600) == 60
+    assert refresh_interval(600, False, None, 0, 60, 3600) == 1200
+    assert refresh_interval(3000, False, None, 0, 60, 3600) == 3600
+    assert refresh_interval(3000, False, 1000.0, 0, 60, 3600) == 500
+    assert refresh_interval(3000, False, 30.0, 0, 60, 3600) == 60
+
+
+def test_schedule_orders_units_by_due_time(form):
+    clock = Clock()
+    schedule = RefreshSchedule([form("Antica", "Thais"), form("Antica", "Venore")], 60, 3600, clock)
+    assert schedule.due() == [form("Antica", "Thais"), form("Antica", "Venore")]
+    assert schedule.due() == []
+    assert schedule.reschedule(form("Antica", "Thais"), changed=True) == 60
+    assert schedule.reschedule(form("Antica", "Venore"), changed=False) == 120
+    assert schedule.wait() == 60
+    clock.now += 60
+    assert schedule.due() == [form("Antica", "Thais")]
+    schedule.retry(form("Antica", "Thais"))
+    clock.now += 60
+    assert schedule.due() == [form("Antica", "Thais"), form("Antica", "Venore")]
+
+
+def test_schedule_rejects_bad_intervals():
+    with pytest.raises(ValueError):
+        RefreshSchedule([], min_interval=600, max_interval=60)
+
+
+def test_soonest_auction_end():
+    crawled_at = pd.Timestamp("2024-01-01", tz="UTC")
+    rows = [
+        ("A", "25 sqm", "1,000 gold", "rented"),
+        ("B", "40 sqm", "2,000 gold", "auctioned (12,345 gold; 5 hours left)"),
+    ]
+    houses = HouseBatch("Thais", "Antica", rows)
+    assert soonest_auction_end(houses, crawled_at) == (crawled_at + pd.Timedelta(hours=5)).timestamp()
+    assert soonest_auction_end(HouseBatch("Thais", "Antica", rows[:1]), crawled_at) is None
+    assert soonest_auction_end(HouseBatch("Thais", "Antica", []), crawled_at) is None
+
+
+@pytest.mark.asyncio
+async def test_watch_reuses_one_client_and_refreshes_due_units(tmp_path):
+    output = tmp_path / "houses.csv"
+    scheduler = RequestScheduler(rate=1000.0)
+    create_client = tibiahouses_watch.create_client
+    with MockTibiaServer(worlds=2, towns=2, houses=5) as server:
+        with patch("tibiahouses.watch.create_client", side_effect=create_client) as factory:
+            with HistoryStore(str(tmp_path / "history.sqlite")) as history:
+                await watch_cli(
+                    str(output),
+                    scheduler=scheduler,
+                    url=server.url,
+                    min_interval=0.05,
+                    max_interval=1.0,
+                    history=history,
+                    cycles=2,
+                )
+                runs = history.runs()
+        stats = server.stats()
+    factory.assert_called_once()
+    assert stats["pages"] == 8
+    assert len(runs) == 2
+    assert runs[0]["houses"] == runs[1]["houses"] == len(pd.read_csv(output))
+
+
+@pytest.mark.asyncio
+async def test_watch_commits_and_evicts_the_cache_every_cycle(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    with MockTibiaServer(worlds=2, towns=2, houses=5) as server:
+        with ResponseCache(path, max_entries=3) as cache:
+            await watch_cli(
+                str(tmp_path / "houses.csv"),
+                scheduler=RequestScheduler(rate=1000.0),
+                url=server.url,
+                cache=cache,
+                cycles=1,
+            )
+            # Another connection only sees committed rows.
+            with closing(sqlite3.connect(path)) as connection:
+                assert connection.execute("SELECT COUNT(*) FROM pages").fetchone()[0] == 3
+
+
+@pytest.mark.asyncio
+async def test_watch_updates_the_aggregates_of_the_changed_towns_only(tmp_path):
+    output = tmp_path / "houses.csv"
+    with MockTibiaServer(worlds=2, towns=2, houses=5) as server:
+        with patch("tibiahouses.aggregates.town_fingerprints", side_effect=town_fingerprints) as fingerprints:
+            await watch_cli(
+                str(output),
+                scheduler=RequestScheduler(rate=1000.0),
+                url=server.url,
+                min_interval=0.05,
+                max_interval=1.0,
+                aggregates=True,
+                cycles=2,
+            )
+    # The second cycle knows nothing changed and fingerprints nothing.
+    fingerprints.assert_called_once()
+    towns = pd.read_csv(aggregate_paths(str(output))["towns"])
+    assert towns["houses"].sum() == len(pd.read_csv(output))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("signum", [signal.SIGINT, signal.SIGTERM])
+async def test_watch_stops_after_the_current_cycle_on_a_signal(tmp_path, signum):
+    output = tmp_path / "houses.csv"
+    read_batch = tibiahouses_watch.read_batch
+
+    async def interrupted(*args):
+        if not interrupted.sent:
+            interrupted.sent = True
+            os.kill(os.getpid(), signum)
+        return await read_batch(*args)
+
+    interrupted.sent = False
+    with MockTibiaServer(worlds=2, towns=2, houses=5) as server:
+        with patch("tibiahouses.watch.read_batch", side_effect=interrupted):
+            with HistoryStore(str(tmp_path / "history.sqlite")) as history:
+                await watch_cli(
+                    str(output),
+                    scheduler=RequestScheduler(rate=1000.0),
+                    url=server.url,
+                    min_interval=0.05,
+                    max_interval=1.0,
+                    history=history,
+                )
+                runs = history.runs()
+    # The signal arrived with the first page, and the cycle still finished and was saved.
+    assert len(runs) == 1
+    assert runs[0]["houses"] == len(pd.read_csv(output))
+    assert signal.getsignal(signal.SIGINT) is signal.default_int_handler
@@ -0,0 +1,113 @@
+import sys
+import os
+
+# Add src directory to sys.path for proper imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import pandas as pd
+import pytest
+from tibiahouses.main import save_houses_to_file
+from tibiahouses.rows import HouseBatch
+from tibiahouses.writers import CsvHouseWriter, ParquetHouseWriter, output_format, read_houses_file
+
+HOUSES = [
+    {
+        "name": "House One",
+        "size": "25 sqm",
+        "rent": "1,000 gold",
+        "status": "auctioned (no bid yet)",
+        "city": "Thais",
+        "server": "Antica",
+    },
+    {
+        "name": "House Two",
+        "size": "35 sqm",
+        "rent": "1,500 gold",
+        "status": "rented",
+        "city": "Thais",
+        "server": "Antica",
+    },
+    {
+        "name": "House Three",
+        "size": "50 sqm",
+        "rent": "2,000 gold",
+        "status": "rented",
+        "city": "Venore",
+        "server": "Secura",
+    },
+]
+
+
+def test_csv_writer_matches_save_houses_to_file(tmp_path):
+    expected = tmp_path / "expected.csv"
+    streamed = tmp_path / "nested" / "streamed.csv"
+    save_houses_to_file(HOUSES, str(expected))
+    with CsvHouseWriter(str(streamed)) as writer:
+        for house in HOUSES:
+            writer.write([house])
+    assert streamed.read_bytes() == expected.read_bytes()
+
+
+def test_csv_writer_flushes_in_chunks(tmp_path):
+    filename = tmp_path / "houses.csv"
+    writer = CsvHouseWriter(str(filename), chunk_size=2, atomic=False)
+    writer.write(HOUSES[:1])
+    assert writer.rows_written == 0
+    writer.write(HOUSES[1:2])
+    assert writer.rows_written == 2
+    assert len(filename.read_text().splitlines()) == 3
+    writer.close()
+
+
+def test_csv_writer_flushes_the_first_page_at_once(tmp_path):
+    filename = tmp_path / "houses.csv"
+    writer = CsvHouseWriter(str(filename), chunk_size=500, atomic=False)
+    writer.write_batch(HouseBatch.from_dicts(HOUSES[:2]))
+    assert len(filename.read_text().splitlines()) == 3
+    writer.write_batch(HouseBatch.from_dicts(HOUSES[2:]))
+    assert writer.rows_written == 2
+    writer.close()
+    assert writer.rows_written == 3
+
+
+def test_csv_writer_replaces_the_file_on_close(tmp_path):
+    filename = tmp_path / "houses.csv"
+    save_houses_to_file(HOUSES[:1], str(filename))
+    previous = filename.read_bytes()
+    with CsvHouseWriter(str(filename), chunk_size=1) as writer:
+        writer.write(HOUSES)
+        assert filename.read_bytes() == previous
+    assert len(filename.read_text().splitlines()) == 4
+    with pytest.raises(RuntimeError):
+        with CsvHouseWriter(str(filename), chunk_size=1) as writer:
+            writer.write(HOUSES[:1])
+            raise RuntimeError("crawl failed")
+    assert len(filename.read_text().splitlines()) == 4
+    assert not (tmp_path / "houses.csv.tmp").exists()
+
+
+def test_output_format_from_extension():
+    assert output_format("data/houses.csv") == "csv"
+    assert output_format("data/houses.parquet") == "parquet"
+    assert output_format("data/houses.parquet/") == "parquet"
+
+
+def test_parquet_writer_partitions_by_server(tmp_path):
+    pytest.importorskip("pyarrow")
+    dataset = tmp_path / "houses.parquet"
+    with ParquetHouseWriter(str(dataset), chunk_size=1) as writer:
+        writer.write(HOUSES)
+    assert sorted(path.name for path in dataset.iterdir()) == ["server=Antica", "server=Secura"]
+    df = pd.read_parquet(dataset, filters=[("server", "==", "Antica")])
+    assert sorted(df["name"]) == ["House One", "House Two"]
+    assert isinstance(df["city"].dtype, pd.CategoricalDtype)
+
+
+def test_parquet_round_trip_through_save_houses_to_file(tmp_path):
+    pytest.importorskip("pyarrow")
+    dataset = tmp_path / "houses.parquet"
+    save_houses_to_file(HOUSES[:1], str(dataset))
+    save_houses_to_file(HOUSES, str(dataset))
+    rows = sorted(read_houses_file(str(dataset)), key=lambda row: row["name"])
+    assert rows == sorted(HOUSES, key=lambda row: row["name"])
+    assert not (tmp_path / "houses.parquet.tmp").exists()